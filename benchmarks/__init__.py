@@ -0,0 +1,23 @@
+"""
+psychrometric のベンチマーク（合成EPW・段階別の計時・結果の比較）
+
+    PYTHONPATH=src python -m benchmarks run -o bench.json
+    PYTHONPATH=src python -m benchmarks compare base.json bench.json
+"""
+from .suite import STAGES, Regression, StageResult, compare, load_results, run_dataset, run_suite, write_results
+from .synth_epw import PRESETS, SynthSpec, ensure_synth_epw, write_synth_epw
+
+__all__ = [
+    "PRESETS",
+    "STAGES",
+    "Regression",
+    "StageResult",
+    "SynthSpec",
+    "compare",
+    "ensure_synth_epw",
+    "load_results",
+    "run_dataset",
+    "run_suite",
+    "write_results",
+    "write_synth_epw",
+]
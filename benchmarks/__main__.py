@@ -0,0 +1,116 @@
+# benchmarks/__main__.py
+"""
+    python -m benchmarks run [--datasets hourly,10min,30y] [--stages ...] [--repeat 3] [--backend native] [--density kde] [-o bench.json]
+    python -m benchmarks compare BASE.json NEW.json [--threshold 0.10]
+    python -m benchmarks synth OUT.epw [--preset hourly | --years N --step-min M] [--seed S]
+
+compare は回帰があれば終了コード 1 を返す（CI で前回の結果と比べる用）。
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from .suite import DEFAULT_THRESHOLD, STAGES, compare, format_stage, load_results, run_suite, speedups, write_results
+from .synth_epw import PRESETS, SynthSpec, write_synth_epw
+
+
+def _csv_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="psychrometric のベンチマーク")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    r = sub.add_parser("run", help="合成EPWで各段階を計測する")
+    r.add_argument("--datasets", type=_csv_list, default=list(PRESETS), help=f"カンマ区切り（既定: {','.join(PRESETS)}）")
+    r.add_argument("--stages", type=_csv_list, default=list(STAGES), help=f"カンマ区切り（既定: 全段階 {','.join(STAGES)}）")
+    r.add_argument("--repeat", type=int, default=3, help="各段階の計測回数（中央値を記録）")
+    r.add_argument("--backend", default="native", help="render / end_to_end の描画バックエンド（既定: native）")
+    r.add_argument("--density", default="hist", help="render / end_to_end の密度の求め方（hist / kde。既定: hist）")
+    r.add_argument("--max-charts", type=int, default=None, help="render で描くチャート数の上限")
+    r.add_argument("--no-memory", action="store_true", help="tracemalloc によるピークメモリ計測をしない")
+    r.add_argument("--work-dir", default=None, help="合成EPW・出力SVGの置き場（既定: 一時ディレクトリ/psychro-bench）")
+    r.add_argument("--keep-outputs", action="store_true", help="描画したSVGを消さずに残す")
+    r.add_argument("-o", "--out", default=None, help="結果JSONの書き出し先")
+    r.add_argument("--baseline", default=None, help="比較する前回の結果JSON（回帰があれば終了コード 1）")
+    r.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回帰とみなす増加率（既定: 0.10）")
+
+    c = sub.add_parser("compare", help="2つの結果JSONを比べる")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回帰とみなす増加率（既定: 0.10）")
+    c.add_argument("--ignore-memory", action="store_true", help="ピークメモリは比べない")
+
+    s = sub.add_parser("synth", help="合成EPWを1つ書き出す")
+    s.add_argument("out")
+    s.add_argument("--preset", choices=list(PRESETS), default=None)
+    s.add_argument("--years", type=int, default=1)
+    s.add_argument("--step-min", type=int, default=60)
+    s.add_argument("--seed", type=int, default=0)
+    return ap.parse_args(argv)
+
+
+def _report(base: dict, new: dict, threshold: float, *, memory: bool = True) -> int:
+    for name, stages in speedups(base, new).items():
+        for stage, ratio in stages.items():
+            print(f"{name}/{stage}: x{ratio:.2f} {'faster' if ratio >= 1 else 'slower'}")
+    regs = compare(base, new, threshold=threshold, mem_threshold=threshold if memory else None)
+    for reg in regs:
+        print(f"[REGRESSION] {reg}", file=sys.stderr)
+    return 1 if regs else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+
+    if args.command == "synth":
+        spec = PRESETS[args.preset] if args.preset else SynthSpec(
+            Path(args.out).stem, years=args.years, step_min=args.step_min, seed=args.seed
+        )
+        path = write_synth_epw(args.out, spec)
+        print(f"Wrote {spec.rows} rows to {path}")
+        return 0
+
+    if args.command == "compare":
+        return _report(load_results(args.base), load_results(args.new), args.threshold, memory=not args.ignore_memory)
+
+    unknown = [d for d in args.datasets if d not in PRESETS]
+    if unknown:
+        print(f"[ERROR] Unknown datasets: {unknown} (choose from {list(PRESETS)})", file=sys.stderr)
+        return 2
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.gettempdir()) / "psychro-bench"
+    try:
+        results = run_suite(
+            [PRESETS[d] for d in args.datasets],
+            work_dir=work_dir,
+            stages=args.stages,
+            repeat=args.repeat,
+            backend=args.backend,
+            density=args.density,
+            max_charts=args.max_charts,
+            trace_memory=not args.no_memory,
+            keep_outputs=args.keep_outputs,
+            log=lambda msg: print(msg, file=sys.stderr),
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+    if args.out:
+        write_results(results, args.out)
+    else:
+        for name, d in results["datasets"].items():
+            print(name)
+            for stage, r in d["stages"].items():
+                print(f"  {format_stage(stage, r)}")
+    if args.baseline:
+        return _report(load_results(args.baseline), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
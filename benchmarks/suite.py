@@ -0,0 +1,437 @@
+# benchmarks/suite.py
+"""
+パイプラインの段階別ベンチマーク
+
+段階（STAGES）:
+- load_epw            : EPW読み込み（epw_io.load_epw）
+- get_all             : shimeri.PsychrometricCalculator.get_all（中央値気圧で全行）
+- add_psychro_columns : hr/en/skew 列の前計算（描画で実際に使う経路）
+- plan_jobs           : 月別・季節別・年間への切り出し
+- render              : 全ジョブを render_density_svg で描画（backend / density 指定）
+- postprocess_svg     : Kaleido が出したままの（レイヤー分け前の）SVGに svg_post.postprocess_svg をかける
+                        （render の出力はレイヤー分け済みで layer_svg は素通りするので使わない）
+- end_to_end          : cli.process_file（読み込み → 前計算 → 全チャート描画）
+
+各段階は repeat 回計時して中央値と最小値を取り、別に1回 tracemalloc でピークメモリを測る。
+結果は JSON（write_results）で保存し、compare で前回と比べて遅くなった段階を拾う。
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+from psychrometric.batch import plan_jobs
+from psychrometric.cli import _selection, process_file
+from psychrometric.epw_io import load_epw
+from psychrometric.main import DEFAULT_SEASONS
+from psychrometric.psychro_frame import add_psychro_columns, median_pressure_kpa
+from psychrometric.render import ExportSession, build_density_figure, render_density_svg
+from psychrometric.svg_post import postprocess_svg
+from shimeri import PsychrometricCalculator
+
+from .synth_epw import SynthSpec, ensure_synth_epw
+
+STAGES = ("load_epw", "get_all", "add_psychro_columns", "plan_jobs", "render", "postprocess_svg", "end_to_end")
+RESULTS_SCHEMA = 1
+# compare の既定しきい値（中央値がこの割合を超えて遅く / 大きくなったら回帰）
+DEFAULT_THRESHOLD = 0.10
+
+_VERSIONED = ("numpy", "pandas", "plotly", "kaleido", "shimeri", "psychrometric-tools")
+
+
+@dataclass(frozen=True)
+class StageResult:
+    """1段階の計測結果。seconds は repeat 回の中央値。"""
+    stage: str
+    seconds: float | None
+    min_seconds: float | None
+    repeats: int
+    rows: int = 0
+    charts: int = 0
+    peak_mb: float | None = None
+    error: str | None = None
+
+    @property
+    def rows_per_s(self) -> float | None:
+        return self.rows / self.seconds if self.rows and self.seconds else None
+
+    @property
+    def charts_per_s(self) -> float | None:
+        return self.charts / self.seconds if self.charts and self.seconds else None
+
+    def to_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d["rows_per_s"] = self.rows_per_s
+        d["charts_per_s"] = self.charts_per_s
+        return d
+
+
+@dataclass(frozen=True)
+class Regression:
+    """compare で見つかった回帰（metric は "seconds" か "peak_mb"）。"""
+    dataset: str
+    stage: str
+    metric: str
+    base: float
+    new: float
+
+    @property
+    def ratio(self) -> float:
+        return self.new / self.base if self.base else float("inf")
+
+    def __str__(self) -> str:
+        return f"{self.dataset}/{self.stage} {self.metric}: {self.base:.4g} -> {self.new:.4g} (x{self.ratio:.2f})"
+
+
+def _measure(fn: Callable[[], Any], repeat: int, trace_memory: bool) -> tuple[Any, list[float], float | None]:
+    """fn を repeat 回計時し、（最後の戻り値, 各回の秒数, ピークメモリ[MB]）を返す。"""
+    times: list[float] = []
+    out = None
+    for _ in range(max(1, int(repeat))):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+
+    peak_mb = None
+    if trace_memory:
+        # tracemalloc は遅くなるので計時とは別の1回で測る（numpy の確保も追跡される）
+        tracemalloc.start()
+        try:
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return out, times, peak_mb
+
+
+def _stage_result(stage: str, times: Sequence[float], peak_mb: float | None, *, rows: int = 0, charts: int = 0) -> StageResult:
+    return StageResult(
+        stage=stage,
+        seconds=statistics.median(times),
+        min_seconds=min(times),
+        repeats=len(times),
+        rows=rows,
+        charts=charts,
+        peak_mb=None if peak_mb is None else round(peak_mb, 3),
+    )
+
+
+def _raw_exports(jobs: Sequence, raw_dir: Path, density: str) -> dict[Path, bytes]:
+    """
+    postprocess_svg 段階の入力：各ジョブの図を Kaleido で書き出したままのSVG（layer_svg 前）。
+    backend に関係なく Plotly の図で作る（native の出力は最初からレイヤー分け済みのため）。
+    """
+    figs = [build_density_figure(j.df, j.title, density=density) for j in jobs]
+    with ExportSession() as session:
+        images = session.to_svg_many(figs)
+    out: dict[Path, bytes] = {}
+    for j, img in zip(jobs, images):
+        if isinstance(img, Exception):
+            raise img
+        p = raw_dir / Path(j.out_svg).name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        out[p] = img
+    return out
+
+
+def run_dataset(
+    epw_path: str | Path,
+    *,
+    stages: Iterable[str] = STAGES,
+    repeat: int = 3,
+    backend: str = "native",
+    density: str = "hist",
+    max_charts: int | None = None,
+    work_dir: str | Path,
+    trace_memory: bool = True,
+) -> dict[str, Any]:
+    """
+    1つのEPWで各段階を計測する。前の段階の出力（df, jobs, SVG）は次の段階の入力に使う。
+    段階が失敗したら error に記録し、それに依存する段階は飛ばす（error="skipped: ..."）。
+    """
+    requested = set(stages)
+    unknown = requested - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)} (choose from {STAGES})")
+    stages = [s for s in STAGES if s in requested]
+    epw_path = Path(epw_path)
+    out_dir = Path(work_dir) / f"out_{epw_path.stem}"
+
+    results: dict[str, StageResult] = {}
+    df = None
+    jobs = None
+
+    def _fail(stage: str, err: str) -> None:
+        results[stage] = StageResult(stage, None, None, 0, error=err)
+
+    # 以降の段階に必要なものは計測対象外でも用意する
+    need_df = any(s in stages for s in ("get_all", "add_psychro_columns", "plan_jobs", "render", "postprocess_svg"))
+    if "load_epw" in stages or need_df:
+        try:
+            (df, _meta), times, peak = _measure(lambda: load_epw(epw_path), repeat if "load_epw" in stages else 1,
+                                               trace_memory and "load_epw" in stages)
+            if "load_epw" in stages:
+                results["load_epw"] = _stage_result("load_epw", times, peak, rows=len(df))
+        except Exception as e:
+            _fail("load_epw", f"{type(e).__name__}: {e}")
+
+    if "get_all" in stages:
+        if df is None:
+            _fail("get_all", "skipped: load_epw failed")
+        else:
+            db = df["db_c"].to_numpy(dtype=float)
+            rh = df["rh_pct"].to_numpy(dtype=float)
+            calc = PsychrometricCalculator(pressure=median_pressure_kpa(df))
+            try:
+                _, times, peak = _measure(lambda: calc.get_all(db=db, rh=rh), repeat, trace_memory)
+                results["get_all"] = _stage_result("get_all", times, peak, rows=db.size)
+            except Exception as e:
+                _fail("get_all", f"{type(e).__name__}: {e}")
+
+    need_cols = any(s in stages for s in ("add_psychro_columns", "plan_jobs", "render", "postprocess_svg"))
+    if need_cols and df is not None:
+        measured = "add_psychro_columns" in stages
+        try:
+            df_cols, times, peak = _measure(lambda: add_psychro_columns(df), repeat if measured else 1, trace_memory and measured)
+            if measured:
+                results["add_psychro_columns"] = _stage_result("add_psychro_columns", times, peak, rows=len(df))
+            df = df_cols
+        except Exception as e:
+            df = None
+            _fail("add_psychro_columns", f"{type(e).__name__}: {e}")
+    elif need_cols:
+        _fail("add_psychro_columns", "skipped: load_epw failed")
+
+    need_jobs = any(s in stages for s in ("plan_jobs", "render", "postprocess_svg"))
+    if need_jobs and df is not None:
+        measured = "plan_jobs" in stages
+        try:
+            jobs, times, peak = _measure(
+                lambda: plan_jobs(df, "Bench", out_dir, seasons=DEFAULT_SEASONS, show_counts=False),
+                repeat if measured else 1,
+                trace_memory and measured,
+            )
+            if max_charts is not None:
+                jobs = jobs[: int(max_charts)]
+            if measured:
+                results["plan_jobs"] = _stage_result("plan_jobs", times, peak, rows=len(df), charts=len(jobs))
+        except Exception as e:
+            _fail("plan_jobs", f"{type(e).__name__}: {e}")
+    elif "plan_jobs" in stages:
+        _fail("plan_jobs", "skipped: add_psychro_columns failed")
+
+    if "render" in stages:
+        if jobs is None:
+            _fail("render", "skipped: plan_jobs failed")
+        else:
+            def _render_all() -> list[Path]:
+                return [render_density_svg(j.df, j.out_svg, j.title, backend=backend, density=density) for j in jobs]
+
+            try:
+                with ExportSession():
+                    _, times, peak = _measure(_render_all, repeat, trace_memory)
+                rows = sum(len(j.df) for j in jobs)
+                results["render"] = _stage_result("render", times, peak, rows=rows, charts=len(jobs))
+            except Exception as e:
+                _fail("render", f"{type(e).__name__}: {e}")
+
+    if "postprocess_svg" in stages:
+        if jobs is None:
+            _fail("postprocess_svg", "skipped: plan_jobs failed")
+        else:
+            try:
+                originals = _raw_exports(jobs, out_dir / "raw", density)
+            except Exception as e:
+                originals = {}
+                _fail("postprocess_svg", f"skipped: export failed ({type(e).__name__}: {e})")
+
+            if originals:
+                def _post_all() -> None:
+                    # 毎回レイヤー分け前の出力に戻してから並べ替える
+                    for p, raw in originals.items():
+                        p.write_bytes(raw)
+                        postprocess_svg(p)
+
+                try:
+                    _, times, peak = _measure(_post_all, repeat, trace_memory)
+                    results["postprocess_svg"] = _stage_result("postprocess_svg", times, peak, charts=len(originals))
+                except Exception as e:
+                    _fail("postprocess_svg", f"{type(e).__name__}: {e}")
+
+    if "end_to_end" in stages:
+        sel = _selection(epw_path, out_dir / "e2e", "all", None)
+
+        def _e2e() -> dict[str, Any]:
+            # マニフェストが残っていると2回目以降は全チャートを飛ばしてしまうので、毎回描き直す
+            summary = process_file(sel, DEFAULT_SEASONS, use_cache=False, incremental=False,
+                                   backend=backend, density=density)
+            if summary["error"]:
+                raise RuntimeError(summary["error"])
+            return summary
+
+        try:
+            with ExportSession():
+                summary, times, peak = _measure(_e2e, repeat, trace_memory)
+            failed = [c for c in summary["charts"] if not c["ok"]]
+            r = _stage_result("end_to_end", times, peak, rows=len(load_epw(epw_path)[0]), charts=len(summary["charts"]))
+            results["end_to_end"] = r if not failed else StageResult(**{**asdict(r), "error": failed[0]["error"]})
+        except Exception as e:
+            _fail("end_to_end", f"{type(e).__name__}: {e}")
+
+    return {
+        "epw": str(epw_path),
+        "file_bytes": epw_path.stat().st_size,
+        "rows": int(len(df)) if df is not None else None,
+        "stages": {s: results[s].to_dict() for s in stages if s in results},
+    }
+
+
+def environment() -> dict[str, Any]:
+    """結果に添える実行環境（比較するときに条件が揃っているかの確認用）。"""
+    versions = {}
+    for name in _VERSIONED:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_rev": rev,
+        "versions": versions,
+    }
+
+
+def run_suite(
+    specs: Sequence[SynthSpec],
+    *,
+    work_dir: str | Path,
+    stages: Iterable[str] = STAGES,
+    repeat: int = 3,
+    backend: str = "native",
+    density: str = "hist",
+    max_charts: int | None = None,
+    trace_memory: bool = True,
+    keep_outputs: bool = False,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """合成EPW（work_dir に作って使い回す）ごとに run_dataset を回し、結果を1つの dict にまとめる。"""
+    work_dir = Path(work_dir)
+    stages = tuple(stages)
+    datasets: dict[str, Any] = {}
+    for spec in specs:
+        if log:
+            log(f"[bench] {spec.name}: {spec.rows} rows")
+        epw = ensure_synth_epw(work_dir, spec)
+        res = run_dataset(
+            epw, stages=stages, repeat=repeat, backend=backend, density=density, max_charts=max_charts,
+            work_dir=work_dir, trace_memory=trace_memory,
+        )
+        res["spec"] = asdict(spec)
+        datasets[spec.name] = res
+        if not keep_outputs:
+            shutil.rmtree(work_dir / f"out_{epw.stem}", ignore_errors=True)
+        if log:
+            for s, r in res["stages"].items():
+                log(f"[bench]   {format_stage(s, r)}")
+
+    return {
+        "schema": RESULTS_SCHEMA,
+        "environment": environment(),
+        "settings": {
+            "repeat": repeat, "backend": backend, "density": density, "max_charts": max_charts, "trace_memory": trace_memory,
+        },
+        "datasets": datasets,
+    }
+
+
+def format_stage(stage: str, r: dict[str, Any]) -> str:
+    if r.get("error") and r.get("seconds") is None:
+        return f"{stage:<20} {r['error']}"
+    parts = [f"{stage:<20} {r['seconds']:9.4f} s"]
+    if r.get("rows_per_s"):
+        parts.append(f"{r['rows_per_s']:12,.0f} rows/s")
+    if r.get("charts_per_s"):
+        parts.append(f"{r['charts_per_s']:8.2f} charts/s")
+    if r.get("peak_mb") is not None:
+        parts.append(f"peak {r['peak_mb']:8.1f} MB")
+    if r.get("error"):
+        parts.append(f"({r['error']})")
+    return "  ".join(parts)
+
+
+def write_results(results: dict[str, Any], path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    results = json.loads(Path(path).read_text(encoding="utf-8"))
+    if results.get("schema") != RESULTS_SCHEMA:
+        raise ValueError(f"Unsupported benchmark results schema: {results.get('schema')!r} ({path})")
+    return results
+
+
+def compare(
+    base: dict[str, Any],
+    new: dict[str, Any],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+    mem_threshold: float | None = DEFAULT_THRESHOLD,
+) -> list[Regression]:
+    """
+    2回分の結果を比べ、中央値が base * (1 + threshold) を超えた段階を返す
+    （mem_threshold を渡すとピークメモリも同様に比べる）。両方にある dataset / stage だけを比べる。
+    """
+    found: list[Regression] = []
+    for name, b in base["datasets"].items():
+        n = new["datasets"].get(name)
+        if n is None:
+            continue
+        for stage, bs in b["stages"].items():
+            ns = n["stages"].get(stage)
+            if ns is None or bs.get("seconds") is None or ns.get("seconds") is None:
+                continue
+            if ns["seconds"] > bs["seconds"] * (1 + threshold):
+                found.append(Regression(name, stage, "seconds", bs["seconds"], ns["seconds"]))
+            if mem_threshold is not None and bs.get("peak_mb") and ns.get("peak_mb") is not None:
+                if ns["peak_mb"] > bs["peak_mb"] * (1 + mem_threshold):
+                    found.append(Regression(name, stage, "peak_mb", bs["peak_mb"], ns["peak_mb"]))
+    return found
+
+
+def speedups(base: dict[str, Any], new: dict[str, Any]) -> dict[str, dict[str, float]]:
+    """dataset → stage → base/new の秒数比（>1 なら速くなった）。"""
+    out: dict[str, dict[str, float]] = {}
+    for name, b in base["datasets"].items():
+        n = new["datasets"].get(name)
+        if n is None:
+            continue
+        for stage, bs in b["stages"].items():
+            ns = n["stages"].get(stage)
+            if ns and bs.get("seconds") and ns.get("seconds"):
+                out.setdefault(name, {})[stage] = round(bs["seconds"] / ns["seconds"], 3)
+    return out
@@ -0,0 +1,125 @@
+# benchmarks/synth_epw.py
+"""
+ベンチマーク用の合成EPW（乱数シード固定で毎回同じ内容）
+
+- ヘッダ8行（LOCATION / DESIGN CONDITIONS / ... / DATA PERIODS）とデータ行35列の正しい形式
+- 気温・相対湿度・気圧は季節変動 + 日変動 + 正規ノイズ。欠損コード（乾球 99.9）も少し混ぜる
+- 年は365日（2/29 なし）。複数年は年を変えて連結する（30年連結の AMY ファイル相当）
+- 1時間値は hour=1..24, minute=0、サブアワリーは minute=step..60（EnergyPlus の区間終端表記）
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_DATA_SOURCE = "?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9*9*9*9"
+# 気圧より後ろの25列（放射・風・雲量など。描画には使わないので固定値）
+_TAIL_FIELDS = "0,0,300,0,0,0,0,0,0,0,180,2.0,5,5,20.0,77777,9,999999999,0,0.1,0,88,0.000,0.0,0.0"
+
+
+@dataclass(frozen=True)
+class SynthSpec:
+    """合成EPWの条件。name は出力ファイル名・結果JSONのキーに使う。"""
+    name: str
+    years: int = 1
+    step_min: int = 60
+    start_year: int = 1991
+    seed: int = 0
+    missing_rate: float = 0.002
+
+    @property
+    def rows(self) -> int:
+        return self.years * 365 * 24 * (60 // self.step_min)
+
+
+# 標準のデータセット: 1年1時間値（8760行）/ 1年10分値（52,560行）/ 30年1時間値（262,800行）
+PRESETS: dict[str, SynthSpec] = {
+    "hourly": SynthSpec("hourly"),
+    "10min": SynthSpec("10min", step_min=10),
+    "30y": SynthSpec("30y", years=30),
+}
+
+
+def _header(spec: SynthSpec) -> list[str]:
+    per_hour = 60 // spec.step_min
+    return [
+        "LOCATION,Synthetic,Tokyo,JPN,SYN,476620,35.69,139.77,9.0,35.0",
+        "DESIGN CONDITIONS,0",
+        "TYPICAL/EXTREME PERIODS,0",
+        "GROUND TEMPERATURES,0",
+        "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0",
+        f"COMMENTS 1,Synthetic benchmark data (seed={spec.seed})",
+        f"COMMENTS 2,{spec.years} year(s) at {spec.step_min}-minute steps",
+        f"DATA PERIODS,1,{per_hour},Data,Sunday, 1/ 1,12/31",
+    ]
+
+
+def synth_frame(spec: SynthSpec) -> pd.DataFrame:
+    """spec のデータ部を DataFrame（EPWの先頭10列分）で返す。"""
+    if spec.step_min <= 0 or 60 % spec.step_min:
+        raise ValueError(f"step_min must divide 60: {spec.step_min}")
+    rng = np.random.default_rng(spec.seed)
+    per_hour = 60 // spec.step_min
+
+    # 1年分のカレンダー（月・日・時・分）を作り、年数分繰り返す
+    month = np.repeat(np.arange(1, 13), _MONTH_DAYS)
+    day = np.concatenate([np.arange(1, n + 1) for n in _MONTH_DAYS])
+    doy = np.arange(1, 366)
+    steps = 24 * per_hour
+    month = np.tile(np.repeat(month, steps), spec.years)
+    day = np.tile(np.repeat(day, steps), spec.years)
+    doy = np.tile(np.repeat(doy, steps), spec.years)
+    hour = np.tile(np.repeat(np.arange(1, 25), per_hour), 365 * spec.years)
+    minute = np.tile(np.arange(1, per_hour + 1) * spec.step_min, 365 * 24 * spec.years)
+    if per_hour == 1:
+        minute[:] = 0
+    year = np.repeat(np.arange(spec.years) + spec.start_year, 365 * steps)
+    n = year.size
+
+    t_hour = hour - 1 + minute / 60.0
+    db = 15 - 10 * np.cos(2 * np.pi * (doy - 20) / 365) + 4 * np.sin(2 * np.pi * (t_hour - 9) / 24) + rng.normal(0, 2, n)
+    rh = np.clip(65 + 15 * np.sin(2 * np.pi * doy / 365) - 1.5 * (db - 15) + rng.normal(0, 8, n), 5, 100)
+    p = 101325 + rng.normal(0, 700, n)
+
+    db = np.round(db, 1)
+    db[rng.random(n) < spec.missing_rate] = 99.9  # 欠損コード
+
+    return pd.DataFrame(
+        {
+            "year": year,
+            "month": month,
+            "day": day,
+            "hour": hour,
+            "minute": minute,
+            "source": _DATA_SOURCE,
+            "db": db,
+            "dp": np.round(db - 5, 1),
+            "rh": np.round(rh).astype(int),
+            "p": np.round(p).astype(int),
+        }
+    )
+
+
+def write_synth_epw(path: str | Path, spec: SynthSpec) -> Path:
+    """spec の合成EPWを path に書き出す（同じ spec なら毎回同じバイト列）。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = synth_frame(spec)
+    body = df.to_csv(header=False, index=False, lineterminator="\n", float_format="%.1f")
+    body = body.replace("\n", f",{_TAIL_FIELDS}\n")
+    with path.open("w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(_header(spec)) + "\n")
+        f.write(body)
+    return path
+
+
+def ensure_synth_epw(work_dir: str | Path, spec: SynthSpec) -> Path:
+    """work_dir/<name>_<条件>.epw を（無ければ）作って返す。"""
+    path = Path(work_dir) / f"{spec.name}_y{spec.years}_s{spec.step_min}_seed{spec.seed}.epw"
+    if not path.exists():
+        write_synth_epw(path, spec)
+    return path
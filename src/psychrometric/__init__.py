@@ -1,3 +1,6 @@
 """psychrimetric package initializer."""
 
-__all__ = []
+# pyproject.toml の version と揃える（manifest の指紋に入る）
+__version__ = "0.1.0"
+
+__all__ = ["__version__"]
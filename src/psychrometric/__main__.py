@@ -0,0 +1,7 @@
+# src/psychrimetric/__main__.py
+# python -m psychrometric ... でヘッドレスCLIを起動する
+import sys
+
+from .cli import main
+
+sys.exit(main())
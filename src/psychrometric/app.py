@@ -5,21 +5,26 @@ except Exception:
     raise SystemExit(1)
 
 import os
+import threading
 import time
 import tempfile
 from pathlib import Path
 
 try:
     # when run as a package: python -m psychrometric.app
-    from .epw_io import load_epw
-    from .render import render_density_svg
-    from .period_filter import split_by_month, split_by_seasons
+    from .batch import plan_jobs, render_batch
+    from .epw_cache import load_epw_cached
+    from .preview import Debouncer, PreviewSource, PreviewStyle
+    from .psychro_frame import add_psychro_columns
+    from .render import ExportSession
 except Exception:
     # when run as a script: python src/psychrometric/app.py
     try:
-        from psychrometric.epw_io import load_epw
-        from psychrometric.render import render_density_svg
-        from psychrometric.period_filter import split_by_month, split_by_seasons
+        from psychrometric.batch import plan_jobs, render_batch
+        from psychrometric.epw_cache import load_epw_cached
+        from psychrometric.preview import Debouncer, PreviewSource, PreviewStyle
+        from psychrometric.psychro_frame import add_psychro_columns
+        from psychrometric.render import ExportSession
     except Exception:
         raise
 
@@ -30,13 +35,34 @@ DEFAULT_SEASONS = {
     "Autumn": [9, 10, 11],
 }
 
+# 並列描画のワーカー数（環境変数 PSYCHRO_JOBS、未指定/0 なら CPU数）
+RENDER_JOBS = int(os.environ.get("PSYCHRO_JOBS", "0") or 0) or None
+
+# プレビューパネルで選べるカラースケール（render_density_svg の docstring の例から）
+PREVIEW_COLORSCALES = (
+    "Blues", "Greens", "Greys", "Purples", "Reds", "BuGn", "GnBu", "OrRd", "PuBu", "YlGnBu", "YlOrRd",
+    "Viridis", "Plasma", "Inferno", "Magma", "Cividis", "Turbo", "RdBu", "Spectral",
+)
+PREVIEW_SIZE = (640, 462)
+
 
 def main(page: ft.Page):
     page.title = "Psychrometric (Flet)"
+    page.scroll = ft.ScrollMode.AUTO
 
     status = ft.Text("Ready")
+    progress = ft.ProgressBar(value=0, visible=False)
     page.add(ft.Text("Hello — psychrometric Flet app."))
 
+    # 実行中のパイプラインの取り消し用（Cancel ボタンでセットする）
+    cancel_event = threading.Event()
+
+    # 読み込み済みの EPW（プレビューと書き出しで共有する）
+    loaded: dict = {"epw": None, "df": None, "location": None, "source": None}
+    # プレビュー描画の世代（古い描画結果で新しいものを上書きしない）
+    preview_gen = [0]
+    debounce = Debouncer()
+
     # Use native tkinter file dialog for desktop builds (FilePicker may be unsupported)
     try:
         import tkinter as _tk
@@ -45,15 +71,11 @@ def main(page: ft.Page):
         _tk = None
         _filedialog = None
 
-    def _on_click(e: ft.Event):
-        status.value = "Opening file picker..."
-        page.update()
-
+    def _ask_epw() -> str | None:
         if _filedialog is None:
             status.value = "tkinter not available: cannot open file dialog."
             page.update()
-            return
-
+            return None
         try:
             root = _tk.Tk()
             root.withdraw()
@@ -65,64 +87,227 @@ def main(page: ft.Page):
         except Exception as ex:
             status.value = f"File dialog error: {ex}"
             page.update()
-            return
-
+            return None
         if not epw_path:
             status.value = "No file selected."
             page.update()
-            return
+            return None
+        return epw_path
+
+    def _load(epw_path: str):
+        """EPW を読み込んで列を前計算する（同じファイルなら読み込み済みのものを使う）。"""
+        if loaded["epw"] != epw_path:
+            df, meta = load_epw_cached(epw_path)
+            df = add_psychro_columns(df)
+            loaded.update(epw=epw_path, df=df, location=meta.location or "EPW", source=None)
+        return loaded["df"], loaded["location"]
 
-        status.value = f"Loading {Path(epw_path).name}..."
+    # --- プレビューパネル ---
+    def _slider(label: str, lo: float, hi: float, value: float, divisions: int, round_: int = 0) -> ft.Slider:
+        return ft.Slider(
+            value=value, min=lo, max=hi, divisions=divisions, round=round_, label=f"{label}: {{value}}",
+            on_change=_on_style_change, width=300,
+        )
+
+    def _current_style() -> PreviewStyle:
+        return PreviewStyle(
+            colorscale=colorscale_dd.value or PreviewStyle.colorscale,
+            nbinsx=int(nbinsx_sl.value),
+            nbinsy=int(nbinsy_sl.value),
+            ncontours=int(ncontours_sl.value),
+            opacity=round(float(opacity_sl.value), 2),
+        )
+
+    def _refresh_preview(gen: int):
+        """Debouncer のスレッドで呼ばれる。メモリ上でSVGを作り直して差し替える。"""
+        source = loaded["source"]
+        if source is None or not period_dd.value:
+            return
+        t0 = time.perf_counter()
+        try:
+            svg = source.render(period_dd.value, _current_style(), width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1])
+        except Exception as ex:
+            status.value = f"Preview error: {ex}"
+            page.update()
+            return
+        if gen != preview_gen[0]:
+            return  # 描画中に次の変更が来た
+        preview_img.src = svg
+        preview_img.visible = True
+        status.value = f"Preview {period_dd.value}: {(time.perf_counter() - t0) * 1000:.0f} ms"
         page.update()
 
+    def _on_style_change(e: ft.Event | None = None):
+        preview_gen[0] += 1
+        debounce(_refresh_preview, preview_gen[0])
+
+    period_dd = ft.Dropdown(label="Period", options=[], on_select=_on_style_change, width=160)
+    colorscale_dd = ft.Dropdown(
+        label="Colorscale",
+        value=PreviewStyle.colorscale,
+        options=[ft.DropdownOption(c) for c in PREVIEW_COLORSCALES],
+        on_select=_on_style_change,
+        width=160,
+    )
+    nbinsx_sl = _slider("nbinsx", 10, 120, PreviewStyle.nbinsx, 110)
+    nbinsy_sl = _slider("nbinsy", 10, 90, PreviewStyle.nbinsy, 80)
+    ncontours_sl = _slider("ncontours", 2, 30, PreviewStyle.ncontours, 28)
+    opacity_sl = _slider("opacity", 0.1, 1.0, PreviewStyle.opacity, 18, 2)
+    # 初回描画まで隠しておく（src は空の SVG）
+    preview_img = ft.Image(
+        src=b'<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1"/>',
+        width=PREVIEW_SIZE[0], height=PREVIEW_SIZE[1], visible=False,
+    )
+    preview_panel = ft.Column(
+        [
+            ft.Row([period_dd, colorscale_dd]),
+            ft.Row([ft.Text("nbinsx", width=70), nbinsx_sl, ft.Text("nbinsy", width=70), nbinsy_sl]),
+            ft.Row([ft.Text("ncontours", width=70), ncontours_sl, ft.Text("opacity", width=70), opacity_sl]),
+            preview_img,
+        ],
+        visible=False,
+    )
+
+    def _preview_worker(epw_path: str):
+        """EPW を読み込み、PreviewSource を作って最初のプレビューを出す（page.run_thread）。"""
         try:
-            df, meta = load_epw(epw_path)
+            status.value = f"Loading {Path(epw_path).name}..."
+            progress.value = None
+            page.update()
+            df, loc_name = _load(epw_path)
+            if loaded["source"] is None:
+                loaded["source"] = PreviewSource(df, loc_name, seasons=DEFAULT_SEASONS)
+            names = loaded["source"].names
+            period_dd.options = [ft.DropdownOption(n) for n in names]
+            if period_dd.value not in names:
+                period_dd.value = "Yearly" if "Yearly" in names else (names[0] if names else None)
+            preview_panel.visible = True
+            status.value = f"Loaded {Path(epw_path).name} ({loc_name})"
+        except Exception as ex:
+            status.value = f"Error: {ex}"
+        finally:
+            _set_running(False)
+        _on_style_change()
 
-            # Ask user where to save the generated SVGs (native dialog)
-            out_dir = None
-            if _filedialog is not None:
-                try:
-                    root2 = _tk.Tk()
-                    root2.withdraw()
-                    out_dir = _filedialog.askdirectory(title="Select Output Directory")
-                    root2.destroy()
-                except Exception:
-                    out_dir = None
-
-            if not out_dir:
-                out_dir = tempfile.gettempdir()
-
-            out_path = Path(out_dir)
-            out_path.mkdir(parents=True, exist_ok=True)
-            loc_name = meta.location or "EPW"
+    def _on_open(e: ft.Event):
+        status.value = "Opening file picker..."
+        page.update()
+        epw_path = _ask_epw()
+        if not epw_path:
+            return
+        _set_running(True, cancellable=False)
+        page.run_thread(_preview_worker, epw_path)
 
-            # 1. Yearly
-            render_density_svg(df, out_path / f"{loc_name}_Yearly.svg", title=f"{loc_name} / Yearly")
+    # --- 書き出し（確定） ---
+    def _set_running(running: bool, *, cancellable: bool = True):
+        open_btn.disabled = running
+        btn.disabled = running
+        cancel_btn.disabled = not (running and cancellable)
+        progress.visible = running
+        page.update()
 
-            # 2. Seasonal
-            for name, d in split_by_seasons(df, DEFAULT_SEASONS).items():
-                if not d.empty:
-                    render_density_svg(d, out_path / f"{loc_name}_{name}.svg", title=f"{loc_name} / {name}")
+    def _pipeline(epw_path: str, out_path: Path, style: PreviewStyle, previewed: bool):
+        """
+        読み込み → 描画をバックグラウンド（page.run_thread）で実行する。
+        previewed=True（プレビューを出している）ならプレビューと同じ native バックエンドで書き出す。
+        ジョブが1つ終わるたびに進捗（n/全数・期間・経過時間）をページへ送る。
+        """
+        t0 = time.perf_counter()
+        try:
+            status.value = f"Loading {Path(epw_path).name}..."
+            progress.value = None  # 読み込み中は不定表示
+            page.update()
 
-            # 3. Monthly
-            for m, d in split_by_month(df).items():
-                if not d.empty:
-                    render_density_svg(d, out_path / f"{loc_name}_M{m:02d}.svg", title=f"{loc_name} / Month {m:02d}")
+            df, loc_name = _load(epw_path)
+            jobs = plan_jobs(df, loc_name, out_path, seasons=DEFAULT_SEASONS, show_counts=False)
 
-            status.value = f"Rendered all charts in: {out_path}"
+            progress.value = 0
+            status.value = f"Rendering 0/{len(jobs)}..."
             page.update()
+
+            def _on_progress(done: int, total: int, r):
+                progress.value = done / total
+                mark = "" if r.ok else " (failed)"
+                status.value = f"Rendered {done}/{total}: {r.name}{mark} — {time.perf_counter() - t0:.1f} s"
+                page.update()
+
+            with ExportSession():
+                results = render_batch(
+                    jobs,
+                    n_jobs=RENDER_JOBS,
+                    on_progress=_on_progress,
+                    cancel_event=cancel_event,
+                    **style.render_kwargs(previewed=previewed),
+                )
+
+            elapsed = time.perf_counter() - t0
+            n_cancelled = sum(1 for r in results if r.cancelled)
+            failed = [r for r in results if not r.ok and not r.cancelled]
+            if failed:
+                status.value = "Error: " + "; ".join(f"{r.name}: {r.error}" for r in failed)
+                return
+            if n_cancelled:
+                status.value = f"Cancelled ({len(results) - n_cancelled}/{len(results)} rendered in {out_path})"
+                return
+
+            status.value = f"Rendered all charts in: {out_path} ({elapsed:.1f} s)"
             try:
                 os.startfile(out_path)
             except Exception:
                 status.value = f"Rendered in {out_path} (open manually)"
-                page.update()
         except Exception as ex:
             status.value = f"Error: {ex}"
+        finally:
+            _set_running(False)
+
+    def _on_click(e: ft.Event):
+        # 読み込み済みならその EPW とプレビューのスタイルで書き出す
+        epw_path = loaded["epw"]
+        if epw_path is None:
+            status.value = "Opening file picker..."
+            page.update()
+            epw_path = _ask_epw()
+            if not epw_path:
+                return
+
+        # Ask user where to save the generated SVGs (native dialog)
+        out_dir = None
+        try:
+            root2 = _tk.Tk()
+            root2.withdraw()
+            out_dir = _filedialog.askdirectory(title="Select Output Directory")
+            root2.destroy()
+        except Exception:
+            out_dir = None
+
+        if not out_dir:
+            out_dir = tempfile.gettempdir()
+
+        out_path = Path(out_dir)
+        try:
+            out_path.mkdir(parents=True, exist_ok=True)
+        except OSError as ex:
+            status.value = f"Error: {ex}"
             page.update()
+            return
+
+        cancel_event.clear()
+        _set_running(True)
+        page.run_thread(_pipeline, epw_path, out_path, _current_style(), loaded["source"] is not None)
+
+    def _on_cancel(e: ft.Event):
+        cancel_event.set()
+        cancel_btn.disabled = True
+        status.value = "Cancelling (waiting for running charts)..."
+        page.update()
 
+    open_btn = ft.Button("Open EPW (preview)", on_click=_on_open)
     btn = ft.Button("Make_graph!", on_click=_on_click)
-    page.add(btn)
+    cancel_btn = ft.Button("Cancel", on_click=_on_cancel, disabled=True)
+    page.add(ft.Row([open_btn, btn, cancel_btn]))
+    page.add(progress)
     page.add(status)
+    page.add(preview_panel)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,313 @@
+# src/psychrimetric/batch.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, replace
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Sequence
+
+import pandas as pd
+
+from .density import SharedScale
+from .manifest import BuildManifest, data_digest, fingerprint, temp_path
+from .period_filter import CalendarIndex, split_by_month, split_by_seasons
+from .render import ExportSession, density_grid, render_density_svg
+from .spans import span
+from .svg_post import SvgOptimize, optimize_svg_file
+
+
+@dataclass(frozen=True, eq=False)
+class RenderJob:
+    """
+    1枚のチャート描画ジョブ（期間名, 期間データ, タイトル, 出力先）。
+
+    group: 色を揃える単位（plan_jobs では "monthly" / "seasonal" / "yearly"）
+    scale: 共有スケール（apply_scales() で入る。None ならチャートごとに正規化する）
+    """
+    name: str
+    df: pd.DataFrame
+    title: str
+    out_svg: Path
+    group: str = ""
+    scale: SharedScale | None = None
+
+
+@dataclass(frozen=True)
+class RenderResult:
+    name: str
+    out_svg: Path
+    ok: bool
+    error: str | None = None
+    elapsed_s: float = 0.0
+    bytes_before: int | None = None  # optimize 指定時のみ
+    bytes_after: int | None = None
+    cancelled: bool = False  # cancel_event で実行前に取り消されたジョブ
+    skipped: bool = False  # マニフェストの指紋が同じで描画を飛ばしたジョブ（ok=True）
+
+
+# render_batch の進捗通知: (完了数, 全ジョブ数, 完了したジョブの結果)
+ProgressCallback = Callable[[int, int, RenderResult], None]
+
+# キャンセル確認の間隔 [s]（プール実行中）
+_POLL_S = 0.2
+
+
+def plan_jobs(
+    df: pd.DataFrame,
+    location: str,
+    out_dir: str | Path,
+    *,
+    run_monthly: bool = True,
+    run_seasonal: bool = True,
+    run_yearly: bool = True,
+    seasons: Mapping[str, Iterable[int]] | None = None,
+    show_counts: bool = True,
+) -> list[RenderJob]:
+    """
+    main.main と同じ命名規則で 月別 / 季節別 / 年間 のジョブ一覧を作る。
+    データが0件の期間はスキップする。
+    """
+    out_dir = Path(out_dir)
+
+    def _title(label: str, d: pd.DataFrame) -> str:
+        return f"{location} / {label} (N={len(d)})" if show_counts else f"{location} / {label}"
+
+    jobs: list[RenderJob] = []
+    index = CalendarIndex.from_df(df) if run_monthly or run_seasonal else None
+
+    if run_monthly:
+        for m, d in split_by_month(df, index).items():
+            if len(d) == 0:
+                continue
+            jobs.append(
+                RenderJob(f"M{m:02d}", d, _title(f"Month {m:02d}", d), out_dir / f"{location}_M{m:02d}.svg", "monthly")
+            )
+
+    if run_seasonal and seasons:
+        for name, d in split_by_seasons(df, seasons, index).items():
+            if len(d) == 0:
+                continue
+            jobs.append(RenderJob(name, d, _title(name, d), out_dir / f"{location}_{name}.svg", "seasonal"))
+
+    if run_yearly and len(df) > 0:
+        jobs.append(RenderJob("Yearly", df, _title("Yearly", df), out_dir / f"{location}_Yearly.svg", "yearly"))
+
+    return jobs
+
+
+def scan_jobs(
+    jobs: Iterable[RenderJob],
+    *,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    ncontours: int = 10,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> dict[str, SharedScale]:
+    """
+    1回目のパス: 各ジョブの密度グリッドを描画と同じビン分け（density="kde" なら同じ KDE）で求め、
+    group ごとの共有スケールを返す。
+
+    - 期間データの x_skew / y_skew（add_psychro_columns() 済みの列）を数えるだけで、読み直し・再計算はしない
+    - グリッドは最大値を取ったら捨てるので、メモリはジョブ数によらない
+    - 地点をまたいで揃えるときは、地点ごとの結果を merge_scales() で畳み込む
+    """
+    scales: dict[str, SharedScale] = {}
+    with span("batch.scan") as sp:
+        n = 0
+        for job in jobs:
+            if len(job.df) == 0:
+                continue
+            grid = density_grid(job.df, nbinsx=nbinsx, nbinsy=nbinsy, density=density, bandwidth=bandwidth)
+            s = SharedScale.from_grid(grid, ncontours=ncontours)
+            scales[job.group] = scales[job.group].merge(s) if job.group in scales else s
+            n += 1
+        sp.set(jobs=n, groups=len(scales))
+    return scales
+
+
+def merge_scales(a: Mapping[str, SharedScale], b: Mapping[str, SharedScale]) -> dict[str, SharedScale]:
+    """group ごとの共有スケールを畳み込む（どちらかにしか無い group はそのまま残す）。"""
+    out = dict(a)
+    for group, s in b.items():
+        out[group] = out[group].merge(s) if group in out else s
+    return out
+
+
+def apply_scales(jobs: Iterable[RenderJob], scales: Mapping[str, SharedScale]) -> list[RenderJob]:
+    """2回目のパスの準備: 各ジョブに group の共有スケールを持たせる（無い group は個別に正規化のまま）。"""
+    return [replace(j, scale=scales.get(j.group, j.scale)) for j in jobs]
+
+
+def resolve_jobs(n_jobs: int | None, n_tasks: int) -> int:
+    """
+    ワーカー数を決める。None/0 → CPU数, 負値 → CPU数+1+n（-1で全コア）。
+    タスク数より多くはしない。
+    """
+    cpu = os.cpu_count() or 1
+    if not n_jobs:
+        n = cpu
+    elif n_jobs < 0:
+        n = max(1, cpu + 1 + n_jobs)
+    else:
+        n = n_jobs
+    return max(1, min(n, n_tasks))
+
+
+def _init_worker() -> None:
+    # ワーカーごとに Kaleido を1つだけ起動して使い回す（プロセス終了時に閉じる）
+    session = ExportSession().open()
+    Finalize(session, session.close, exitpriority=10)
+
+
+def job_fingerprint(job: RenderJob, render_kwargs: Mapping[str, Any], optimize: SvgOptimize | None = None) -> str:
+    """マニフェストに記録する指紋（期間データ + タイトル + 描画パラメータ + 共有スケール + SVG 最適化の設定 + バージョン）。"""
+    params = {
+        "title": job.title,
+        "render": dict(render_kwargs),
+        "optimize": asdict(optimize) if optimize is not None else None,
+    }
+    if job.scale is not None:
+        params["scale"] = asdict(job.scale)
+    return fingerprint(data_digest(job.df), params)
+
+
+def _run_job(job: RenderJob, render_kwargs: Mapping[str, Any], optimize: SvgOptimize | None = None) -> RenderResult:
+    t0 = time.perf_counter()
+    out = Path(job.out_svg)
+    # 一時ファイルに描いて（最適化も済ませて）から置き換える。途中で失敗しても前回の SVG は残る
+    tmp = temp_path(out)
+    try:
+        with span("batch.job", name=job.name, rows=len(job.df)):
+            scale = {"scale": job.scale} if job.scale is not None else {}
+            render_density_svg(job.df, tmp, job.title, **render_kwargs, **scale)
+            report = optimize_svg_file(tmp, optimize) if optimize is not None else None
+            os.replace(tmp, out)
+    except Exception as e:
+        tmp.unlink(missing_ok=True)
+        return RenderResult(job.name, out, False, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+    if report is None:
+        return RenderResult(job.name, out, True, None, time.perf_counter() - t0)
+    return RenderResult(
+        job.name, out, True, None, time.perf_counter() - t0, report.bytes_before, report.bytes_after
+    )
+
+
+def _cancelled(job: RenderJob) -> RenderResult:
+    return RenderResult(job.name, Path(job.out_svg), False, "Cancelled", cancelled=True)
+
+
+def render_batch(
+    jobs: Sequence[RenderJob],
+    *,
+    n_jobs: int | None = None,
+    optimize: SvgOptimize | None = None,
+    on_progress: ProgressCallback | None = None,
+    cancel_event: threading.Event | None = None,
+    manifest: BuildManifest | None = None,
+    **render_kwargs: Any,
+) -> list[RenderResult]:
+    """
+    ジョブをプロセスプールで並列に描画する。
+
+    - 結果は jobs と同じ順序で返す
+    - 1ジョブの失敗は RenderResult.error に記録し、他のジョブは続行する
+    - n_jobs=1 ならプールを作らずこのプロセス内で順に描画する
+    - Kaleido はプロセスごとに1回だけ起動する（ExportSession）
+    - optimize を渡すと各SVGを svg_post.optimize_svg_file で縮め、前後のバイト数を RenderResult に入れる
+    - on_progress(完了数, 全数, 結果) をジョブが1つ終わるたびに（呼び出し元のスレッドで）呼ぶ
+    - cancel_event がセットされたら未着手のジョブを取り消す（実行中のジョブは終わるまで待つ）。
+      取り消したジョブは RenderResult(cancelled=True) になる
+    - manifest を渡すと、指紋（job_fingerprint）が前回と同じで SVG が残っているジョブは描かずに
+      RenderResult(skipped=True) を返し、描いたジョブの指紋を記録して manifest.save() する
+    - 各 SVG は一時ファイルに書いてから置き換える
+    - render_kwargs はそのまま render_density_svg へ渡す
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    if manifest is None:
+        return _render_jobs(jobs, n_jobs, optimize, on_progress, cancel_event, render_kwargs)
+
+    total = len(jobs)
+    with span("batch.fingerprint", jobs=total):
+        fps = [job_fingerprint(j, render_kwargs, optimize) for j in jobs]
+    slots: list[RenderResult | None] = [None] * total
+    for i, (j, fp) in enumerate(zip(jobs, fps)):
+        if manifest.is_fresh(j.out_svg, fp):
+            slots[i] = RenderResult(j.name, Path(j.out_svg), True, skipped=True)
+            if on_progress is not None:
+                on_progress(sum(r is not None for r in slots), total, slots[i])
+    todo = [i for i, r in enumerate(slots) if r is None]
+    n_skipped = total - len(todo)
+
+    def _progress(done: int, _n: int, r: RenderResult) -> None:
+        if on_progress is not None:
+            on_progress(n_skipped + done, total, r)
+
+    rendered = _render_jobs([jobs[i] for i in todo], n_jobs, optimize, _progress, cancel_event, render_kwargs)
+    for i, r in zip(todo, rendered):
+        slots[i] = r
+        if r.ok:
+            manifest.record(r.out_svg, fps[i])
+        elif not r.cancelled:
+            manifest.forget(r.out_svg)
+    manifest.save()
+    return [r for r in slots if r is not None]
+
+
+def _render_jobs(
+    jobs: list[RenderJob],
+    n_jobs: int | None,
+    optimize: SvgOptimize | None,
+    on_progress: ProgressCallback | None,
+    cancel_event: threading.Event | None,
+    render_kwargs: Mapping[str, Any],
+) -> list[RenderResult]:
+    if not jobs:
+        return []
+    total = len(jobs)
+
+    def _is_cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    workers = resolve_jobs(n_jobs, total)
+    if workers == 1:
+        results: list[RenderResult] = []
+        with ExportSession():
+            for j in jobs:
+                r = _cancelled(j) if _is_cancelled() else _run_job(j, render_kwargs, optimize)
+                results.append(r)
+                if on_progress is not None and not r.cancelled:
+                    on_progress(len(results), total, r)
+        return results
+
+    slots: list[RenderResult | None] = [None] * total
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+        futures: dict[Future, int] = {ex.submit(_run_job, j, render_kwargs, optimize): i for i, j in enumerate(jobs)}
+        pending = set(futures)
+        done_count = 0
+        while pending:
+            if _is_cancelled():
+                for f in pending:
+                    f.cancel()  # 未着手のものだけ取り消される
+            done, pending = wait(pending, timeout=_POLL_S, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i = futures[fut]
+                job = jobs[i]
+                if fut.cancelled():
+                    slots[i] = _cancelled(job)
+                    continue
+                try:
+                    slots[i] = fut.result()
+                except Exception as e:
+                    # ワーカー自体の異常終了など（_run_job 内で拾えないもの）
+                    slots[i] = RenderResult(job.name, Path(job.out_svg), False, f"{type(e).__name__}: {e}")
+                done_count += 1
+                if on_progress is not None:
+                    on_progress(done_count, total, slots[i])
+    return [r if r is not None else _cancelled(j) for r, j in zip(slots, jobs)]
@@ -0,0 +1,507 @@
+# src/psychrimetric/cli.py
+"""
+ヘッドレス実行用の CLI（ダイアログなし）
+
+    python -m psychrometric <EPWファイル | ディレクトリ | glob> ... -o OUT [--mode all] [--seasons seasons.json] [-j N]
+
+複数のEPWをプロセスプールで並列に処理し、最後に JSON のサマリーを標準出力へ出す。
+--shared-scale all なら全EPWの密度の最大値を先に求め（1回目のパス）、全チャートを同じ色の範囲で描く。
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Sequence
+
+from . import spans
+from .batch import RenderJob, _init_worker, apply_scales, merge_scales, plan_jobs, render_batch, resolve_jobs, scan_jobs
+from .density import BANDWIDTHS, SharedScale
+from .epw_cache import load_epw_psychro_cached
+from .epw_io import load_epw
+from .gui import GUISelection
+from .manifest import BuildManifest
+from .main import DEFAULT_SEASONS
+from .psychro_frame import (
+    DEFAULT_PRESSURE_BIN_KPA,
+    PRESSURE_MODES,
+    PSYCHRO_METHODS,
+    add_psychro_columns,
+    pressure_displacement,
+)
+from .render import BACKENDS, DENSITY_METHODS, ExportSession
+from .svg_post import SvgOptimize
+from .zone_registry import load_zones_config
+from .zone_stats import standard_periods, write_zone_tables
+
+MODES = ("monthly", "seasonal", "yearly", "all")
+# 色の範囲を揃える単位（none: チャートごと、file: EPW ごとに月別/季節別/年間の組で、all: 全EPWの組で）
+SHARED_SCALES = ("none", "file", "all")
+
+
+def expand_inputs(inputs: Iterable[str | Path]) -> list[Path]:
+    """
+    ファイル / ディレクトリ（直下の *.epw）/ glob パターンを EPW パスの一覧に展開する。
+    重複は除き、見つかった順を保つ。
+    """
+    found: list[Path] = []
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            found.extend(sorted(q for q in p.iterdir() if q.is_file() and q.suffix.lower() == ".epw"))
+        elif p.is_file():
+            found.append(p)
+        else:
+            matches = sorted(glob.glob(str(item), recursive=True))
+            if not matches:
+                raise FileNotFoundError(f"No EPW files match: {item}")
+            found.extend(Path(m) for m in matches if Path(m).is_file())
+
+    seen: set[Path] = set()
+    out: list[Path] = []
+    for p in found:
+        key = p.resolve()
+        if key not in seen:
+            seen.add(key)
+            out.append(p)
+    return out
+
+
+def _selection(
+    epw_path: Path,
+    out_dir: Path,
+    mode: str,
+    seasons_config: Path | None,
+    zones_config: Path | None = None,
+) -> GUISelection:
+    return GUISelection(
+        epw_path=epw_path,
+        out_dir=out_dir,
+        run_monthly=mode in ("monthly", "all"),
+        run_seasonal=mode in ("seasonal", "all"),
+        run_yearly=mode in ("yearly", "all"),
+        seasons_config=seasons_config,
+        zones_config=zones_config,
+    )
+
+
+def _load_jobs(
+    sel: GUISelection,
+    seasons: Mapping[str, Sequence[int]],
+    *,
+    use_cache: bool,
+    psychro: str,
+    pressure_mode: str,
+    pressure_bin_kpa: float,
+) -> tuple[Any, str, list[RenderJob]]:
+    """
+    EPW を読み、空気線図の列を足し、ジョブ一覧を作る（(df, 地点名, ジョブ)）。
+    use_cache=True なら空気線図の列ごとキャッシュから読む（--shared-scale all の2回目のパスは計算し直さない）。
+    """
+    if use_cache:
+        df, meta = load_epw_psychro_cached(
+            sel.epw_path, method=psychro, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa
+        )
+    else:
+        df, meta = load_epw(sel.epw_path)
+        df = add_psychro_columns(df, method=psychro, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa)
+    loc = meta.location or sel.epw_path.stem
+    jobs = plan_jobs(
+        df,
+        loc,
+        sel.out_dir,
+        run_monthly=sel.run_monthly,
+        run_seasonal=sel.run_seasonal,
+        run_yearly=sel.run_yearly,
+        seasons=seasons,
+    )
+    return df, loc, jobs
+
+
+def _scan_kwargs(render_kwargs: Mapping[str, Any]) -> dict[str, Any]:
+    # 1回目のパスのビン分け（密度の求め方）は描画と同じにする
+    kw: dict[str, Any] = {k: int(render_kwargs.get(k, d)) for k, d in (("nbinsx", 40), ("nbinsy", 30), ("ncontours", 10))}
+    kw.update({k: render_kwargs[k] for k in ("density", "bandwidth") if k in render_kwargs})
+    return kw
+
+
+def scan_file(
+    sel: GUISelection,
+    seasons: Mapping[str, Sequence[int]],
+    *,
+    use_cache: bool = True,
+    psychro: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+    **render_kwargs: Any,
+) -> dict[str, SharedScale]:
+    """--shared-scale all の1回目のパス: EPW 1ファイル分の group ごとの共有スケール（batch.scan_jobs()）。"""
+    _, _, jobs = _load_jobs(
+        sel, seasons, use_cache=use_cache, psychro=psychro, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa
+    )
+    return scan_jobs(jobs, **_scan_kwargs(render_kwargs))
+
+
+def process_file(
+    sel: GUISelection,
+    seasons: Mapping[str, Sequence[int]],
+    *,
+    use_cache: bool = True,
+    optimize: SvgOptimize | None = None,
+    psychro: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+    pressure_report: bool = False,
+    incremental: bool = True,
+    shared_scale: str = "none",
+    scales: Mapping[str, SharedScale] | None = None,
+    **render_kwargs: Any,
+) -> dict[str, Any]:
+    """
+    EPW 1ファイル分（読み込み → 列の前計算 → 月別/季節別/年間の描画）を処理し、結果を dict で返す。
+    例外は外に出さず "error" に記録する。
+    pressure_report=True なら中央値の気圧で計算した場合との点のずれ（pressure_displacement()）を "pressure" に入れる。
+    incremental=True なら出力先のマニフェストで指紋が変わっていないチャート・ゾーン表を飛ばす。
+    scales（全EPWで求めた共有スケール）を渡すとそれで描く。無くて shared_scale が "none" 以外なら
+    このファイルのジョブだけで共有スケールを求めてから描く。
+    """
+    t0 = time.perf_counter()
+    summary: dict[str, Any] = {
+        "epw": str(sel.epw_path),
+        "out_dir": str(sel.out_dir),
+        "location": None,
+        "ok": False,
+        "charts": [],
+        "error": None,
+    }
+    try:
+        df, loc, jobs = _load_jobs(
+            sel, seasons, use_cache=use_cache, psychro=psychro, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa
+        )
+        t_load = time.perf_counter()
+        if pressure_report:
+            summary["pressure"] = {k: round(v, 4) for k, v in pressure_displacement(df).items()} | {"mode": pressure_mode}
+
+        summary["location"] = loc
+        Path(sel.out_dir).mkdir(parents=True, exist_ok=True)
+        if scales is None and shared_scale != "none":
+            scales = scan_jobs(jobs, **_scan_kwargs(render_kwargs))
+        if scales is not None:
+            jobs = apply_scales(jobs, scales)
+            summary["scales"] = _scales_summary(scales)
+        # 並列化はファイル単位で行うので、ファイル内のチャートは順に描く
+        manifest = BuildManifest.load(sel.out_dir) if incremental else None
+        results = render_batch(jobs, n_jobs=1, optimize=optimize, manifest=manifest, **render_kwargs)
+
+        if sel.zones_config:
+            periods = standard_periods(
+                seasons, monthly=sel.run_monthly, seasonal=sel.run_seasonal, yearly=sel.run_yearly
+            )
+            out_csv, out_json = Path(sel.out_dir) / f"{loc}_zones.csv", Path(sel.out_dir) / f"{loc}_zones.json"
+            written = write_zone_tables(
+                df, load_zones_config(sel.zones_config), periods, [out_csv, out_json], manifest=manifest
+            )
+            summary["zones_csv"], summary["zones_json"] = str(out_csv), str(out_json)
+            if not written:
+                summary["zones_skipped"] = True
+    except Exception as e:
+        summary["error"] = f"{type(e).__name__}: {e}"
+        summary["elapsed_s"] = round(time.perf_counter() - t0, 3)
+        return summary
+
+    summary["charts"] = [
+        {"name": r.name, "out_svg": str(r.out_svg), "ok": r.ok, "error": r.error, "elapsed_s": round(r.elapsed_s, 3)}
+        | ({"bytes_before": r.bytes_before, "bytes_after": r.bytes_after} if r.bytes_before is not None else {})
+        | ({"skipped": True} if r.skipped else {})
+        for r in results
+    ]
+    summary["charts_skipped"] = sum(1 for r in results if r.skipped)
+    summary["ok"] = all(r.ok for r in results)
+    summary["load_s"] = round(t_load - t0, 3)
+    summary["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return summary
+
+
+def _scales_summary(scales: Mapping[str, SharedScale]) -> dict[str, float]:
+    return {group: round(s.zmax, 6) for group, s in scales.items()}
+
+
+def _scan_all(
+    sels: Sequence[GUISelection],
+    seasons: Mapping[str, Sequence[int]],
+    workers: int,
+    **kwargs: Any,
+) -> dict[str, SharedScale]:
+    """
+    --shared-scale all の1回目のパス。ファイルごとの共有スケールを届いた順に畳み込む
+    （保持するのは group ごとの最大値だけなので、EPW が何百あってもメモリは増えない）。
+    読めないファイルは飛ばす（エラーは2回目のパスの process_file が記録する）。
+    """
+    scales: dict[str, SharedScale] = {}
+    with spans.span("cli.scan", files=len(sels)):
+        if workers == 1:
+            for s in sels:
+                try:
+                    scales = merge_scales(scales, scan_file(s, seasons, **kwargs))
+                except Exception:
+                    continue
+            return scales
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(scan_file, s, seasons, **kwargs) for s in sels]
+            for fut in as_completed(futures):
+                try:
+                    scales = merge_scales(scales, fut.result())
+                except Exception:
+                    continue
+    return scales
+
+
+def run(
+    epw_paths: Sequence[Path],
+    out_dir: str | Path,
+    *,
+    mode: str = "all",
+    seasons_config: str | Path | None = None,
+    zones_config: str | Path | None = None,
+    n_jobs: int | None = None,
+    use_cache: bool = True,
+    optimize: SvgOptimize | None = None,
+    psychro: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+    pressure_report: bool = False,
+    incremental: bool = True,
+    shared_scale: str = "none",
+    **render_kwargs: Any,
+) -> dict[str, Any]:
+    """
+    複数の EPW をファイル単位のプロセスプールで処理し、サマリー dict を返す。
+
+    - 出力先: EPW が1つなら out_dir 直下、複数なら out_dir/<EPWのファイル名>/
+    - zones_config を渡すとゾーン×期間の滞在時間表（<地点>_zones.csv / .json）もSVGと同じ場所に書く
+    - n_jobs: ワーカー数（batch.resolve_jobs と同じ解釈。1 ならプールを作らない）
+    - psychro: en / hr の計算方法（psychro_frame.PSYCHRO_METHODS）
+    - pressure_mode / pressure_bin_kpa: en / hr に使う気圧（psychro_frame.PRESSURE_MODES）
+    - incremental: 出力先ごとのマニフェスト（manifest.BuildManifest）で、入力が変わっていないチャート・ゾーン表を飛ばす
+    - shared_scale: 色の範囲（等値線レベル）を揃える単位（SHARED_SCALES）。揃えるときは度数ではなく密度で塗る。
+      "all" は全EPWを先に1回なめて（scan_file）月別・季節別・年間ごとの最大値を求め、2回目のパスで描く。
+      1回目に計算した空気線図の列はキャッシュ（epw_cache.load_epw_psychro_cached）に残るので、2回目は計算し直さない
+      （use_cache=False のときだけ2回計算する）
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}: {mode!r}")
+    if psychro not in PSYCHRO_METHODS:
+        raise ValueError(f"psychro must be one of {PSYCHRO_METHODS}: {psychro!r}")
+    if pressure_mode not in PRESSURE_MODES:
+        raise ValueError(f"pressure_mode must be one of {PRESSURE_MODES}: {pressure_mode!r}")
+    if shared_scale not in SHARED_SCALES:
+        raise ValueError(f"shared_scale must be one of {SHARED_SCALES}: {shared_scale!r}")
+    file_kwargs = dict(
+        use_cache=use_cache,
+        optimize=optimize,
+        psychro=psychro,
+        pressure_mode=pressure_mode,
+        pressure_bin_kpa=pressure_bin_kpa,
+        pressure_report=pressure_report,
+        incremental=incremental,
+        shared_scale=shared_scale,
+    )
+    out_dir = Path(out_dir)
+    seasons = DEFAULT_SEASONS
+    if seasons_config:
+        seasons = json.loads(Path(seasons_config).read_text(encoding="utf-8"))
+    cfg = Path(seasons_config) if seasons_config else None
+    zcfg = Path(zones_config) if zones_config else None
+    if zcfg is not None:
+        load_zones_config(zcfg)  # 形式エラーは処理を始める前に出す
+
+    sels = [
+        _selection(p, out_dir if len(epw_paths) == 1 else out_dir / p.stem, mode, cfg, zcfg)
+        for p in epw_paths
+    ]
+
+    t0 = time.perf_counter()
+    workers = resolve_jobs(n_jobs, len(sels)) if sels else 1
+    scales = None
+    if shared_scale == "all" and len(sels) > 1:
+        scales = _scan_all(
+            sels, seasons, workers,
+            use_cache=use_cache, psychro=psychro, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa,
+            **render_kwargs,
+        )
+        file_kwargs["scales"] = scales
+    if workers == 1:
+        with ExportSession():
+            files = [process_file(s, seasons, **file_kwargs, **render_kwargs) for s in sels]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+            futures = [
+                ex.submit(process_file, s, seasons, **file_kwargs, **render_kwargs)
+                for s in sels
+            ]
+            files = []
+            for sel, fut in zip(sels, futures):
+                try:
+                    files.append(fut.result())
+                except Exception as e:
+                    # ワーカーの異常終了など
+                    files.append({
+                        "epw": str(sel.epw_path), "out_dir": str(sel.out_dir), "location": None,
+                        "ok": False, "charts": [], "error": f"{type(e).__name__}: {e}",
+                    })
+
+    charts = [c for f in files for c in f["charts"]]
+    return {
+        "files": len(files),
+        "files_failed": sum(1 for f in files if not f["ok"]),
+        "charts": len(charts),
+        "charts_failed": sum(1 for c in charts if not c["ok"]),
+        "charts_skipped": sum(1 for c in charts if c.get("skipped")),
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+        "results": files,
+    } | ({"scales": _scales_summary(scales)} if scales is not None else {})
+
+
+def _bandwidth(text: str) -> str | float:
+    """--bandwidth: "scott" / "silverman" か、σ に掛ける係数。"""
+    if text in BANDWIDTHS:
+        return text
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"choose from {BANDWIDTHS} or a positive number: {text!r}") from None
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"bandwidth must be positive: {text!r}")
+    return value
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(
+        prog="psychrometric",
+        description="EPW -> 空気線図（密度）SVG をダイアログなしで一括生成する",
+    )
+    ap.add_argument("inputs", nargs="+", help="EPWファイル / ディレクトリ / globパターン（複数可）")
+    ap.add_argument("-o", "--out-dir", required=True, help="出力ディレクトリ")
+    ap.add_argument("--mode", choices=MODES, default="all", help="実行モード（既定: all）")
+    ap.add_argument("--seasons", default=None, help="季節の区切りJSON（省略時: 北半球の四季）")
+    ap.add_argument("--zones", default=None, help="ゾーン定義JSON（zones.json 形式）。指定時は滞在時間表も出力")
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="並列に処理するファイル数（省略時: CPU数, 1: 並列化しない）",
+    )
+    ap.add_argument("--backend", choices=BACKENDS, default="plotly", help="描画バックエンド（既定: plotly）")
+    ap.add_argument(
+        "--density", choices=DENSITY_METHODS, default="hist",
+        help="密度の求め方（hist: ビンの度数、kde: ガウスカーネル密度推定で滑らかに。既定: hist）",
+    )
+    ap.add_argument(
+        "--bandwidth", type=_bandwidth, default="scott",
+        help="--density kde のバンド幅（scott / silverman / 標準偏差に掛ける係数。既定: scott）",
+    )
+    ap.add_argument("--no-cache", action="store_true", help="EPWのバイナリキャッシュを使わない")
+    ap.add_argument("--optimize", action="store_true", help="SVGを縮める（座標の丸め・折れ線の間引き・style の共通化）")
+    ap.add_argument("--precision", type=int, default=SvgOptimize.precision, help="--optimize の座標の小数桁数")
+    ap.add_argument(
+        "--simplify-tol", type=float, default=SvgOptimize.tolerance,
+        help="--optimize の折れ線間引きの許容誤差 [px]（0: 間引かない）",
+    )
+    ap.add_argument(
+        "--psychro", choices=PSYCHRO_METHODS, default="shimeri",
+        help="en / hr の計算（shimeri: CoolProp、lut: 飽和表の補間で高速。差は hr 0.007 g/kg・en 0.04 kJ/kg 以内）",
+    )
+    ap.add_argument(
+        "--pressure", choices=PRESSURE_MODES, default="median",
+        help="en / hr に使う気圧（median: 中央値1つ、row: 行ごと、binned: --pressure-bin 刻みにまとめる）",
+    )
+    ap.add_argument(
+        "--pressure-bin", type=float, default=DEFAULT_PRESSURE_BIN_KPA, help="--pressure binned の刻み [kPa]"
+    )
+    ap.add_argument(
+        "--pressure-report", action="store_true",
+        help="中央値の気圧で計算した場合との点のずれの最大値をサマリーに出す",
+    )
+    ap.add_argument(
+        "--force", action="store_true",
+        help="入力が変わっていないチャートも描き直す（既定では出力先のマニフェストで指紋が同じものを飛ばす）",
+    )
+    ap.add_argument(
+        "--shared-scale", choices=SHARED_SCALES, default="none",
+        help="色の範囲を揃える単位（none: チャートごと、file: EPWごとに月別/季節別/年間の組で、all: 全EPWで）。"
+        "揃えるときは密度（点数 / ビン面積）で塗る",
+    )
+    ap.add_argument("--summary", default=None, help="サマリーJSONの書き出し先（省略時: 標準出力のみ）")
+    ap.add_argument(
+        "--trace", default=None,
+        help="段階ごとの計時をこのディレクトリへ記録し、Chrome trace（trace.json）にまとめる（環境変数 PSYCHRO_TRACE と同じ）",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    try:
+        epw_paths = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    if not epw_paths:
+        print("[ERROR] No EPW files found.", file=sys.stderr)
+        return 2
+
+    if args.trace:
+        spans.enable(args.trace, fresh=True)
+    try:
+        summary = run(
+            epw_paths,
+            args.out_dir,
+            mode=args.mode,
+            seasons_config=args.seasons,
+            zones_config=args.zones,
+            n_jobs=args.jobs,
+            use_cache=not args.no_cache,
+            optimize=SvgOptimize(precision=args.precision, tolerance=args.simplify_tol) if args.optimize else None,
+            backend=args.backend,
+            density=args.density,
+            bandwidth=args.bandwidth,
+            psychro=args.psychro,
+            pressure_mode=args.pressure,
+            pressure_bin_kpa=args.pressure_bin,
+            pressure_report=args.pressure_report,
+            incremental=not args.force,
+            shared_scale=args.shared_scale,
+        )
+    except (OSError, ValueError) as e:
+        # seasons / zones の設定ファイルが読めない・形式が違う
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+    if spans.enabled():
+        trace_dir = args.trace or os.environ[spans.ENV_VAR]
+        summary["trace"] = str(spans.merge_trace(trace_dir))
+        summary["trace_summary"] = {
+            k: {"count": v["count"], "total_s": round(v["total_s"], 4), "max_s": round(v["max_s"], 4)}
+            for k, v in spans.summarize(spans.read_events(trace_dir)).items()
+        }
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        Path(args.summary).write_text(text, encoding="utf-8")
+    print(text)
+
+    for f in summary["results"]:
+        if f["error"]:
+            print(f"[ERROR] {f['epw']}: {f['error']}", file=sys.stderr)
+        for c in f["charts"]:
+            if not c["ok"]:
+                print(f"[ERROR] {f['epw']} {c['name']}: {c['error']}", file=sys.stderr)
+    return 1 if summary["files_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
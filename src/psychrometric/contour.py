@@ -0,0 +1,173 @@
+# src/psychrimetric/contour.py
+from __future__ import annotations
+
+import numpy as np
+
+# marching squares のセル辺
+_B, _R, _T, _L = 0, 1, 2, 3  # bottom, right, top, left
+
+# case（bl=1, br=2, tr=4, tl=8）→ 線分（辺のペア）。5 / 10 は鞍点で中心値により分岐
+_SEGMENTS: dict[int, tuple[tuple[int, int], ...]] = {
+    1: ((_L, _B),),
+    2: ((_B, _R),),
+    3: ((_L, _R),),
+    4: ((_R, _T),),
+    6: ((_B, _T),),
+    7: ((_L, _T),),
+    8: ((_L, _T),),
+    9: ((_B, _T),),
+    11: ((_R, _T),),
+    12: ((_L, _R),),
+    13: ((_B, _R),),
+    14: ((_L, _B),),
+}
+# 鞍点: (中心が内側のとき, 中心が外側のとき)
+_SADDLES: dict[int, tuple[tuple[tuple[int, int], ...], tuple[tuple[int, int], ...]]] = {
+    5: (((_B, _R), (_L, _T)), ((_L, _B), (_R, _T))),
+    10: (((_L, _B), (_R, _T)), ((_B, _R), (_L, _T))),
+}
+
+
+def _edge_ids(ii: np.ndarray, jj: np.ndarray, side: int, nx: int, n_h: int) -> np.ndarray:
+    """
+    セル (ii, jj) の辺 side のグローバルID。
+    横辺: 格子点 (i, j)-(i, j+1) → i*(nx-1)+j
+    縦辺: 格子点 (i, j)-(i+1, j) → n_h + i*nx+j
+    """
+    if side == _B:
+        return ii * (nx - 1) + jj
+    if side == _T:
+        return (ii + 1) * (nx - 1) + jj
+    if side == _L:
+        return n_h + ii * nx + jj
+    return n_h + ii * nx + (jj + 1)
+
+
+def isoline_loops(
+    z: np.ndarray,
+    level: float,
+    x: np.ndarray,
+    y: np.ndarray,
+) -> list[np.ndarray]:
+    """
+    z（shape (ny, nx)、格子点 x[j], y[i] 上の値）の level 等値線を閉ループで返す。
+
+    - グリッド外周を level 未満の値で拡張してから解くので、必ず閉じる
+      （z >= level の領域をループで囲んだ形。塗りは evenodd で穴も表現できる）
+    - セル判定・交点計算は numpy でまとめて行い、Python のループは線分の連結だけ
+    """
+    z = np.asarray(z, dtype=float)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if z.ndim != 2 or z.shape != (y.size, x.size):
+        raise ValueError("z must have shape (len(y), len(x)).")
+
+    # 外周を1マス拡張：座標は格子間隔の半分外（ビン端）、値は level 直下にして
+    # 外周に接する領域の輪郭がちょうどビン端を通るようにする
+    dx0 = x[1] - x[0] if x.size > 1 else 1.0
+    dx1 = x[-1] - x[-2] if x.size > 1 else 1.0
+    dy0 = y[1] - y[0] if y.size > 1 else 1.0
+    dy1 = y[-1] - y[-2] if y.size > 1 else 1.0
+    xp = np.r_[x[0] - 0.5 * dx0, x, x[-1] + 0.5 * dx1]
+    yp = np.r_[y[0] - 0.5 * dy0, y, y[-1] + 0.5 * dy1]
+
+    low = float(level) - 1e-9 * max(1.0, abs(float(level)))
+    zp = np.full((y.size + 2, x.size + 2), low)
+    zp[1:-1, 1:-1] = np.where(np.isfinite(z), z, low)
+
+    ny, nx = zp.shape
+    n_h = ny * (nx - 1)
+
+    inside = zp >= level
+    bl = inside[:-1, :-1]
+    br = inside[:-1, 1:]
+    tr = inside[1:, 1:]
+    tl = inside[1:, :-1]
+    case = bl * 1 + br * 2 + tr * 4 + tl * 8
+
+    seg_a: list[np.ndarray] = []
+    seg_b: list[np.ndarray] = []
+
+    def _add(ii: np.ndarray, jj: np.ndarray, pairs: tuple[tuple[int, int], ...]) -> None:
+        for s0, s1 in pairs:
+            seg_a.append(_edge_ids(ii, jj, s0, nx, n_h))
+            seg_b.append(_edge_ids(ii, jj, s1, nx, n_h))
+
+    for c, pairs in _SEGMENTS.items():
+        ii, jj = np.nonzero(case == c)
+        if ii.size:
+            _add(ii, jj, pairs)
+
+    center = 0.25 * (zp[:-1, :-1] + zp[:-1, 1:] + zp[1:, 1:] + zp[1:, :-1])
+    for c, (pairs_in, pairs_out) in _SADDLES.items():
+        mask = case == c
+        ii, jj = np.nonzero(mask & (center >= level))
+        if ii.size:
+            _add(ii, jj, pairs_in)
+        ii, jj = np.nonzero(mask & (center < level))
+        if ii.size:
+            _add(ii, jj, pairs_out)
+
+    if not seg_a:
+        return []
+
+    a = np.concatenate(seg_a)
+    b = np.concatenate(seg_b)
+    nseg = a.size
+
+    # 交点座標（交差した辺だけ、線形補間）
+    edges = np.unique(np.r_[a, b])
+    is_h = edges < n_h
+    e_h = edges[is_h]
+    e_v = edges[~is_h] - n_h
+
+    px = np.empty(edges.size)
+    py = np.empty(edges.size)
+
+    hi, hj = np.divmod(e_h, nx - 1)
+    z0, z1 = zp[hi, hj], zp[hi, hj + 1]
+    t = (level - z0) / (z1 - z0)
+    px[is_h] = xp[hj] + t * (xp[hj + 1] - xp[hj])
+    py[is_h] = yp[hi]
+
+    vi, vj = np.divmod(e_v, nx)
+    z0, z1 = zp[vi, vj], zp[vi + 1, vj]
+    t = (level - z0) / (z1 - z0)
+    px[~is_h] = xp[vj]
+    py[~is_h] = yp[vi] + t * (yp[vi + 1] - yp[vi])
+
+    # 連結: 各辺はちょうど2本の線分に共有される
+    ends = np.r_[a, b]
+    segs = np.r_[np.arange(nseg), np.arange(nseg)]
+    order = np.argsort(ends, kind="stable")
+    ends_sorted = ends[order]
+    segs_sorted = segs[order]
+    first_of = dict(zip(ends_sorted[0::2].tolist(), segs_sorted[0::2].tolist()))
+    second_of = dict(zip(ends_sorted[1::2].tolist(), segs_sorted[1::2].tolist()))
+    edge_pos = dict(zip(edges.tolist(), range(edges.size)))
+
+    a_l = a.tolist()
+    b_l = b.tolist()
+    used = bytearray(nseg)
+    loops: list[np.ndarray] = []
+
+    for s0 in range(nseg):
+        if used[s0]:
+            continue
+        start_edge = a_l[s0]
+        idx = [edge_pos[start_edge]]
+        s = s0
+        e = start_edge
+        while True:
+            used[s] = 1
+            e = b_l[s] if a_l[s] == e else a_l[s]
+            if e == start_edge:
+                break
+            idx.append(edge_pos[e])
+            s1 = first_of[e]
+            s = second_of[e] if s1 == s else s1
+            if used[s]:
+                break
+        loops.append(np.column_stack([px[idx], py[idx]]))
+
+    return loops
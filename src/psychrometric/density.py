@@ -0,0 +1,300 @@
+# src/psychrimetric/density.py
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+
+@dataclass(frozen=True, eq=False)
+class DensityGrid:
+    """
+    チャート座標（x_skew, y=hr）上の2次元密度グリッド。
+
+    z: shape (ny, nx)。z[j, i] は y_edges[j]..y_edges[j+1], x_edges[i]..x_edges[i+1] のビン
+    x_edges: shape (nx+1,)
+    y_edges: shape (ny+1,)
+    """
+    z: np.ndarray
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+
+    @property
+    def x_centers(self) -> np.ndarray:
+        return 0.5 * (self.x_edges[:-1] + self.x_edges[1:])
+
+    @property
+    def y_centers(self) -> np.ndarray:
+        return 0.5 * (self.y_edges[:-1] + self.y_edges[1:])
+
+    @property
+    def total(self) -> float:
+        return float(self.z.sum())
+
+    @property
+    def bin_area(self) -> np.ndarray:
+        """各ビンの面積（x 幅 × y 幅）。shape (ny, nx)。"""
+        return np.outer(np.diff(self.y_edges), np.diff(self.x_edges))
+
+    def density(self) -> "DensityGrid":
+        """
+        度数をビン面積で割ったグリッド（plotly の histnorm="density" と同じ）。
+        ビンの切り方が違うチャート同士でも値を比べられる。
+        """
+        return DensityGrid(z=self.z / self.bin_area, x_edges=self.x_edges, y_edges=self.y_edges)
+
+
+@dataclass(frozen=True)
+class SharedScale:
+    """
+    複数のチャートで共有する色の範囲と等値線レベル（密度 = 度数 / ビン面積 の単位）。
+
+    zmax は対象チャートの密度の最大値。levels は nice_levels(zmin, zmax, ncontours) で、
+    同じ SharedScale で描いたチャートは同じ色が同じ密度を表す。
+    merge() は結合的なので、チャートごと・地点ごとの値を届いた順に畳み込める。
+    """
+    zmax: float
+    ncontours: int = 10
+    zmin: float = 0.0
+
+    @property
+    def levels(self) -> np.ndarray:
+        return nice_levels(self.zmin, self.zmax, self.ncontours)
+
+    def merge(self, other: "SharedScale") -> "SharedScale":
+        if other.ncontours != self.ncontours or other.zmin != self.zmin:
+            raise ValueError(f"Cannot merge scales with different ncontours/zmin: {self} vs {other}")
+        return SharedScale(zmax=max(self.zmax, other.zmax), ncontours=self.ncontours, zmin=self.zmin)
+
+    @classmethod
+    def from_grid(cls, grid: DensityGrid, *, ncontours: int = 10) -> "SharedScale":
+        """度数のグリッド1枚分（密度に直した最大値）。"""
+        z = grid.density().z
+        return cls(zmax=float(np.nanmax(z)) if z.size else 0.0, ncontours=int(ncontours))
+
+
+def shared_scale(grids: Iterable[DensityGrid], *, ncontours: int = 10) -> SharedScale:
+    """度数のグリッドを順に畳み込んで共有スケールを作る（グリッドは保持しない）。"""
+    scale = SharedScale(zmax=0.0, ncontours=int(ncontours))
+    for g in grids:
+        scale = scale.merge(SharedScale.from_grid(g, ncontours=ncontours))
+    if not scale.zmax > 0:
+        raise ValueError("grids are empty (no data to scale).")
+    return scale
+
+
+def _edges(v: np.ndarray, nbins: int, vrange: tuple[float, float] | None) -> np.ndarray:
+    if vrange is None:
+        lo = float(np.min(v)) if v.size else 0.0
+        hi = float(np.max(v)) if v.size else 1.0
+    else:
+        lo, hi = float(vrange[0]), float(vrange[1])
+    if not hi > lo:
+        # 全点が同じ値 → 幅1のビンにする
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, int(nbins) + 1)
+
+
+def histogram_edges(
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+) -> tuple[np.ndarray, np.ndarray]:
+    """histogram_grid が範囲指定なしで使うビン境界（有限値の最小〜最大を nbins 等分）。"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    return _edges(x[ok], nbinsx, None), _edges(y[ok], nbinsy, None)
+
+
+def histogram_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    x_range: tuple[float, float] | None = None,
+    y_range: tuple[float, float] | None = None,
+    x_edges: np.ndarray | None = None,
+    y_edges: np.ndarray | None = None,
+) -> DensityGrid:
+    """
+    点群 (x, y) を np.histogram2d でビン分けする。
+    範囲を指定しなければデータの最小〜最大を nbins 等分する。
+    x_edges / y_edges を渡した場合はそれをそのまま使う（グリッドを揃えたいとき）。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    x, y = x[ok], y[ok]
+
+    xe = np.asarray(x_edges, dtype=float) if x_edges is not None else _edges(x, nbinsx, x_range)
+    ye = np.asarray(y_edges, dtype=float) if y_edges is not None else _edges(y, nbinsy, y_range)
+
+    # histogram2d は (x, y) の順で (nx, ny) を返す → 転置して (ny, nx)
+    h, _, _ = np.histogram2d(x, y, bins=(xe, ye))
+    return DensityGrid(z=h.T, x_edges=xe, y_edges=ye)
+
+
+# KDE のバンド幅の決め方（数値 / (x, y) の組も可）
+BANDWIDTHS = ("scott", "silverman")
+# カーネルを打ち切る距離（バンド幅の倍数）と、グリッドをデータ範囲の外へ広げる幅
+_KDE_TRUNCATE = 4.0
+_KDE_CUT = 3.0
+# KDE の格子点数 (nx, ny)。等値線の抽出・SVG の大きさが histogram（40 × 30）の描画を超えない程度
+KDE_GRIDSIZE = (64, 48)
+
+
+def kde_bandwidth(
+    x: np.ndarray,
+    y: np.ndarray,
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> tuple[float, float]:
+    """
+    ガウスカーネルの軸ごとのバンド幅 (bx, by)（x, y と同じ単位）。
+
+    - "scott": σ · n^(-1/6)（2次元の Scott 則）
+    - "silverman": min(σ, IQR/1.349) · n^(-1/6)（2次元では係数が1になるので、外れ値に強い σ を使う版）
+    - 数値: σ に掛ける係数（scipy.stats.gaussian_kde の bw_method と同じ解釈）
+    - (bx, by): そのまま使う
+    """
+    if isinstance(bandwidth, tuple):
+        bx, by = (float(b) for b in bandwidth)
+        if not (bx > 0 and by > 0):
+            raise ValueError(f"bandwidth must be positive: {bandwidth}")
+        return bx, by
+
+    n = x.size
+    if isinstance(bandwidth, str):
+        if bandwidth not in BANDWIDTHS:
+            raise ValueError(f"Unknown bandwidth: {bandwidth!r} (choose from {BANDWIDTHS} or a number)")
+        factor = float(n) ** (-1.0 / 6.0) if n else 1.0
+    else:
+        factor = float(bandwidth)
+        if not factor > 0:
+            raise ValueError(f"bandwidth must be positive: {bandwidth}")
+
+    def _sigma(v: np.ndarray) -> float:
+        if v.size < 2:
+            return 0.0
+        sd = float(np.std(v, ddof=1))
+        if bandwidth == "silverman":
+            q75, q25 = np.percentile(v, [75, 25])
+            iqr = float(q75 - q25) / 1.349
+            sd = min(sd, iqr) if iqr > 0 else sd
+        return sd
+
+    return _sigma(x) * factor, _sigma(y) * factor
+
+
+def kde_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    gridsize: tuple[int, int] = KDE_GRIDSIZE,
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> DensityGrid:
+    """
+    点群 (x, y) のガウスカーネル密度推定を gridsize=(nx, ny) の格子で返す（binned KDE）。
+
+    1. 各点を周囲4格子点へ線形に振り分ける（np.bincount、O(点数)）
+    2. 打ち切ったガウスカーネルとの畳み込みを FFT で行う（O(格子 log 格子)、点数によらない）
+
+    - 格子はデータ範囲をバンド幅の _KDE_CUT 倍だけ広げた範囲（裾が切れない）
+    - バンド幅は kde_bandwidth()。格子1つ分より狭いと histogram と変わらないので格子間隔を下限にする
+    - z は各セルの点数の期待値（合計 ≒ 点数）。histogram_grid() の度数と同じ単位なので、
+      等値線・DensityGrid.density()・SharedScale はそのまま使える
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    if not ok.all():
+        x, y = x[ok], y[ok]
+    nx, ny = (int(g) for g in gridsize)
+    if nx < 2 or ny < 2:
+        raise ValueError(f"gridsize must be at least (2, 2): {gridsize}")
+
+    bx, by = kde_bandwidth(x, y, bandwidth)
+    xc = _kde_axis(x, bx, nx)
+    yc = _kde_axis(y, by, ny)
+    dx, dy = xc[1] - xc[0], yc[1] - yc[0]
+    bx, by = max(bx, dx), max(by, dy)
+
+    # 1. 線形ビニング。点ごとには左下の格子点と (ax, ay) の和だけを数え、4隅への振り分けは格子上で行う
+    #    （(1-ax)(1-ay) = 1 - ax - ay + ax·ay なので、4隅の重みは n, Σax, Σay, Σax·ay から決まる）
+    counts = np.zeros((ny, nx))
+    if x.size:
+        fx = (x - xc[0]) / dx
+        fy = (y - yc[0]) / dy
+        ix = np.clip(fx.astype(np.int64), 0, nx - 2)
+        iy = np.clip(fy.astype(np.int64), 0, ny - 2)
+        fx -= ix
+        fy -= iy
+        base = iy * nx + ix
+        size = nx * ny
+        s0 = np.bincount(base, minlength=size).astype(float).reshape(ny, nx)
+        sx = np.bincount(base, weights=fx, minlength=size).reshape(ny, nx)
+        sy = np.bincount(base, weights=fy, minlength=size).reshape(ny, nx)
+        sxy = np.bincount(base, weights=fx * fy, minlength=size).reshape(ny, nx)
+        counts += s0 - sx - sy + sxy
+        counts[:, 1:] += (sx - sxy)[:, :-1]
+        counts[1:, :] += (sy - sxy)[:-1, :]
+        counts[1:, 1:] += sxy[:-1, :-1]
+
+    # 2. カーネル（和が1。点数を保つ）との畳み込み。巡回しないよう零詰めしてから FFT
+    lx = min(nx - 1, int(np.ceil(_KDE_TRUNCATE * bx / dx)))
+    ly = min(ny - 1, int(np.ceil(_KDE_TRUNCATE * by / dy)))
+    kx = np.exp(-0.5 * (np.arange(-lx, lx + 1) * dx / bx) ** 2)
+    ky = np.exp(-0.5 * (np.arange(-ly, ly + 1) * dy / by) ** 2)
+    kernel = np.outer(ky / ky.sum(), kx / kx.sum())
+    shape = (ny + 2 * ly, nx + 2 * lx)
+    z = np.fft.irfft2(np.fft.rfft2(counts, shape) * np.fft.rfft2(kernel, shape), shape)
+    z = np.clip(z[ly:ly + ny, lx:lx + nx], 0.0, None)
+
+    return DensityGrid(z=z, x_edges=_centers_to_edges(xc), y_edges=_centers_to_edges(yc))
+
+
+def _kde_axis(v: np.ndarray, bw: float, n: int) -> np.ndarray:
+    """
+    KDE の格子点（データ範囲 ± _KDE_CUT · bw を n 点で等分）。
+    bw が格子間隔より狭いと kde_grid で格子間隔まで広げるので、広げたあとの幅で裾を取る
+    （bw = 格子間隔 = 範囲 / (n - 1 - 2·_KDE_CUT)。そうしないと端の点の重みが格子の外へ落ちる）。
+    """
+    lo = float(np.min(v)) if v.size else 0.0
+    hi = float(np.max(v)) if v.size else 1.0
+    if n - 1 > 2 * _KDE_CUT and bw * (n - 1) < (hi - lo) + 2 * _KDE_CUT * bw:
+        bw = (hi - lo) / (n - 1 - 2 * _KDE_CUT)
+    pad = _KDE_CUT * bw
+    lo, hi = lo - pad, hi + pad
+    if not hi > lo:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, n)
+
+
+def _centers_to_edges(c: np.ndarray) -> np.ndarray:
+    half = 0.5 * (c[1] - c[0])
+    return np.concatenate([c - half, c[-1:] + half])
+
+
+def nice_levels(zmin: float, zmax: float, ncontours: int) -> np.ndarray:
+    """
+    plotly の autocontour と同様に、1/2/5×10^k の刻みで ncontours 本以下の等値線レベルを返す。
+    （zmin ちょうどは含めない）
+    """
+    span = float(zmax) - float(zmin)
+    if not np.isfinite(span) or span <= 0 or ncontours < 1:
+        return np.array([], dtype=float)
+
+    raw = span / ncontours
+    mag = 10.0 ** np.floor(np.log10(raw))
+    for m in (1.0, 2.0, 2.5, 5.0, 10.0):
+        step = m * mag
+        if step >= raw:
+            break
+
+    start = np.floor(zmin / step) * step + step
+    levels = np.arange(start, zmax, step)
+    return levels[levels > zmin]
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Literal, Sequence
 
 import numpy as np
 import plotly.graph_objects as go
 
+from shimeri import PsychrometricCalculator
+
+from .psychro_frame import skew_transform
+from .spans import span
+
 CoordType = Literal["db_rh", "db_hr"]
 
 
@@ -23,6 +29,106 @@ class ZoneSpec:
     name: str = "zone"
 
 
+# ゾーン形状キャッシュ: 同じゾーン定義・同じ気圧（ZONE_PRESSURE_TOL_KPA 単位に丸め）なら再計算しない
+ZONE_CACHE_SIZE = 512
+ZONE_PRESSURE_TOL_KPA = 0.01
+
+
+@dataclass(frozen=True, eq=False)
+class ZoneGeometry:
+    """
+    変換済みのゾーン頂点（閉じた多角形。先頭と末尾は同じ点）。
+    en/hr: (比エンタルピー[kJ/kg], 絶対湿度[g/kg])、x/y: チャート座標（skew 変換後）。
+    配列は読み取り専用（キャッシュで共有するため）。
+    """
+    en: np.ndarray
+    hr: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    p_kpa: float
+
+
+def _pressure_key(p_kpa: float) -> float:
+    return round(round(float(p_kpa) / ZONE_PRESSURE_TOL_KPA) * ZONE_PRESSURE_TOL_KPA, 6)
+
+
+def _densify(xs: np.ndarray, ys: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """閉じた多角形の各辺を（元の座標系で）n 分割する。"""
+    t = np.arange(n) / n
+    x0, y0 = xs[:-1, None], ys[:-1, None]
+    dx, dy = (xs[1:] - xs[:-1])[:, None], (ys[1:] - ys[:-1])[:, None]
+    return np.r_[(x0 + dx * t).ravel(), xs[-1]], np.r_[(y0 + dy * t).ravel(), ys[-1]]
+
+
+@lru_cache(maxsize=ZONE_CACHE_SIZE)
+def _zone_geometry_cached(
+    coord_type: str,
+    xs_t: tuple[float, ...],
+    ys_t: tuple[float, ...],
+    p_kpa: float,
+    densify: int,
+) -> ZoneGeometry:
+    xs = np.asarray(xs_t, dtype=float)
+    ys = np.asarray(ys_t, dtype=float)
+
+    # close polygon if needed
+    if xs[0] != xs[-1] or ys[0] != ys[-1]:
+        xs = np.r_[xs, xs[0]]
+        ys = np.r_[ys, ys[0]]
+    if densify > 1:
+        # 定RH辺などを元の座標系で分割してから変換する（チャート上で曲がる境界を正しく描く）
+        xs, ys = _densify(xs, ys, densify)
+
+    # db/rh or db/hr -> en/hr
+    pc = PsychrometricCalculator(pressure=p_kpa)
+    # キャッシュミスのときだけ記録される
+    with span("enhance_chart.zone_geometry", coord_type=coord_type, vertices=int(xs.size), p_kpa=p_kpa):
+        if coord_type == "db_rh":
+            _, _, _, hr_gkg, en_kjkg = pc.get_all(db=xs, rh=ys)
+        elif coord_type == "db_hr":
+            _, _, _, hr_gkg, en_kjkg = pc.get_all(db=xs, hr=ys)
+        else:
+            raise ValueError(f"Unknown coord_type: {coord_type}")
+
+    en = np.atleast_1d(np.asarray(en_kjkg, dtype=float))
+    hr = np.atleast_1d(np.asarray(hr_gkg, dtype=float))
+    # transform to plot coords
+    x_plot, y_plot = skew_transform(en, hr, p_kpa)
+    x_plot = np.array(x_plot, dtype=float)
+    y_plot = np.array(y_plot, dtype=float)
+    for a in (en, hr, x_plot, y_plot):
+        a.setflags(write=False)
+    return ZoneGeometry(en=en, hr=hr, x=x_plot, y=y_plot, p_kpa=p_kpa)
+
+
+def zone_geometry(zone: ZoneSpec, p_kpa: float = 101.325, *, densify: int = 0) -> ZoneGeometry:
+    """
+    ZoneSpec を (en, hr) とチャート座標へ変換する（LRU キャッシュ付き）。
+
+    - キーは (coord_type, 頂点, 気圧を ZONE_PRESSURE_TOL_KPA 単位に丸めた値, densify)。name は含まない
+    - densify > 1 なら各辺を元の座標系（db_rh なら db-RH）で densify 分割してから変換する
+    - ヒット/ミス数は zone_cache_info()、全消去は clear_zone_cache()
+    """
+    xs = tuple(float(v) for v in zone.x)
+    ys = tuple(float(v) for v in zone.y)
+    if len(xs) < 3:
+        raise ValueError("Zone polygon needs at least 3 vertices.")
+    if len(xs) != len(ys):
+        raise ValueError("ZoneSpec.x and ZoneSpec.y must have the same length.")
+    if zone.coord_type not in ("db_rh", "db_hr"):
+        raise ValueError(f"Unknown coord_type: {zone.coord_type}")
+    return _zone_geometry_cached(zone.coord_type, xs, ys, _pressure_key(p_kpa), int(densify))
+
+
+def zone_cache_info():
+    """ゾーン形状キャッシュの (hits, misses, maxsize, currsize)。"""
+    return _zone_geometry_cached.cache_info()
+
+
+def clear_zone_cache() -> None:
+    _zone_geometry_cached.cache_clear()
+
+
 def add_zone_polygon(
     chart,
     zone: ZoneSpec,
@@ -30,49 +136,25 @@ def add_zone_polygon(
     fill_opacity: float = 0.18,
     line_width: float = 1.5,
     show_legend: bool = False,
+    densify: int = 0,
 ) -> None:
     """
     shimeri.PsychrometricChart にゾーン（ポリゴン）を追加する。
 
     仕様:
       - chart は shimeri.PsychrometricChart インスタンスを想定
-      - chart._pc.get_all(...) を使って en/hr を算出
-      - chart._skew_transform(en, hr) で座標変換
-      - 追加される trace は必ず name="zone"（SVG後処理でグルーピング可能）
+      - 頂点の変換は zone_geometry()（chart の気圧でキャッシュされ、2枚目以降のチャートでは再計算しない）
+      - densify > 1 なら辺を分割して、定RH辺などをチャート上の曲線どおりに描く
+      - 追加される trace は meta={"layer": "zone"}（name を変えても SVG後処理で zone レイヤーに入る）
     """
-    xs = np.asarray(zone.x, dtype=float)
-    ys = np.asarray(zone.y, dtype=float)
-
-    if xs.size < 3:
-        raise ValueError("Zone polygon needs at least 3 vertices.")
-    if xs.size != ys.size:
-        raise ValueError("ZoneSpec.x and ZoneSpec.y must have the same length.")
-
-    # close polygon if needed
-    if xs[0] != xs[-1] or ys[0] != ys[-1]:
-        xs = np.r_[xs, xs[0]]
-        ys = np.r_[ys, ys[0]]
-
-    # db/rh or db/hr -> en/hr
-    if zone.coord_type == "db_rh":
-        db = xs
-        rh = ys
-        _, _, _, hr_gkg, en_kjkg = chart._pc.get_all(db=db, rh=rh)
-    elif zone.coord_type == "db_hr":
-        db = xs
-        hr_gkg = ys
-        _, _, _, hr_gkg, en_kjkg = chart._pc.get_all(db=db, hr=hr_gkg)
-    else:
-        raise ValueError(f"Unknown coord_type: {zone.coord_type}")
-
-    # transform to plot coords
-    x_plot, y_plot = chart._skew_transform(np.asarray(en_kjkg), np.asarray(hr_gkg))
+    with span("enhance_chart.add_zone_polygon", zone=zone.name):
+        geom = zone_geometry(zone, float(chart._pressure), densify=densify)
 
     # add filled polygon
     chart.add_trace(
         go.Scatter(
-            x=x_plot,
-            y=y_plot,
+            x=geom.x,
+            y=geom.y,
             name=zone.name,  # 既定 "zone"
             mode="lines",
             fill="toself",
@@ -80,5 +162,6 @@ def add_zone_polygon(
             line=dict(width=line_width),
             showlegend=show_legend,
             hoverinfo="skip",
+            meta={"layer": "zone"},
         )
     )
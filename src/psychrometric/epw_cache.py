@@ -0,0 +1,295 @@
+# src/psychrimetric/epw_cache.py
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .epw_io import EPWMeta, load_epw
+from .psychro_frame import (
+    CHART_PRESSURE_ATTR,
+    DEFAULT_PRESSURE_BIN_KPA,
+    PRESSURE_MODE_ATTR,
+    PSYCHRO_COLUMNS,
+    add_psychro_columns,
+)
+from .spans import span
+
+# キャッシュ形式を変えたら上げる（古いエントリは別キーになり、いずれ追い出される）
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_COLUMNS = ("dt", "year", "month", "db_c", "rh_pct", "p_kpa")
+_META_FILE = "meta.json"
+# パス → キーの記録（cache_key）を置くサブディレクトリ
+_PATHS_DIR = "paths"
+
+
+def default_cache_dir() -> Path:
+    """
+    キャッシュ置き場。環境変数 PSYCHRO_CACHE_DIR があればそれを使う。
+    なければ Windows: %LOCALAPPDATA%/psychrometric/epw_cache, その他: ~/.cache/psychrometric/epw_cache
+    """
+    env = os.environ.get("PSYCHRO_CACHE_DIR")
+    if env:
+        return Path(env)
+    if sys.platform.startswith("win") and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    return base / "psychrometric" / "epw_cache"
+
+
+def cache_key(epw_path: str | Path, *, cache_dir: str | Path | None = None) -> str:
+    """
+    EPW の内容ハッシュから作るキャッシュキー。
+
+    ハッシュは (パス, サイズ, mtime_ns) ごとに cache_dir/paths/ へ記録し、
+    次回それらが変わっていなければファイルを読まずに記録済みのキーを返す。
+    変わっていれば（上書き・touch）内容を読み直す。内容が同じなら同じキーになる。
+    """
+    epw_path = Path(epw_path)
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    st = epw_path.stat()
+    stamp = {"path": str(epw_path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    record = root / _PATHS_DIR / f"{hashlib.blake2b(stamp['path'].encode(), digest_size=16).hexdigest()}.json"
+    try:
+        info = json.loads(record.read_text(encoding="utf-8"))
+        if info.get("version") == CACHE_VERSION and all(info.get(k) == v for k, v in stamp.items()):
+            return str(info["key"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    key = _content_hash(epw_path)
+    try:
+        record.parent.mkdir(parents=True, exist_ok=True)
+        tmp = record.with_name(f"{record.name}.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(stamp | {"version": CACHE_VERSION, "key": key}), encoding="utf-8")
+        os.replace(tmp, record)
+    except OSError:
+        pass
+    return key
+
+
+def _content_hash(epw_path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{CACHE_VERSION}:".encode())
+    with epw_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_epw_cached(
+    epw_path: str | Path,
+    *,
+    cache_dir: str | Path | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    refresh: bool = False,
+    mmap: bool = True,
+) -> tuple[pd.DataFrame, EPWMeta]:
+    """
+    load_epw() と同じ (df, meta) を返す。2回目以降はバイナリキャッシュから読む。
+
+    - キャッシュは列ごとの .npy + meta.json（cache_dir/<key>/）
+    - mmap=True なら np.load(mmap_mode="r") でメモリマップして読む
+    - refresh=True ならキャッシュを無視して読み直し、上書きする
+    - 書き込み後、合計が max_bytes を超えたら古い順に削除する
+    - キャッシュが読めない / 書けない場合は黙って load_epw() の結果を返す
+    """
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    key = cache_key(epw_path, cache_dir=root)
+    return _load_raw(epw_path, root, key, max_bytes=max_bytes, refresh=refresh, mmap=mmap)
+
+
+def _load_raw(
+    epw_path: str | Path, root: Path, key: str, *, max_bytes: int, refresh: bool, mmap: bool
+) -> tuple[pd.DataFrame, EPWMeta]:
+    entry = root / key
+    if not refresh:
+        with span("epw_cache.read", path=str(epw_path)) as sp:
+            hit = _read_entry(entry, mmap=mmap)
+            sp.set(hit=hit is not None)
+        if hit is not None:
+            return hit
+
+    df, meta = load_epw(epw_path)
+    try:
+        _write_entry(entry, df, meta)
+        evict(root, max_bytes=max_bytes, keep=(key,))
+    except OSError:
+        pass
+    return df, meta
+
+
+def load_epw_psychro_cached(
+    epw_path: str | Path,
+    *,
+    method: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+    cache_dir: str | Path | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    refresh: bool = False,
+    mmap: bool = True,
+) -> tuple[pd.DataFrame, EPWMeta]:
+    """
+    load_epw_cached() → add_psychro_columns() と同じ (df, meta) を返す。
+    空気線図の列（PSYCHRO_COLUMNS）も同じエントリに計算方法ごとに保存するので、
+    同じEPWを2回目以降に読むとき（--shared-scale all の2回目のパスなど）は en / hr を計算し直さない。
+    """
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    key = cache_key(epw_path, cache_dir=root)
+    df, meta = _load_raw(epw_path, root, key, max_bytes=max_bytes, refresh=refresh, mmap=mmap)
+
+    entry = root / key
+    tag = _psychro_tag(method, pressure_mode, pressure_bin_kpa)
+    if not refresh:
+        with span("epw_cache.read_psychro", path=str(epw_path), tag=tag) as sp:
+            hit = _read_psychro(entry, tag, rows=len(df), mmap=mmap)
+            sp.set(hit=hit is not None)
+        if hit is not None:
+            cols, p_kpa = hit
+            out = df.assign(**cols)
+            out.attrs[CHART_PRESSURE_ATTR] = p_kpa
+            out.attrs[PRESSURE_MODE_ATTR] = pressure_mode
+            return out, meta
+
+    out = add_psychro_columns(df, method=method, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa)
+    try:
+        _write_psychro(entry, tag, out)
+    except OSError:
+        pass
+    return out, meta
+
+
+def _psychro_tag(method: str, pressure_mode: str, pressure_bin_kpa: float) -> str:
+    # 刻みは binned のときだけ結果に効く
+    return f"{method}-{pressure_mode}" + (f"-{float(pressure_bin_kpa):g}" if pressure_mode == "binned" else "")
+
+
+def _read_psychro(entry: Path, tag: str, *, rows: int, mmap: bool) -> tuple[dict[str, np.ndarray], float] | None:
+    try:
+        info = json.loads((entry / f"psychro.{tag}.json").read_text(encoding="utf-8"))
+        if info.get("version") != CACHE_VERSION or info.get("rows") != rows:
+            return None
+        p_kpa = float(info["chart_p_kpa"])
+        cols = {c: np.load(entry / f"{c}.{tag}.npy", mmap_mode="r" if mmap else None) for c in PSYCHRO_COLUMNS}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return cols, p_kpa
+
+
+def _write_psychro(entry: Path, tag: str, df: pd.DataFrame) -> None:
+    # 列を先に置き、最後に json を置く（json があれば列は揃っている）
+    if not entry.is_dir():
+        return
+    suffix = f".tmp-{os.getpid()}"
+    for c in PSYCHRO_COLUMNS:
+        tmp = entry / f"{c}.{tag}.npy{suffix}"
+        with tmp.open("wb") as f:
+            np.save(f, df[c].to_numpy(dtype=float))
+        os.replace(tmp, entry / f"{c}.{tag}.npy")
+    info = {"version": CACHE_VERSION, "rows": int(len(df)), "chart_p_kpa": float(df.attrs[CHART_PRESSURE_ATTR])}
+    tmp = entry / f"psychro.{tag}.json{suffix}"
+    tmp.write_text(json.dumps(info), encoding="utf-8")
+    os.replace(tmp, entry / f"psychro.{tag}.json")
+
+
+def _read_entry(entry: Path, *, mmap: bool) -> tuple[pd.DataFrame, EPWMeta] | None:
+    meta_path = entry / _META_FILE
+    try:
+        info = json.loads(meta_path.read_text(encoding="utf-8"))
+        if info.get("version") != CACHE_VERSION:
+            return None
+        cols = {c: np.load(entry / f"{c}.npy", mmap_mode="r" if mmap else None) for c in _COLUMNS}
+        # 古い形式・壊れた meta.json（キーの過不足など）も読めないエントリとして扱う
+        meta = EPWMeta(**info["meta"])
+        os.utime(meta_path)  # LRU 用に最終利用時刻を更新
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    df = pd.DataFrame(cols, copy=False)
+    return df, meta
+
+
+def _write_entry(entry: Path, df: pd.DataFrame, meta: EPWMeta) -> None:
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = entry.with_name(f"{entry.name}.tmp-{os.getpid()}")
+    if tmp.exists():
+        shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    try:
+        for c in _COLUMNS:
+            np.save(tmp / f"{c}.npy", df[c].to_numpy())
+        info = {"version": CACHE_VERSION, "meta": dataclasses.asdict(meta), "rows": int(len(df))}
+        (tmp / _META_FILE).write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _entry_size(entry: Path) -> int:
+    return sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+
+
+def evict(cache_dir: str | Path | None = None, *, max_bytes: int = DEFAULT_MAX_BYTES, keep: tuple[str, ...] = ()) -> list[str]:
+    """合計サイズが max_bytes 以下になるまで、最終利用が古いエントリから削除する。削除したキーを返す。"""
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    if not root.is_dir():
+        return []
+
+    entries = []
+    for e in root.iterdir():
+        meta_path = e / _META_FILE
+        if not e.is_dir() or not meta_path.exists():
+            continue
+        try:
+            entries.append((meta_path.stat().st_mtime, e.name, _entry_size(e)))
+        except OSError:
+            continue
+
+    total = sum(size for _, _, size in entries)
+    removed: list[str] = []
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        shutil.rmtree(root / name, ignore_errors=True)
+        total -= size
+        removed.append(name)
+    return removed
+
+
+def invalidate(epw_path: str | Path, *, cache_dir: str | Path | None = None) -> bool:
+    """epw_path の現在の内容に対応するエントリを削除する。削除したら True。"""
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    entry = root / cache_key(epw_path, cache_dir=root)
+    if not entry.exists():
+        return False
+    shutil.rmtree(entry, ignore_errors=True)
+    return True
+
+
+def clear_cache(cache_dir: str | Path | None = None) -> int:
+    """キャッシュを全削除し、削除したエントリ数を返す。"""
+    root = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    if not root.is_dir():
+        return 0
+    n = 0
+    for e in root.iterdir():
+        if e.is_dir():
+            shutil.rmtree(e, ignore_errors=True)
+            n += e.name != _PATHS_DIR
+    return n
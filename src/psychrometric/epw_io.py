@@ -1,13 +1,17 @@
 # src/psychrometric/epw_io.py
 from __future__ import annotations
 
+import io
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from .spans import span
+
 
 @dataclass(frozen=True)
 class EPWMeta:
@@ -38,10 +42,172 @@ def _parse_location_header(line: str) -> EPWMeta:
     return EPWMeta(location=location, latitude=lat, longitude=lon, timezone=tz, elevation_m=elev)
 
 
-def load_epw(epw_path: str | Path) -> tuple[pd.DataFrame, EPWMeta]:
+# EPWの一般的な列位置（0-index）
+# 0:Year,1:Month,2:Day,3:Hour,4:Minute,5:DataSource,6:DryBulb,7:DewPoint,8:RH,9:Pressure(Pa)
+_EPW_USECOLS = (0, 1, 2, 3, 4, 6, 8, 9)
+_EPW_NAMES = ("year", "month", "day", "hour", "minute", "db_c", "rh_pct", "p_pa")
+# 日時は int16、値は float64（欠損コード 99.9 等を参照実装と同じ値で判定するため）
+_EPW_DTYPES = {0: "int16", 1: "int16", 2: "int16", 3: "int16", 4: "int16", 6: "float64", 8: "float64", 9: "float64"}
+_EPW_HEADER_LINES = 8
+
+LOADERS = ("auto", "fast", "reference")
+
+
+def load_epw(epw_path: str | Path, *, loader: str = "auto") -> tuple[pd.DataFrame, EPWMeta]:
     """
     EPWを読み込み、描画に必要な最小列を返す。
 
+    Returns
+    -------
+    df columns:
+      - dt: datetime (naive; EPW local standard time)
+      - year, month
+      - db_c: Dry Bulb [degC]
+      - rh_pct: Relative Humidity [%]
+      - p_kpa: Pressure [kPa]  (EPWはPa → kPaへ変換)
+    meta:
+      EPWヘッダのLOCATION情報（取れなければunknown）
+
+    loader:
+      - "fast": 必要な8列だけを型指定で読む（pyarrow があれば pyarrow、無ければ C エンジン）
+      - "reference": 全列を読んでから抜く従来の実装
+      - "auto": fast を試し、読めない（列が壊れている等）ときは reference にフォールバック
+    どちらも同じ df を返す。
+    """
+    if loader not in LOADERS:
+        raise ValueError(f"Unknown loader: {loader!r} (choose from {LOADERS})")
+    with span("epw_io.load_epw", path=str(epw_path), loader=loader) as sp:
+        df, meta = _load_epw(epw_path, loader)
+        sp.set(rows=len(df))
+    return df, meta
+
+
+def _load_epw(epw_path: str | Path, loader: str) -> tuple[pd.DataFrame, EPWMeta]:
+    if loader == "reference":
+        return _load_epw_reference(epw_path)
+    if loader == "fast":
+        return _load_epw_fast(epw_path)
+    try:
+        return _load_epw_fast(epw_path)
+    except (ValueError, TypeError, OverflowError, pd.errors.ParserError):
+        return _load_epw_reference(epw_path)
+
+
+@lru_cache(maxsize=1)
+def _csv_engine() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except Exception:
+        return "c"
+    return "pyarrow"
+
+
+def _read_epw_csv(buf: bytes) -> pd.DataFrame:
+    raw = pd.read_csv(
+        io.BytesIO(buf),
+        engine=_csv_engine(),
+        header=None,
+        usecols=list(_EPW_USECOLS),
+        dtype=_EPW_DTYPES,
+    )
+    raw = raw[list(_EPW_USECOLS)]
+    raw.columns = list(_EPW_NAMES)
+    return raw
+
+
+def _epw_datetime(y: np.ndarray, m: np.ndarray, d: np.ndarray, hh: np.ndarray, mm: np.ndarray) -> np.ndarray:
+    """
+    年月日時分 → datetime64 を1回の整数オフセット計算で作る。
+    hour=24 / minute=60 は「分の通算オフセット」として自然に翌日・翌時へ繰り上がる
+    （参照実装の繰り上げ処理と同じ結果）。存在しない日付は NaT。
+    """
+    y = y.astype(np.int64)
+    m = m.astype(np.int64)
+    d = d.astype(np.int64)
+
+    month_ok = (m >= 1) & (m <= 12)
+    months = (y - 1970) * 12 + np.where(month_ok, m - 1, 0)
+    first = months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    next_first = (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    valid = month_ok & (d >= 1) & (d <= next_first - first)
+
+    minutes = (first + d - 1) * 1440 + hh.astype(np.int64) * 60 + mm.astype(np.int64)
+    dt = minutes.view("datetime64[m]").astype(_datetime_dtype())
+    dt[~valid] = np.datetime64("NaT")
+    return dt
+
+
+@lru_cache(maxsize=1)
+def _datetime_dtype() -> np.dtype:
+    # pandas のバージョンで pd.to_datetime の単位（ns / us）が違うので参照実装に合わせる
+    return pd.to_datetime(dict(year=[2000], month=[1], day=[1])).dtype
+
+
+def _load_epw_fast(epw_path: str | Path) -> tuple[pd.DataFrame, EPWMeta]:
+    epw_path = Path(epw_path)
+    with span("epw_io.read_bytes") as sp:
+        data = epw_path.read_bytes()
+        sp.set(bytes=len(data))
+
+    # ヘッダ8行とデータ部を分ける
+    pos = 0
+    for _ in range(_EPW_HEADER_LINES):
+        nl = data.find(b"\n", pos)
+        if nl < 0:
+            raise ValueError("EPW header is shorter than 8 lines.")
+        pos = nl + 1
+    first_line = data[: data.find(b"\n")].decode("utf-8", errors="ignore").rstrip("\r")
+    meta = _parse_location_header(first_line)
+
+    with span("epw_io.read_csv", engine=_csv_engine()) as sp:
+        raw = _read_epw_csv(data[pos:])
+        sp.set(rows=len(raw))
+
+    df = _frame_from_raw(raw)
+
+    # 圧力が全欠損なら標準大気圧へ
+    if df["p_kpa"].notna().sum() == 0:
+        df["p_kpa"] = 101.325
+
+    return df, meta
+
+
+def _frame_from_raw(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    _EPW_NAMES 列の生データ → load_epw() の列（欠損コードの NaN 化と描画不能行の除去まで）。
+    圧力の全欠損の扱いはファイル全体で決めるので呼び出し側で行う（epw_stream はチャンクごとに呼ぶ）。
+    """
+    y = raw["year"].to_numpy()
+    with span("epw_io.datetime", rows=len(raw)):
+        dt = _epw_datetime(y, raw["month"].to_numpy(), raw["day"].to_numpy(), raw["hour"].to_numpy(), raw["minute"].to_numpy())
+
+    # 欠損コードをNaN化（代表的：db=99.9, rh=999, p=999999）
+    db = raw["db_c"].to_numpy(dtype=float)
+    rh = raw["rh_pct"].to_numpy(dtype=float)
+    p = raw["p_pa"].to_numpy(dtype=float)
+    db = np.where(db == 99.9, np.nan, db)
+    rh = np.where(rh == 999, np.nan, rh)
+    p = np.where(p == 999999, np.nan, p)
+
+    # 描画不能な行は落とす（dt, db, rhが必須）
+    keep = ~np.isnat(dt) & ~np.isnan(db) & ~np.isnan(rh)
+
+    return pd.DataFrame(
+        {
+            "dt": dt[keep],
+            "year": y[keep].astype(np.int64),
+            "month": raw["month"].to_numpy()[keep].astype(np.int64),
+            "db_c": db[keep],
+            "rh_pct": rh[keep],
+            "p_kpa": p[keep] / 1000.0,  # Pa -> kPa
+        }
+    )
+
+
+def _load_epw_reference(epw_path: str | Path) -> tuple[pd.DataFrame, EPWMeta]:
+    """
+    EPWを読み込み、描画に必要な最小列を返す（参照実装：全列を読んでから抜く）。
+
     Returns
     -------
     df columns:
@@ -0,0 +1,148 @@
+# src/psychrimetric/epw_stream.py
+"""
+大きな EPW（数十年連結の AMY、サブアワリー）を一定行数ずつ読む
+
+    cube, meta = build_hist_cube_stream("tokyo_1971-2020.epw", chunk_rows=50_000)
+    fig = render_density_grid(cube.grid(months=(7, 8)), ...)
+
+- iter_epw_chunks() は load_epw() と同じ列の DataFrame をチャンクごとに返すジェネレータ
+- build_hist_cube_stream() はファイルを2回なめる（1回目: 気圧の中央値、2回目: 空気線図の列の計算とビン集計）。
+  メモリはファイル長ではなくチャンク行数で決まる
+- ビンはチャート表示範囲で固定する（データ範囲はビン集計の前に分からないため）。
+  結果の HistCube は build_hist_cube(add_psychro_columns(load_epw(path)[0]), bins="chart") と完全に一致する
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .epw_io import _EPW_DTYPES, _EPW_HEADER_LINES, _EPW_NAMES, _EPW_USECOLS, EPWMeta, _frame_from_raw, _parse_location_header
+from .hist_cube import HistCube, bin_counts, cube_edges
+from .psychro_frame import add_psychro_columns
+from .spans import span
+
+DEFAULT_CHUNK_ROWS = 50_000
+# 圧力が全欠損のとき（load_epw() と同じく標準大気圧）
+_FALLBACK_P_KPA = 101.325
+
+
+def read_epw_meta(epw_path: str | Path) -> EPWMeta:
+    """ヘッダ1行目（LOCATION）だけ読む。"""
+    with Path(epw_path).open("r", encoding="utf-8", errors="ignore") as f:
+        return _parse_location_header(f.readline().rstrip("\r\n"))
+
+
+def iter_epw_chunks(epw_path: str | Path, *, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    EPW のデータ部を chunk_rows 行ずつ読み、load_epw() と同じ列（dt, year, month, db_c, rh_pct, p_kpa）で返す。
+
+    - 描画不能な行（dt, db, rh の欠損）はチャンク内で落とすので、返る行数は chunk_rows 以下
+    - 圧力の全欠損 → 101.325 の置き換えはファイル全体を見ないと決められないので行わない（p_kpa は NaN のまま）
+    """
+    if chunk_rows <= 0:
+        raise ValueError(f"chunk_rows must be positive: {chunk_rows}")
+    reader = pd.read_csv(
+        epw_path,
+        skiprows=_EPW_HEADER_LINES,
+        header=None,
+        usecols=list(_EPW_USECOLS),
+        dtype=_EPW_DTYPES,
+        chunksize=int(chunk_rows),
+        engine="c",
+        encoding="utf-8",
+        encoding_errors="ignore",
+    )
+    with reader:
+        for i, raw in enumerate(reader):
+            with span("epw_stream.chunk", index=i, rows=len(raw)):
+                raw = raw[list(_EPW_USECOLS)]
+                raw.columns = list(_EPW_NAMES)
+                chunk = _frame_from_raw(raw)
+            yield chunk
+
+
+class StreamingMedian:
+    """
+    チャンクごとに値の度数を足し込み、全体の中央値を正確に求める（pandas の median と同じ値）。
+    EPW の気圧は Pa の整数なので、保持するのは異なる値の数だけで済む。
+    """
+
+    def __init__(self) -> None:
+        self._values = np.empty(0, dtype=float)
+        self._counts = np.empty(0, dtype=np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if v.size == 0:
+            return
+        u, c = np.unique(v, return_counts=True)
+        allv = np.concatenate([self._values, u])
+        allc = np.concatenate([self._counts, c])
+        self._values, inv = np.unique(allv, return_inverse=True)
+        self._counts = np.bincount(inv, weights=allc, minlength=self._values.size).astype(np.int64)
+
+    @property
+    def n(self) -> int:
+        return int(self._counts.sum())
+
+    def median(self, fallback: float = float("nan")) -> float:
+        n = self.n
+        if n == 0:
+            return fallback
+        cum = np.cumsum(self._counts)
+        lo = self._values[np.searchsorted(cum, (n - 1) // 2, side="right")]
+        hi = self._values[np.searchsorted(cum, n // 2, side="right")]
+        return float(lo) if n % 2 else float((lo + hi) / 2)
+
+
+def stream_pressure_median(epw_path: str | Path, *, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> float:
+    """
+    1回目のパス: 描画に使う行の p_kpa 中央値（add_psychro_columns() が load_epw() の df に使う値と同じ）。
+    全欠損なら 101.325。
+    """
+    med = StreamingMedian()
+    for chunk in iter_epw_chunks(epw_path, chunk_rows=chunk_rows):
+        med.update(chunk["p_kpa"].to_numpy(dtype=float))
+    return med.median(_FALLBACK_P_KPA)
+
+
+def build_hist_cube_stream(
+    epw_path: str | Path,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    p_kpa: float | None = None,
+) -> tuple[HistCube, EPWMeta]:
+    """
+    EPW をチャンクごとに読んで HistCube を作る（ファイル全体は読み込まない）。
+    p_kpa を省略すると1回目のパスで気圧の中央値を求める（指定すれば1回で済む）。
+    ビンはチャート表示範囲の固定ビン（build_hist_cube の bins="chart" と同じ）。
+    """
+    epw_path = Path(epw_path)
+    meta = read_epw_meta(epw_path)
+    with span("epw_stream.build_hist_cube", path=str(epw_path), chunk_rows=chunk_rows) as sp:
+        if p_kpa is None:
+            with span("epw_stream.pressure_median"):
+                p_kpa = stream_pressure_median(epw_path, chunk_rows=chunk_rows)
+        p_kpa = float(p_kpa)
+
+        x_edges, y_edges = cube_edges(p_kpa, nbinsx, nbinsy)
+        counts = np.zeros((12, 24, x_edges.size - 1, y_edges.size - 1), dtype=np.int64)
+        hours = np.zeros((12, 24), dtype=np.int64)
+        rows = 0
+        for chunk in iter_epw_chunks(epw_path, chunk_rows=chunk_rows):
+            if chunk.empty:
+                continue
+            c, h = bin_counts(add_psychro_columns(chunk, pressure_kpa=p_kpa), x_edges, y_edges)
+            counts += c
+            hours += h
+            rows += len(chunk)
+        sp.set(rows=rows, p_kpa=p_kpa)
+
+    cube = HistCube(counts=counts, hours=hours, x_edges=x_edges, y_edges=y_edges, p_kpa=p_kpa)
+    return cube, meta
@@ -5,9 +5,6 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
-import tkinter as tk
-from tkinter import filedialog, messagebox
-
 
 @dataclass(frozen=True)
 class GUISelection:
@@ -17,12 +14,17 @@ class GUISelection:
     run_seasonal: bool
     run_yearly: bool
     seasons_config: Optional[Path] = None
+    zones_config: Optional[Path] = None  # 指定時はゾーン×期間の滞在時間表も出力する
 
 
 def popup_select() -> GUISelection:
     """
-    GUIで EPW / 出力先 / 実行モード / seasons_config を選ばせる。
+    GUIで EPW / 出力先 / 実行モード / seasons_config / zones_config を選ばせる。
     """
+    # tkinter はここで読む（GUISelection だけ使う CLI をヘッドレス環境でも動かすため）
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     root = tk.Tk()
     root.withdraw()  # メインウィンドウを表示しない
 
@@ -44,7 +46,7 @@ def popup_select() -> GUISelection:
 
     win = tk.Toplevel()
     win.title("Select mode")
-    win.geometry("350x350")
+    win.geometry("350x420")
 
     tk.Label(win, text="実行モードを選択してください").pack(pady=10)
     for v in ["Monthly", "Seasonal",  "Yearly", "All"]:
@@ -71,6 +73,18 @@ def popup_select() -> GUISelection:
     )
     tk.Label(win, text=example_text, justify="left", fg="gray", font=("Consolas", 9)).pack(pady=0)
 
+    zones_path: list[Optional[str]] = [None]
+
+    def choose_zones_json():
+        path = filedialog.askopenfilename(
+            title="Select zones JSON (optional)",
+            filetypes=[("JSON", "*.json"), ("All files", "*.*")],
+        )
+        if path:
+            zones_path[0] = path
+
+    tk.Button(win, text="ゾーン定義を選択（JSONファイル・滞在時間表を出力）", command=choose_zones_json).pack(pady=8)
+
     def on_ok():
         win.destroy()
 
@@ -93,6 +107,7 @@ def popup_select() -> GUISelection:
         run_seasonal=run_seasonal,
         run_yearly=run_yearly,
         seasons_config=Path(seasons_path[0]) if seasons_path[0] else None,
+        zones_config=Path(zones_path[0]) if zones_path[0] else None,
     )
 
 """"
@@ -0,0 +1,169 @@
+# src/psychrimetric/hist_cube.py
+"""
+月 × 時刻 × ビン の度数キューブ（ライブラリ用。main / cli / app の描画経路では使わない）
+
+    cube = build_hist_cube(add_psychro_columns(df))
+    render_density_grid(cube.grid(months=(7, 8)), out_svg, title, p_kpa=cube.p_kpa)
+
+- main / cli / app は batch.plan_jobs で期間ごとに DataFrame を切り出し、render_density_svg が
+  期間ごとのデータ範囲でビンを切る（histogram_grid）。キューブはビンを1組に固定するので、
+  部分期間のグリッドはその描画とは別のビンになる（期間どうしでビン位置が揃う）
+- bins="data"（既定）: EPW 全体のデータ範囲を等分する。全期間の grid() は
+  render.density_grid(df)（Yearly のチャート）と同じビン・同じ度数になる
+- bins="chart": チャート表示範囲（native_svg.chart_extent）を等分する。データを見る前に決まるので、
+  epw_stream.build_hist_cube_stream はこちらを使う
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .density import DensityGrid, histogram_edges
+from .native_svg import chart_extent
+from .period_filter import Period
+from .psychro_frame import CHART_PRESSURE_ATTR, add_psychro_columns, has_psychro_columns, median_pressure_kpa
+
+_MONTHS = tuple(range(1, 13))
+_HOURS = tuple(range(24))
+
+# build_hist_cube のビンの決め方
+CUBE_BINS = ("data", "chart")
+
+
+@dataclass(frozen=True, eq=False)
+class HistCube:
+    """
+    月 × 時刻 × チャート座標ビン の度数キューブ（EPWごとに1回だけ作る）。
+
+    counts: shape (12, 24, nx, ny)。counts[m-1, h, i, j] は月 m・時刻 h（dt.hour）で
+            x_edges[i]..x_edges[i+1], y_edges[j]..y_edges[j+1] に入った点数
+    hours : shape (12, 24)。月 × 時刻の有効データ数（グリッド外の点も含む。タイトルの N 用）
+    x_edges / y_edges: 全期間で共通の固定ビン（x_skew, hr[g/kg]。build_hist_cube の bins で決まる）
+    p_kpa : skew 変換・チャート背景に使った気圧
+    """
+    counts: np.ndarray
+    hours: np.ndarray
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+    p_kpa: float
+
+    def grid(self, months: Iterable[int] | None = None, hours: Iterable[int] | None = None) -> DensityGrid:
+        """months（1..12）× hours（0..23）の部分和を DensityGrid で返す。None は全体。"""
+        mi, hi = _month_index(months), _hour_index(hours)
+        z = self.counts[np.ix_(mi, hi)].sum(axis=(0, 1))
+        # DensityGrid は (ny, nx)
+        return DensityGrid(z=z.T.astype(float), x_edges=self.x_edges, y_edges=self.y_edges)
+
+    def n(self, months: Iterable[int] | None = None, hours: Iterable[int] | None = None) -> int:
+        """months × hours の有効データ数。"""
+        mi, hi = _month_index(months), _hour_index(hours)
+        return int(self.hours[np.ix_(mi, hi)].sum())
+
+    def period_grid(self, period: Period) -> DensityGrid:
+        """
+        Period（months / hours）に対応するグリッド。
+        start / end は月×時刻に集約済みのキューブでは扱えないので ValueError。
+        """
+        if period.start is not None or period.end is not None:
+            raise ValueError("HistCube cannot filter by start/end; use filter_period() on the DataFrame.")
+        return self.grid(period.months or None, period.hours or None)
+
+    def split_by_month(self) -> dict[int, DensityGrid]:
+        return {m: self.grid(months=(m,)) for m in _MONTHS}
+
+    def split_by_seasons(self, seasons: Mapping[str, Iterable[int]]) -> dict[str, DensityGrid]:
+        return {name: self.grid(months=months) for name, months in seasons.items()}
+
+    def split_by_hours(self, hours_map: Mapping[str, Iterable[int]]) -> dict[str, DensityGrid]:
+        return {name: self.grid(hours=hours) for name, hours in hours_map.items()}
+
+
+def _month_index(months: Iterable[int] | None) -> np.ndarray:
+    if months is None:
+        return np.arange(12)
+    m = np.unique(np.asarray(list(months), dtype=int))
+    if m.size and (m.min() < 1 or m.max() > 12):
+        raise ValueError(f"months must be in 1..12: {m.tolist()}")
+    return m - 1
+
+
+def _hour_index(hours: Iterable[int] | None) -> np.ndarray:
+    if hours is None:
+        return np.arange(24)
+    h = np.unique(np.asarray(list(hours), dtype=int))
+    if h.size and (h.min() < 0 or h.max() > 23):
+        raise ValueError(f"hours must be in 0..23: {h.tolist()}")
+    return h
+
+
+def build_hist_cube(
+    df: pd.DataFrame,
+    *,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    p_kpa: float | None = None,
+    bins: str = "data",
+) -> HistCube:
+    """
+    df（load_epw() の戻り。add_psychro_columns() 済みならそれを使う）から HistCube を作る。
+
+    - bins="data": df 全体の x_skew / y_skew の範囲を nbinsx × nbinsy に等分（density.histogram_edges と同じ）
+    - bins="chart": チャート表示範囲（native_svg.chart_extent）を等分（cube_edges）
+    - 集計は np.bincount 1回
+    """
+    if bins not in CUBE_BINS:
+        raise ValueError(f"Unknown bins: {bins!r} (choose from {CUBE_BINS})")
+    if not has_psychro_columns(df):
+        df = add_psychro_columns(df, pressure_kpa=p_kpa)
+    if p_kpa is None:
+        p_kpa = df.attrs.get(CHART_PRESSURE_ATTR)
+        if p_kpa is None:
+            p_kpa = median_pressure_kpa(df)
+    p_kpa = float(p_kpa)
+
+    if bins == "data":
+        x_edges, y_edges = histogram_edges(
+            df["x_skew"].to_numpy(dtype=float), df["y_skew"].to_numpy(dtype=float), nbinsx=nbinsx, nbinsy=nbinsy
+        )
+    else:
+        x_edges, y_edges = cube_edges(p_kpa, nbinsx, nbinsy)
+    counts, hours = bin_counts(df, x_edges, y_edges)
+    return HistCube(counts=counts, hours=hours, x_edges=x_edges, y_edges=y_edges, p_kpa=p_kpa)
+
+
+def cube_edges(p_kpa: float, nbinsx: int = 40, nbinsy: int = 30) -> tuple[np.ndarray, np.ndarray]:
+    """チャート表示範囲（native_svg.chart_extent）を nbinsx × nbinsy に等分したビン境界。"""
+    (x0, x1), (y0, y1) = chart_extent(float(p_kpa))
+    return np.linspace(x0, x1, int(nbinsx) + 1), np.linspace(y0, y1, int(nbinsy) + 1)
+
+
+def bin_counts(df: pd.DataFrame, x_edges: np.ndarray, y_edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    add_psychro_columns() 済みの df を (月, 時刻, x, y) で数え、(counts, hours) を返す（HistCube と同じ形）。
+    行を分けて数えた結果の和は、まとめて数えた結果と一致する（epw_stream のチャンク集計用）。
+    """
+    nx, ny = x_edges.size - 1, y_edges.size - 1
+
+    x = df["x_skew"].to_numpy(dtype=float)
+    y = df["y_skew"].to_numpy(dtype=float)
+    m = df["month"].to_numpy(dtype=int) - 1
+    h = df["dt"].dt.hour.to_numpy(dtype=int)
+
+    ok = np.isfinite(x) & np.isfinite(y) & (m >= 0) & (m < 12)
+    mh = m[ok] * 24 + h[ok]
+    hours = np.bincount(mh, minlength=12 * 24).reshape(12, 24)
+
+    # 境界の探し方は np.histogram2d と同じ（searchsorted。右端ちょうどの点は最後のビン）。
+    # 割り算でビン番号を出すと、境界上の点が丸めで histogram_grid と別のビンに入ることがある
+    ix = np.searchsorted(x_edges, x[ok], side="right") - 1
+    iy = np.searchsorted(y_edges, y[ok], side="right") - 1
+    ix[x[ok] == x_edges[-1]] = nx - 1
+    iy[y[ok] == y_edges[-1]] = ny - 1
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    flat = (mh[inside] * nx + ix[inside]) * ny + iy[inside]
+    counts = np.bincount(flat, minlength=12 * 24 * nx * ny).reshape(12, 24, nx, ny)
+    return counts, hours
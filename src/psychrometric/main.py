@@ -4,50 +4,93 @@ epwデータを各描画を行って格納する
 """
 from __future__ import annotations
 
+import argparse
 import json
 import sys
 from pathlib import Path
 
-from .epw_io import load_epw
-from .period_filter import split_by_month, split_by_seasons
-from .render import render_density_svg
+from .batch import apply_scales, plan_jobs, render_batch, scan_jobs
+from .render import ExportSession
+from .epw_cache import load_epw_cached
+from .manifest import BuildManifest
+from .psychro_frame import add_psychro_columns
+from .zone_registry import load_zones_config
+from .zone_stats import standard_periods, write_zone_tables
 from .gui import popup_select
 
 
 DEFAULT_SEASONS = {"Winter": [12, 1, 2], "Spring": [3, 4, 5], "Summer": [6, 7, 8], "Autumn": [9, 10, 11]} #北半球に寄せてるけどもまあいいかといいう感じ
 
 
-def main():
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(prog="psychrometric.main")
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="並列描画のワーカー数（省略時: CPU数, 1: 並列化しない）",
+    )
+    ap.add_argument(
+        "--force", action="store_true",
+        help="入力が変わっていないチャートも描き直す（出力先のマニフェストを使わない）",
+    )
+    ap.add_argument(
+        "--shared-scale", action="store_true",
+        help="月別・季節別・年間それぞれの組で色の範囲（等値線レベル）を揃える（密度で塗る）",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = _parse_args(argv)
     sel = popup_select()
 
-    df, meta = load_epw(sel.epw_path)
+    df, meta = load_epw_cached(sel.epw_path)
+    # en/hr はEPWごとに1回だけ計算し、各期間はその列を切り出して使う
+    df = add_psychro_columns(df)
+
+    seasons = DEFAULT_SEASONS
+    if sel.seasons_config:
+        seasons = json.loads(Path(sel.seasons_config).read_text(encoding="utf-8"))
+    # ゾーン定義の形式エラーは描画を始める前に出す
+    zones = load_zones_config(sel.zones_config) if sel.zones_config else None
 
-    if sel.run_monthly:
-        for m, d in split_by_month(df).items():
-            if len(d) == 0:
-                continue
-            out = sel.out_dir / f"{meta.location}_M{m:02d}.svg"
-            render_density_svg(d, out, f"{meta.location} / Month {m:02d} (N={len(d)})")
+    jobs = plan_jobs(
+        df,
+        meta.location,
+        sel.out_dir,
+        run_monthly=sel.run_monthly,
+        run_seasonal=sel.run_seasonal,
+        run_yearly=sel.run_yearly,
+        seasons=seasons,
+    )
+    if args.shared_scale:
+        # 1回目のパス: 切り出し済みの列を数えるだけで組ごとの最大値を決める
+        jobs = apply_scales(jobs, scan_jobs(jobs))
+    # 前回と指紋が同じチャートは描き直さない
+    manifest = None if args.force else BuildManifest.load(sel.out_dir)
+    with ExportSession():
+        results = render_batch(jobs, n_jobs=args.jobs, manifest=manifest)
 
-    if sel.run_seasonal:
-        seasons = DEFAULT_SEASONS
-        if sel.seasons_config:
-            seasons = json.loads(Path(sel.seasons_config).read_text(encoding="utf-8"))
+    if zones is not None:
+        periods = standard_periods(
+            seasons, monthly=sel.run_monthly, seasonal=sel.run_seasonal, yearly=sel.run_yearly
+        )
+        # ゾーン定義・期間・データが前回と同じなら表も書き直さない
+        write_zone_tables(df, zones, periods, [Path(sel.out_dir) / f"{meta.location}_zones.csv"], manifest=manifest)
 
-        for name, d in split_by_seasons(df, seasons).items():
-            if len(d) == 0:
-                continue
-            out = sel.out_dir / f"{meta.location}_{name}.svg"
-            render_density_svg(d, out, f"{meta.location} / {name} (N={len(d)})")
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"[ERROR] {r.name}: {r.error}", file=sys.stderr)
+    skipped = sum(1 for r in results if r.skipped)
+    print(
+        f"Rendered {len(results) - len(failed) - skipped}/{len(results)} charts "
+        f"({skipped} unchanged, skipped) in: {sel.out_dir}"
+    )
+    return 1 if failed else 0
 
-    if sel.run_yearly:
-        out = sel.out_dir / f"{meta.location}_Yearly.svg"
-        render_density_svg(df, out, f"{meta.location} / Yearly (N={len(df)})")
-    
 
 if __name__ == "__main__":
     # スクリプトとして直接実行された場合、親ディレクトリ(src)をパスに追加して
     # 'psychrimetric' パッケージが見つかるようにする
     if __package__ is None:
         sys.path.append(str(Path(__file__).parent.parent))
-    main()
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# src/psychrimetric/manifest.py
+"""
+出力ディレクトリのビルドマニフェスト（入力が変わっていないチャートは描き直さない）
+
+    manifest = BuildManifest.load(out_dir)
+    results = render_batch(jobs, manifest=manifest)   # 変わっていないものは skipped=True
+    manifest.save()
+
+- SVG ごとに「指紋」を記録する: 期間データの中身のハッシュ + 描画パラメータ（タイトル・カラースケール・
+  ビン数・等値線数・サイズ・バックエンド・SVG 最適化の設定）+ パッケージのバージョン
+- 指紋が同じで、SVG が前回書いたサイズのまま残っていれば描画を飛ばす
+- ゾーン×期間の滞在時間表（zone_stats.write_zone_tables）も同じマニフェストに載せる。
+  指紋はデータ + ゾーン定義の頂点 + 期間（zone_stats.zone_fingerprint）
+- マニフェストは一時ファイルに書いてから置き換える（途中で落ちても壊れたファイルを残さない）。
+  読めないマニフェストは空として扱う（全部描き直すだけ）
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .psychro_frame import CHART_PRESSURE_ATTR, has_psychro_columns
+from .weather_series import WeatherSeries
+
+MANIFEST_FILE = "psychro-manifest.json"
+SCHEMA = 1
+
+
+def data_digest(df: pd.DataFrame | WeatherSeries) -> str:
+    """
+    描画に使う列の中身のハッシュ。add_psychro_columns() 済みなら en / hr とチャート気圧、
+    そうでなければ db / rh / 気圧。行の並びも含む。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(df, WeatherSeries):
+        arrays = (df.en_kjkg, df.hr_gkg) if df.has_psychro else (df.db_c, df.rh_pct, df.p_pa)
+        h.update(repr(df.chart_p_kpa).encode())
+    elif has_psychro_columns(df):
+        arrays = (df["en_kjkg"].to_numpy(), df["hr_gkg"].to_numpy())
+        h.update(repr(df.attrs.get(CHART_PRESSURE_ATTR)).encode())
+    else:
+        arrays = tuple(df[c].to_numpy() for c in ("db_c", "rh_pct", "p_kpa") if c in df.columns)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def fingerprint(data: str, params: Mapping[str, Any]) -> str:
+    """data_digest() と描画パラメータ（JSON にできる値）とバージョンから指紋を作る。"""
+    payload = json.dumps(
+        {"data": data, "params": params, "version": __version__}, sort_keys=True, default=str, ensure_ascii=False
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BuildManifest:
+    """
+    1つの出力ディレクトリのマニフェスト。キーはディレクトリからの相対パス（外なら絶対パス）。
+    entries: {キー: {"fingerprint": str, "bytes": int}}
+    """
+
+    def __init__(self, root: str | Path, entries: Mapping[str, Mapping[str, Any]] | None = None):
+        self.root = Path(root)
+        self.entries: dict[str, dict[str, Any]] = {k: dict(v) for k, v in (entries or {}).items()}
+
+    @property
+    def path(self) -> Path:
+        return self.root / MANIFEST_FILE
+
+    @classmethod
+    def load(cls, root: str | Path) -> "BuildManifest":
+        path = Path(root) / MANIFEST_FILE
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(root)
+        if not isinstance(data, dict) or data.get("schema") != SCHEMA or not isinstance(data.get("entries"), dict):
+            return cls(root)
+        return cls(root, data["entries"])
+
+    def _key(self, out_svg: str | Path) -> str:
+        p = Path(out_svg).resolve()
+        try:
+            return p.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(p)
+
+    def is_fresh(self, out_svg: str | Path, fp: str) -> bool:
+        """前回と同じ指紋で書いた SVG が、そのサイズのまま残っているか。"""
+        entry = self.entries.get(self._key(out_svg))
+        if entry is None or entry.get("fingerprint") != fp:
+            return False
+        try:
+            return Path(out_svg).stat().st_size == entry.get("bytes")
+        except OSError:
+            return False
+
+    def record(self, out_svg: str | Path, fp: str) -> None:
+        self.entries[self._key(out_svg)] = {"fingerprint": fp, "bytes": Path(out_svg).stat().st_size}
+
+    def forget(self, out_svg: str | Path) -> None:
+        self.entries.pop(self._key(out_svg), None)
+
+    def save(self) -> Path:
+        text = json.dumps(
+            {"schema": SCHEMA, "version": __version__, "entries": dict(sorted(self.entries.items()))},
+            ensure_ascii=False,
+            indent=1,
+        )
+        self.root.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.path, text.encode("utf-8"))
+        return self.path
+
+
+def atomic_write_bytes(path: str | Path, data: bytes) -> Path:
+    """同じディレクトリの一時ファイルに書いてから os.replace で置き換える。"""
+    path = Path(path)
+    tmp = temp_path(path)
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return path
+
+
+def temp_path(path: str | Path) -> Path:
+    """path と同じディレクトリ・同じ拡張子の一時ファイル名（プロセスごとに別名）。"""
+    path = Path(path)
+    return path.with_name(f".{path.stem}.tmp-{os.getpid()}{path.suffix}")
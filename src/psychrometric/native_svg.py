@@ -0,0 +1,295 @@
+# src/psychrimetric/native_svg.py
+"""
+Plotly / Kaleido を使わずに、密度チャートのSVGを numpy だけで直接書き出すバックエンド。
+
+出力は svg_post.layer_svg 後と同じトップレベル構成:
+  chartborder / zone / density / points / text
+（後処理は不要）
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import numpy as np
+from plotly.colors import sample_colorscale
+
+from shimeri import PsychrometricCalculator
+
+from .contour import isoline_loops
+from .density import DensityGrid, SharedScale, nice_levels
+from .psychro_frame import skew_slope
+from .svg_post import LAYERS
+
+# PsychrometricChart と同じ描画範囲・補助線
+_DB_RANGE = (-10.0 - 0.5, 50.0)
+_HR_RANGE = (0.0, 30.0)
+_GRID_COLOR = "#E0E0E0"
+_ANNOT_COLOR = "#BDBDBD"
+_FONT = "Yu Gothic"
+
+
+@dataclass(frozen=True)
+class _Frame:
+    """データ座標 (x_skew, hr) → SVGピクセル座標の変換。"""
+    width: int
+    height: int
+    left: float
+    right: float
+    top: float
+    bottom: float
+    x0: float
+    x1: float
+    y0: float
+    y1: float
+
+    @property
+    def plot_w(self) -> float:
+        return self.width - self.left - self.right
+
+    @property
+    def plot_h(self) -> float:
+        return self.height - self.top - self.bottom
+
+    def px(self, x):
+        return self.left + (np.asarray(x, dtype=float) - self.x0) / (self.x1 - self.x0) * self.plot_w
+
+    def py(self, y):
+        return self.top + self.plot_h - (np.asarray(y, dtype=float) - self.y0) / (self.y1 - self.y0) * self.plot_h
+
+
+@dataclass(frozen=True)
+class _Background:
+    """気圧ごとに固定のチャート背景（データ座標）。"""
+    x_range: tuple[float, float]
+    lines: tuple[np.ndarray, ...]
+    rh_labels: tuple[tuple[float, float, str], ...]
+    en_labels: tuple[tuple[float, float, str], ...]
+    x_ticks: tuple[tuple[float, str], ...]
+
+
+@lru_cache(maxsize=16)
+def _background(p_kpa: float) -> _Background:
+    calc = PsychrometricCalculator(pressure=p_kpa)
+    slope = skew_slope(p_kpa)
+
+    def _xy(ens, hrs) -> np.ndarray:
+        ens = np.atleast_1d(np.asarray(ens, dtype=float))
+        hrs = np.atleast_1d(np.asarray(hrs, dtype=float))
+        return np.column_stack([ens + hrs / slope, hrs])
+
+    lines: list[np.ndarray] = []
+    # iso RH lines
+    dbs = np.linspace(-10.0, 90.0, 100)
+    for rh in np.arange(0.0, 101.0, 10.0):
+        hrs = calc.get_hr_from_db_rh(dbs, rh)
+        lines.append(_xy(calc.get_en_from_db_hr(dbs, hrs), hrs))
+    # iso DB lines
+    rhs = np.linspace(0.0, 100.0, 100)
+    for db in np.arange(-10.0, 91.0, 10.0):
+        hrs = calc.get_hr_from_db_rh(db, rhs)
+        lines.append(_xy(calc.get_en_from_db_hr(db, hrs), hrs))
+    # iso EN lines
+    rh2 = np.array([0.0, 100.0])
+    for en in np.arange(0.0, 351.0, 10.0):
+        hrs = calc.get_hr_from_rh_en(rh2, en)
+        lines.append(_xy(np.ones_like(hrs) * en, hrs))
+
+    # RH annotations (db=48)
+    rh_l = np.arange(10.0, 101.0, 10.0)
+    hrs = calc.get_hr_from_db_rh(48.0, rh_l)
+    pts = _xy(calc.get_en_from_db_hr(48.0, hrs), hrs)
+    rh_labels = tuple((float(x), float(y), f"RH={rh:.1f}%") for (x, y), rh in zip(pts, rh_l))
+
+    # EN annotations (rh=100)
+    en_l = np.arange(0.0, 351.0, 20.0)
+    hrs = calc.get_hr_from_rh_en(np.ones_like(en_l) * 100.0, en_l)
+    pts = _xy(en_l, hrs)
+    en_labels = tuple((float(x), float(y), f"EN={en:.1f}kJ/kgDA") for (x, y), en in zip(pts, en_l))
+
+    tick_db = np.arange(-10, 51, 10)
+    tick_en = np.atleast_1d(calc.get_en_from_db_hr(tick_db, 0.0))
+    x_ticks = tuple((float(e), str(int(d))) for e, d in zip(tick_en, tick_db))
+
+    xr = np.atleast_1d(calc.get_en_from_db_hr(np.array(_DB_RANGE), 0.0))
+    return _Background(
+        x_range=(float(xr[0]), float(xr[1])),
+        lines=tuple(lines),
+        rh_labels=rh_labels,
+        en_labels=en_labels,
+        x_ticks=x_ticks,
+    )
+
+
+def chart_extent(p_kpa: float) -> tuple[tuple[float, float], tuple[float, float]]:
+    """チャートの表示範囲 ((x0, x1), (y0, y1))（データ座標）。"""
+    return _background(p_kpa).x_range, _HR_RANGE
+
+
+def _f(v: float) -> str:
+    return f"{v:.2f}".rstrip("0").rstrip(".")
+
+
+def _f_all(v: np.ndarray) -> list[str]:
+    """_f を配列にまとめて適用する（tolist() で Python float にしてから書式化する方が速い）。"""
+    out = [f"{a:.2f}" for a in np.asarray(v, dtype=float).tolist()]
+    return [t.rstrip("0").rstrip(".") if t[-1] == "0" else t for t in out]
+
+
+def _polyline_d(px: np.ndarray, py: np.ndarray, close: bool = False) -> str:
+    pts = " L".join(f"{a},{b}" for a, b in zip(_f_all(px), _f_all(py)))
+    return f"M{pts}{'Z' if close else ''}"
+
+
+def _loops_d(fr: _Frame, loops: list[np.ndarray]) -> str:
+    """閉じた等値線（データ座標）をまとめて1つの path d にする（座標変換は1回）。"""
+    pts = np.concatenate(loops)
+    sx, sy = _f_all(fr.px(pts[:, 0])), _f_all(fr.py(pts[:, 1]))
+    parts = []
+    i = 0
+    for lp in loops:
+        j = i + len(lp)
+        parts.append("M" + " L".join(f"{a},{b}" for a, b in zip(sx[i:j], sy[i:j])) + "Z")
+        i = j
+    return "".join(parts)
+
+
+def _text(x: float, y: float, s: str, *, size: float, color: str = "black", anchor: str = "middle", extra: str = "") -> str:
+    return (
+        f'<text x="{_f(x)}" y="{_f(y)}" font-family="{_FONT}" font-size="{_f(size)}" '
+        f'fill="{color}" text-anchor="{anchor}"{extra}>{escape(s)}</text>'
+    )
+
+
+@lru_cache(maxsize=16)
+def _furniture(p_kpa: float, width: int, height: int) -> tuple[_Frame, str, str]:
+    """
+    データによらない部分（chartborder レイヤー全体と、タイトル以外の text）の SVG 断片。
+    (気圧, 幅, 高さ) ごとに1回だけ作り、以降のチャートでは文字列をそのまま使う。
+    """
+    bg = _background(p_kpa)
+    fr = _Frame(width, height, 50, 30, 50, 45, bg.x_range[0], bg.x_range[1], _HR_RANGE[0], _HR_RANGE[1])
+    clip = 'clip-path="url(#plotclip)"'
+
+    # --- chartborder: 背景・補助線・枠・目盛 ---
+    cb: list[str] = []
+    cb.append(f'<rect x="0" y="0" width="{width}" height="{height}" fill="white"/>')
+    for gy in np.arange(0.0, _HR_RANGE[1] + 1e-9, 5.0):
+        y = float(fr.py(gy))
+        cb.append(f'<path d="M{_f(fr.left)},{_f(y)} H{_f(fr.left + fr.plot_w)}" stroke="#EBF0F8" stroke-width="1" fill="none"/>')
+    bg_paths = "".join(
+        f'<path d="{_polyline_d(fr.px(ln[:, 0]), fr.py(ln[:, 1]))}"/>' for ln in bg.lines if ln.size
+    )
+    cb.append(f'<g {clip} stroke="{_GRID_COLOR}" stroke-width="1" fill="none">{bg_paths}</g>')
+    cb.append(
+        f'<rect x="{_f(fr.left)}" y="{_f(fr.top)}" width="{_f(fr.plot_w)}" height="{_f(fr.plot_h)}" '
+        f'fill="none" stroke="black" stroke-width="1"/>'
+    )
+    ticks = []
+    y_base = fr.top + fr.plot_h
+    for xv, _ in bg.x_ticks:
+        if fr.x0 <= xv <= fr.x1:
+            x = float(fr.px(xv))
+            ticks.append(f"M{_f(x)},{_f(y_base)} v-5 M{_f(x)},{_f(fr.top)} v5")
+    for yv in np.arange(0.0, _HR_RANGE[1] + 1e-9, 5.0):
+        y = float(fr.py(yv))
+        ticks.append(f"M{_f(fr.left)},{_f(y)} h5 M{_f(fr.left + fr.plot_w)},{_f(y)} h-5")
+    cb.append(f'<path d="{" ".join(ticks)}" stroke="black" stroke-width="1" fill="none"/>')
+
+    # --- text: 目盛ラベル・軸タイトル・注記 ---
+    tx: list[str] = []
+    for xv, s in bg.x_ticks:
+        if fr.x0 <= xv <= fr.x1:
+            tx.append(_text(float(fr.px(xv)), y_base + 14, s, size=10))
+    for yv in np.arange(0.0, _HR_RANGE[1] + 1e-9, 5.0):
+        tx.append(_text(fr.left - 4, float(fr.py(yv)) + 3.5, f"{yv:g}", size=10, anchor="end"))
+    tx.append(_text(fr.left + fr.plot_w / 2, height - 6, "Dry-Bulb Temperature (°C)", size=12))
+    cy = fr.top + fr.plot_h / 2
+    tx.append(_text(14, cy, "Humidity Ratio (g/kg)", size=12, extra=f' transform="rotate(-90 14 {_f(cy)})"'))
+    for xv, yv, s in bg.rh_labels + bg.en_labels:
+        if fr.x0 <= xv <= fr.x1 and fr.y0 <= yv <= fr.y1:
+            anchor = "end" if s.startswith("EN=") else "middle"
+            tx.append(_text(float(fr.px(xv)), float(fr.py(yv)) - 3, s, size=8, color=_ANNOT_COLOR, anchor=anchor))
+
+    return fr, "".join(cb), "".join(tx)
+
+
+def density_svg(
+    grid: DensityGrid,
+    title: str,
+    *,
+    p_kpa: float = 101.325,
+    colorscale: str = "Blues",
+    ncontours: int = 10,
+    opacity: float = 0.9,
+    width: int = 900,
+    height: int = 650,
+    points: tuple[np.ndarray, np.ndarray] | None = None,
+    label: str | None = "density",
+    scale: SharedScale | None = None,
+) -> bytes:
+    """
+    DensityGrid（チャート座標）から塗り分け等値線のSVGを作る。
+
+    points: (x_skew, hr) を渡すと points レイヤーに点群を描く
+    label : 重心位置に置くトレース名（PsychrometricChart.add_histogram_2d_contour と同じ）
+    scale : 等値線レベルと色をこのグリッドの最大値ではなく scale.levels で決める（grid は密度で渡す）
+    """
+    fr, chartborder, static_text = _furniture(float(p_kpa), int(width), int(height))
+
+    layers: dict[str, list[str]] = {k: [] for k in LAYERS}
+    clip = 'clip-path="url(#plotclip)"'
+    layers["chartborder"].append(chartborder)
+
+    # --- density: 塗り分け等値線 ---
+    z = np.asarray(grid.z, dtype=float)
+    zmax = float(np.nanmax(z)) if z.size else 0.0
+    levels = scale.levels if scale is not None else nice_levels(0.0, zmax, ncontours)
+    colors = sample_colorscale(colorscale, list(np.linspace(0.0, 1.0, levels.size + 1)))
+    xc, yc = grid.x_centers, grid.y_centers
+    dens = layers["density"]
+    if zmax > 0:
+        # 最下段（0〜最初のレベル）はグリッド範囲全体を塗る
+        bx = fr.px(grid.x_edges[[0, -1]])
+        by = fr.py(grid.y_edges[[0, -1]])
+        dens.append(
+            f'<rect x="{_f(min(bx))}" y="{_f(min(by))}" width="{_f(abs(bx[1] - bx[0]))}" '
+            f'height="{_f(abs(by[1] - by[0]))}" fill="{colors[0]}"/>'
+        )
+        for lv, color in zip(levels, colors[1:]):
+            loops = isoline_loops(z, float(lv), xc, yc)
+            if not loops:
+                continue
+            d = _loops_d(fr, loops)
+            dens.append(f'<path d="{d}" fill="{color}" fill-rule="evenodd" stroke="none"/>')
+    layers["density"] = [f'<g {clip} opacity="{_f(opacity)}">{"".join(dens)}</g>'] if dens else []
+
+    # --- points ---
+    if points is not None:
+        px_, py_ = fr.px(points[0]), fr.py(points[1])
+        ok = np.isfinite(px_) & np.isfinite(py_)
+        circles = "".join(f'<circle cx="{_f(a)}" cy="{_f(b)}" r="1"/>' for a, b in zip(px_[ok], py_[ok]))
+        layers["points"].append(f'<g {clip} fill="#1f77b4" fill-opacity="0.15">{circles}</g>')
+
+    # --- text: タイトル・（目盛ラベル・軸タイトル・注記）・トレース名 ---
+    tx = layers["text"]
+    tx.append(_text(0.01 * width, fr.top / 2 + 5, title, size=14, anchor="start"))
+    tx.append(static_text)
+    if label and grid.total > 0:
+        # add_histogram_2d_contour と同様に重心へトレース名を置く
+        w = z / grid.total
+        gx = float((w.sum(axis=0) * xc).sum())
+        gy = float((w.sum(axis=1) * yc).sum())
+        tx.append(_text(float(fr.px(gx)), float(fr.py(gy)), label, size=8))
+
+    body = "".join(f'<g id="{k}">{"".join(layers[k])}</g>' for k in LAYERS)
+    svg = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<defs><clipPath id="plotclip"><rect x="{_f(fr.left)}" y="{_f(fr.top)}" '
+        f'width="{_f(fr.plot_w)}" height="{_f(fr.plot_h)}"/></clipPath></defs>'
+        f"{body}</svg>"
+    )
+    return svg.encode("utf-8")
@@ -5,8 +5,15 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Iterable, Mapping
 
+import numpy as np
 import pandas as pd
 
+from .spans import span
+from .weather_series import WeatherSeries
+
+# load_epw() の DataFrame か、その WeatherSeries 版
+Frame = pd.DataFrame | WeatherSeries
+
 
 @dataclass(frozen=True)
 class Period:
@@ -16,42 +23,162 @@ class Period:
     hours: tuple[int, ...] | None = None  # 0..23
 
 
-def filter_period(df: pd.DataFrame, period: Period) -> pd.DataFrame:
+# 並べ替えキー: 月(1..12, 範囲外は13) × 時刻(0..23, NaT は24)
+_N_MONTH_SLOTS = 13
+_N_HOUR_SLOTS = 25
+_NO_ROWS = np.empty(0, dtype=np.int64)
+
+
+@dataclass(frozen=True, eq=False)
+class CalendarIndex:
     """
-    df: load_epw() の戻り（dt, month 列を含むこと）
+    load_epw() の戻り（または WeatherSeries）に対する (月, 時刻) の索引。EPWごとに1回だけ作る。
+
+    order  : 行位置を (月, 時刻) で安定ソートしたもの
+    offsets: shape (13*25+1,)。キー k=(月-1)*25+時刻 の行は order[offsets[k]:offsets[k+1]]
+    dt     : dt 列（datetime64）。start/end の絞り込みに使う
+    dt_sorted: dt が単調増加なら True（start/end を二分探索で切り出せる）
+
+    月・季節・時刻の指定は order の連続区間の連結になり、行ごとのマスクを作らない。
+    取り出した行位置は元の並び（時系列順）に戻して返す。
     """
-    out = df
-    if period.months:
-        months = set(period.months)
-        out = out[out["month"].isin(months)]
-    if period.hours:
-        target_hours = set(period.hours)
-        out = out[out["dt"].dt.hour.isin(target_hours)]
-    if period.start is not None:
-        out = out[out["dt"] >= period.start]
-    if period.end is not None:
-        out = out[out["dt"] < period.end]
-    return out.reset_index(drop=True)
+    order: np.ndarray
+    offsets: np.ndarray
+    dt: np.ndarray
+    dt_sorted: bool
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.order.size)
+
+    @classmethod
+    def from_df(cls, df: Frame) -> "CalendarIndex":
+        with span("period_filter.index", rows=len(df)):
+            return cls._from_df(df)
+
+    @classmethod
+    def _from_df(cls, df: Frame) -> "CalendarIndex":
+        if isinstance(df, WeatherSeries):
+            month, hour, dt = df.month, df.hour.astype(float), df.dt
+        else:
+            month = df["month"].to_numpy()
+            hour = df["dt"].dt.hour.to_numpy(dtype=float, na_value=np.nan)
+            dt = df["dt"].to_numpy()
+
+        m = np.where((month >= 1) & (month <= 12), month, _N_MONTH_SLOTS).astype(np.int64) - 1
+        h = np.where(np.isfinite(hour), hour, _N_HOUR_SLOTS - 1).astype(np.int64)
+        key = m * _N_HOUR_SLOTS + h
+
+        order = np.argsort(key, kind="stable")
+        counts = np.bincount(key, minlength=_N_MONTH_SLOTS * _N_HOUR_SLOTS)
+        offsets = np.zeros(counts.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        dt_sorted = bool(dt.size < 2 or (not pd.isna(dt).any() and (dt[1:] >= dt[:-1]).all()))
+        return cls(order=order, offsets=offsets, dt=dt, dt_sorted=dt_sorted)
+
+    def _rows(self, key: int, n_keys: int) -> np.ndarray:
+        return self.order[self.offsets[key]:self.offsets[key + n_keys]]
 
+    def positions(
+        self,
+        months: Iterable[int] | None = None,
+        hours: Iterable[int] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> np.ndarray:
+        """条件に合う行位置（昇順）。months / hours が None（または空）なら絞り込まない。"""
+        if not months and not hours:
+            pos = np.arange(self.n_rows)
+        else:
+            m_slots = [v - 1 for v in sorted({int(v) for v in months}) if 1 <= v <= 12] if months else range(_N_MONTH_SLOTS)
+            if hours:
+                h_slots = [v for v in sorted({int(v) for v in hours}) if 0 <= v <= 23]
+                chunks = [self._rows(mi * _N_HOUR_SLOTS + hi, 1) for mi in m_slots for hi in h_slots]
+            else:
+                # 時刻の指定が無ければ1か月分（NaT を含む全時刻スロット）が1つの連続区間
+                chunks = [self._rows(mi * _N_HOUR_SLOTS, _N_HOUR_SLOTS) for mi in m_slots]
+            # 月の指定が無いときは範囲外の月（スロット12）の行も含める（マスク版と同じ挙動）
+            if len(chunks) == 1 and hours:
+                pos = chunks[0]  # 1キー内は安定ソートなので元の並びのまま
+            else:
+                pos = np.sort(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.int64)
 
-def split_by_month(df: pd.DataFrame) -> dict[int, pd.DataFrame]:
-    return {m: df[df["month"] == m].reset_index(drop=True) for m in range(1, 13)}
+        if start is None and end is None:
+            return pos
+        if self.dt_sorted:
+            lo = np.searchsorted(self.dt, np.datetime64(start), side="left") if start is not None else 0
+            hi = np.searchsorted(self.dt, np.datetime64(end), side="left") if end is not None else self.n_rows
+            return pos[np.searchsorted(pos, lo, side="left"):np.searchsorted(pos, hi, side="left")]
+        d = self.dt[pos]
+        ok = np.ones(pos.size, dtype=bool)
+        if start is not None:
+            ok &= d >= np.datetime64(start)
+        if end is not None:
+            ok &= d < np.datetime64(end)
+        return pos[ok]
 
 
-def split_by_seasons(df: pd.DataFrame, seasons: Mapping[str, Iterable[int]]) -> dict[str, pd.DataFrame]:
+def _index_for(df: Frame, index: CalendarIndex | None) -> CalendarIndex:
+    if index is None:
+        return CalendarIndex.from_df(df)
+    if index.n_rows != len(df):
+        raise ValueError(f"CalendarIndex was built for {index.n_rows} rows, but df has {len(df)}.")
+    return index
+
+
+def _take(df: Frame, pos: np.ndarray) -> Frame:
+    if isinstance(df, WeatherSeries):
+        return df.take(pos)
+    return df.take(pos).reset_index(drop=True)
+
+
+def filter_period(df: Frame, period: Period, index: CalendarIndex | None = None) -> Frame:
+    """
+    df: load_epw() の戻り（dt, month 列を含むこと）か WeatherSeries（同じ型で返す）
+    index: 同じ df から作った CalendarIndex（繰り返し呼ぶときは作って渡す）
+    """
+    index = _index_for(df, index)
+    with span("period_filter.filter_period", rows=len(df)) as sp:
+        out = _take(df, index.positions(period.months, period.hours, period.start, period.end))
+        sp.set(rows_out=len(out))
+    return out
+
+
+def split_by_month(df: Frame, index: CalendarIndex | None = None) -> dict[int, Frame]:
+    index = _index_for(df, index)
+    with span("period_filter.split_by_month", rows=len(df)):
+        return {m: _take(df, index.positions(months=(m,))) for m in range(1, 13)}
+
+
+def split_by_seasons(
+    df: Frame,
+    seasons: Mapping[str, Iterable[int]],
+    index: CalendarIndex | None = None,
+) -> dict[str, Frame]:
     """
     seasons: {"DJF":[12,1,2], "MAM":[3,4,5], ...}
     """
-    out: dict[str, pd.DataFrame] = {}
-    for name, months in seasons.items():
-        out[name] = df[df["month"].isin(list(months))].reset_index(drop=True)
+    index = _index_for(df, index)
+    out: dict[str, Frame] = {}
+    with span("period_filter.split_by_seasons", rows=len(df), periods=list(seasons)):
+        for name, months in seasons.items():
+            months = list(months)
+            out[name] = _take(df, index.positions(months=months) if months else _NO_ROWS)
     return out
 
-def split_by_hours(df: pd.DataFrame, hours_map: Mapping[str, Iterable[int]]) -> dict[str, pd.DataFrame]:
+def split_by_hours(
+    df: Frame,
+    hours_map: Mapping[str, Iterable[int]],
+    index: CalendarIndex | None = None,
+) -> dict[str, Frame]:
     """
     hours_map: {"Daytime": [9, 10, ...], "Nighttime": [18, 19, ...]}
     """
-    out: dict[str, pd.DataFrame] = {}
-    for name, hours in hours_map.items():
-        out[name] = df[df["dt"].dt.hour.isin(list(hours))].reset_index(drop=True)
-    return out
\ No newline at end of file
+    index = _index_for(df, index)
+    out: dict[str, Frame] = {}
+    with span("period_filter.split_by_hours", rows=len(df), periods=list(hours_map)):
+        for name, hours in hours_map.items():
+            hours = list(hours)
+            out[name] = _take(df, index.positions(hours=hours) if hours else _NO_ROWS)
+    return out
@@ -0,0 +1,161 @@
+# src/psychrimetric/preview.py
+"""
+スタイル調整用のインタラクティブプレビュー（app.py のプレビューパネルから使う）
+
+- EPW を読み込んだら PreviewSource を1回だけ作る（期間ごとのチャート座標を保持）
+- スタイル変更のたびに、ビン分け済みグリッド（期間 × ビン数でキャッシュ）から native_svg で
+  SVG をメモリ上に作り直す。ディスクへの書き出しや Kaleido は使わない
+- 連続した変更は Debouncer でまとめ、最後の1回だけ描画する
+"""
+from __future__ import annotations
+
+import dataclasses
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .density import DensityGrid, histogram_grid
+from .native_svg import density_svg
+from .period_filter import CalendarIndex, Period
+from .psychro_frame import CHART_PRESSURE_ATTR, add_psychro_columns, has_psychro_columns, median_pressure_kpa
+from .zone_stats import standard_periods
+
+# 保持するビン分け済みグリッドの数（期間 × (nbinsx, nbinsy)）
+GRID_CACHE_SIZE = 64
+# 連続した変更をまとめる待ち時間 [s]
+DEBOUNCE_S = 0.15
+# プレビューの描画経路（histogram_grid + native_svg）。プレビューを出したあとの書き出しもこのバックエンドで行う
+PREVIEW_BACKEND = "native"
+
+
+@dataclass(frozen=True)
+class PreviewStyle:
+    """プレビューで調整できる render_density_svg の引数。"""
+    colorscale: str = "Blues"
+    nbinsx: int = 40
+    nbinsy: int = 30
+    ncontours: int = 10
+    opacity: float = 0.9
+
+    def render_kwargs(self, *, previewed: bool = False) -> dict[str, Any]:
+        """
+        render_density_svg / render_batch へそのまま渡せる dict。
+        previewed=True（プレビューを見てから書き出す）ならプレビューと同じ図になるよう backend="native" を含める。
+        False なら backend は渡さず、render_batch の既定（Plotly + Kaleido）のまま。
+        """
+        kw = dataclasses.asdict(self)
+        return kw | {"backend": PREVIEW_BACKEND} if previewed else kw
+
+
+class PreviewSource:
+    """
+    期間ごとのチャート座標 (x_skew, hr) を保持し、スタイルを変えたプレビューSVGを素早く作る。
+
+    - 期間の名前は batch.plan_jobs と同じ（M01..M12 / 季節名 / Yearly）。データが0件の期間は除く
+    - ビン分けは native バックエンドと同じ histogram_grid（データ範囲を等分）なので、
+      プレビューと backend="native" の書き出し（PreviewStyle.render_kwargs(previewed=True) を渡した render_batch）は同じ図になる
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        location: str,
+        *,
+        seasons: Mapping[str, Iterable[int]] | None = None,
+        periods: Mapping[str, Period] | None = None,
+        grid_cache_size: int = GRID_CACHE_SIZE,
+    ):
+        if not has_psychro_columns(df):
+            df = add_psychro_columns(df)
+        p_kpa = df.attrs.get(CHART_PRESSURE_ATTR)
+        self.p_kpa = float(p_kpa if p_kpa is not None else median_pressure_kpa(df))
+        self.location = location
+
+        if periods is None:
+            periods = standard_periods(seasons)
+        index = CalendarIndex.from_df(df)
+        x_all = df["x_skew"].to_numpy(dtype=float)
+        y_all = df["y_skew"].to_numpy(dtype=float)
+
+        self._points: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for name, period in periods.items():
+            pos = index.positions(period.months, period.hours, period.start, period.end)
+            x, y = x_all[pos], y_all[pos]
+            ok = np.isfinite(x) & np.isfinite(y)
+            if ok.any():
+                self._points[name] = (x[ok], y[ok])
+
+        self._grids: OrderedDict[tuple[str, int, int], DensityGrid] = OrderedDict()
+        self._grid_cache_size = int(grid_cache_size)
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._points)
+
+    def n(self, name: str) -> int:
+        return int(self._points[name][0].size)
+
+    def title(self, name: str) -> str:
+        return f"{self.location} / {name}"
+
+    def grid(self, name: str, nbinsx: int, nbinsy: int) -> DensityGrid:
+        """期間 name を nbinsx × nbinsy でビン分けしたグリッド（キャッシュ付き）。"""
+        if name not in self._points:
+            raise KeyError(f"Unknown or empty period: {name!r}")
+        key = (name, int(nbinsx), int(nbinsy))
+        with self._lock:
+            g = self._grids.get(key)
+            if g is not None:
+                self._grids.move_to_end(key)
+                return g
+        x, y = self._points[name]
+        g = histogram_grid(x, y, nbinsx=key[1], nbinsy=key[2])
+        with self._lock:
+            self._grids[key] = g
+            while len(self._grids) > self._grid_cache_size:
+                self._grids.popitem(last=False)
+        return g
+
+    def render(self, name: str, style: PreviewStyle, *, width: int = 900, height: int = 650) -> bytes:
+        """プレビュー用の SVG（bytes）をメモリ上に作る。"""
+        return density_svg(
+            self.grid(name, style.nbinsx, style.nbinsy),
+            self.title(name),
+            p_kpa=self.p_kpa,
+            colorscale=style.colorscale,
+            ncontours=style.ncontours,
+            opacity=style.opacity,
+            width=width,
+            height=height,
+        )
+
+
+class Debouncer:
+    """
+    最後の呼び出しから delay_s 経過したときだけ fn を実行する（スライダー操作などの連打をまとめる）。
+    fn は threading.Timer のスレッドで呼ばれる。
+    """
+
+    def __init__(self, delay_s: float = DEBOUNCE_S):
+        self.delay_s = float(delay_s)
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self, fn: Callable[..., Any], *args: Any) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay_s, fn, args)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,218 @@
+# src/psychrimetric/psychro_frame.py
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from shimeri import PsychrometricCalculator
+
+from . import psychro_kernel
+from .spans import span
+
+# load_epw() の df に追加する列
+PSYCHRO_COLUMNS = ("hr_gkg", "en_kjkg", "x_skew", "y_skew")
+
+# df.attrs に記録する「計算に使った気圧」のキー
+CHART_PRESSURE_ATTR = "chart_p_kpa"
+
+# (db, rh) → (en, hr) の計算方法。"shimeri": CoolProp（既定）、"lut": psychro_kernel の表引き
+PSYCHRO_METHODS = ("shimeri", "lut")
+
+# en / hr の計算に使う気圧
+#   "median": 全行を中央値（チャート背景の気圧）で計算する（既定）
+#   "row"   : 各行の p_kpa で計算する
+#   "binned": p_kpa を pressure_bin_kpa 刻みに丸めた気圧ごとにまとめて計算する
+# どのモードでも skew 変換とチャート背景はチャート気圧1つ
+PRESSURE_MODES = ("median", "row", "binned")
+DEFAULT_PRESSURE_BIN_KPA = 0.5
+
+# df.attrs に記録する気圧モードのキー
+PRESSURE_MODE_ATTR = "pressure_mode"
+
+
+def median_pressure_kpa(df: pd.DataFrame, fallback_kpa: float = 101.325) -> float:
+    p = pd.to_numeric(df.get("p_kpa", pd.Series([], dtype=float)), errors="coerce")
+    v = float(p.median()) if np.isfinite(p.median()) else fallback_kpa
+    return v
+
+
+@lru_cache(maxsize=64)
+def skew_slope(p_kpa: float) -> float:
+    """
+    shimeri.PsychrometricChart._calc_skew_slope と同じ定義の傾き。
+    （チャートを作らずに plot 座標へ変換するため）
+    """
+    calc = PsychrometricCalculator(pressure=p_kpa)
+    hrs = np.array([0.0, 30.0])
+    ens = calc.get_en_from_db_hr(50.0, hrs)
+    return float((hrs[1] - hrs[0]) / (ens[0] - ens[1]))
+
+
+def skew_transform(en_kjkg: np.ndarray, hr_gkg: np.ndarray, p_kpa: float) -> tuple[np.ndarray, np.ndarray]:
+    """(en, hr) -> チャート上の (x, y)。PsychrometricChart._skew_transform と同値。"""
+    en = np.asarray(en_kjkg, dtype=float)
+    hr = np.asarray(hr_gkg, dtype=float)
+    return en + hr / skew_slope(p_kpa), hr
+
+
+def en_hr_arrays(
+    db_c: np.ndarray,
+    rh_pct: np.ndarray,
+    p_kpa: float,
+    *,
+    method: str = "shimeri",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (乾球温度[℃], 相対湿度[%]) → (en[kJ/kg], hr[g/kg])。気圧 p_kpa 一定で計算する。
+    method="lut" は psychro_kernel.en_hr（shimeri との差は psychro_kernel の docstring を参照）。
+    """
+    if method not in PSYCHRO_METHODS:
+        raise ValueError(f"Unknown psychro method: {method!r} (choose from {PSYCHRO_METHODS})")
+    db = np.asarray(db_c, dtype=float)
+    rh = np.asarray(rh_pct, dtype=float)
+    if method == "lut":
+        return psychro_kernel.en_hr(db, rh, p_kpa)
+    calc = PsychrometricCalculator(pressure=p_kpa)
+    # 2変数(db,rh) -> 全変数を算出（hr[g/kg], en[kJ/kg]が得られる）
+    with span("psychro.get_all", rows=int(db.size), p_kpa=p_kpa):
+        _, _, _, hr_gkg, en_kjkg = calc.get_all(db=db, rh=rh)
+    return np.atleast_1d(np.asarray(en_kjkg, dtype=float)), np.atleast_1d(np.asarray(hr_gkg, dtype=float))
+
+
+def en_hr_rows(
+    db_c: np.ndarray,
+    rh_pct: np.ndarray,
+    p_row_kpa: np.ndarray,
+    p_chart_kpa: float,
+    *,
+    method: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    pressure_mode に従って (en[kJ/kg], hr[g/kg]) を求める。p_row_kpa が NaN の行はチャート気圧で計算する。
+
+    - "row" + method="lut": 行ごとの気圧の配列をそのままカーネルに渡す（1回のベクトル演算）
+    - "row" + method="shimeri": 同じ気圧の行をまとめて気圧ごとに1回ずつ呼ぶ
+    - "binned": 丸めた気圧ごとに1回ずつ呼ぶ（呼び出し回数は気圧の幅 / pressure_bin_kpa 程度）
+    """
+    if pressure_mode not in PRESSURE_MODES:
+        raise ValueError(f"Unknown pressure mode: {pressure_mode!r} (choose from {PRESSURE_MODES})")
+    if pressure_mode == "median":
+        return en_hr_arrays(db_c, rh_pct, p_chart_kpa, method=method)
+
+    db = np.asarray(db_c, dtype=float)
+    rh = np.asarray(rh_pct, dtype=float)
+    p = np.asarray(p_row_kpa, dtype=float)
+    p = np.where(np.isfinite(p), p, p_chart_kpa)
+    if pressure_mode == "binned":
+        if not pressure_bin_kpa > 0:
+            raise ValueError(f"pressure_bin_kpa must be positive: {pressure_bin_kpa}")
+        p = np.round(p / pressure_bin_kpa) * pressure_bin_kpa
+    elif method == "lut":
+        return psychro_kernel.en_hr(db, rh, p)
+
+    levels, inv = np.unique(p, return_inverse=True)
+    en = np.empty(db.size)
+    hr = np.empty(db.size)
+    with span("psychro.pressure_groups", mode=pressure_mode, groups=int(levels.size), rows=int(db.size)):
+        order = np.argsort(inv, kind="stable")
+        bounds = np.searchsorted(inv[order], np.arange(levels.size + 1))
+        for k, level in enumerate(levels):
+            rows = order[bounds[k]:bounds[k + 1]]
+            en[rows], hr[rows] = en_hr_arrays(db[rows], rh[rows], float(level), method=method)
+    return en, hr
+
+
+def pressure_displacement(df: pd.DataFrame, *, chart_p_kpa: float | None = None) -> dict[str, float]:
+    """
+    行ごとの気圧で計算したときに、中央値（チャート気圧）で計算した点がどれだけずれるか。
+
+    返す値: チャート気圧、p_kpa の最小・最大、hr / en の差の最大値、チャート座標（skew 変換後）での
+    ずれの最大・平均（x は kJ/kg 相当、y は g/kg）。高地の地点や気圧の変動が大きい期間で
+    "row" / "binned" を使う価値があるかの判断用。計算は psychro_kernel（表引き）で行うので速い
+    （カーネル自体の誤差はずれより十分小さい）。
+    """
+    if chart_p_kpa is None:
+        chart_p_kpa = df.attrs.get(CHART_PRESSURE_ATTR, median_pressure_kpa(df))
+    p_chart = float(chart_p_kpa)
+    db = df["db_c"].to_numpy(dtype=float)
+    rh = df["rh_pct"].to_numpy(dtype=float)
+    p = df["p_kpa"].to_numpy(dtype=float)
+    p = np.where(np.isfinite(p), p, p_chart)
+    report = {"chart_p_kpa": p_chart, "rows": int(db.size)}
+    if db.size == 0:
+        zeros = dict.fromkeys(("max_dhr_gkg", "max_den_kjkg", "max_shift", "mean_shift"), 0.0)
+        return report | {"p_min_kpa": p_chart, "p_max_kpa": p_chart} | zeros
+
+    with span("psychro.pressure_displacement", rows=int(db.size)):
+        en_m, hr_m = psychro_kernel.en_hr(db, rh, p_chart)
+        en_r, hr_r = psychro_kernel.en_hr(db, rh, p)
+        x_m, y_m = skew_transform(en_m, hr_m, p_chart)
+        x_r, y_r = skew_transform(en_r, hr_r, p_chart)
+        shift = np.hypot(x_r - x_m, y_r - y_m)
+    return report | {
+        "p_min_kpa": float(p.min()),
+        "p_max_kpa": float(p.max()),
+        "max_dhr_gkg": float(np.nanmax(np.abs(hr_r - hr_m))),
+        "max_den_kjkg": float(np.nanmax(np.abs(en_r - en_m))),
+        "max_shift": float(np.nanmax(shift)),
+        "mean_shift": float(np.nanmean(shift)),
+    }
+
+
+def add_psychro_columns(
+    df: pd.DataFrame,
+    *,
+    pressure_kpa: float | None = None,
+    method: str = "shimeri",
+    pressure_mode: str = "median",
+    pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+) -> pd.DataFrame:
+    """
+    load_epw() の df に空気線図用の列を追加して返す（EPWごとに1回だけ計算する）。
+
+    追加列:
+      - hr_gkg: 絶対湿度 [g/kg]
+      - en_kjkg: 比エンタルピー [kJ/kg]
+      - x_skew, y_skew: チャート座標（skew変換後）
+
+    気圧は pressure_kpa 指定がなければ df 全体の p_kpa 中央値を使い、
+    df.attrs["chart_p_kpa"] に記録する。period_filter の分割結果は
+    これらの列をそのまま切り出すだけになる。
+    method は en_hr_arrays() と同じ（"lut" なら CoolProp を呼ばない）。
+    pressure_mode="row" / "binned" なら en / hr は各行の p_kpa で計算し（en_hr_rows()）、
+    チャート気圧（skew 変換・背景）だけを上の気圧にする。モードは df.attrs["pressure_mode"] に記録する。
+    """
+    p_kpa = float(pressure_kpa) if pressure_kpa is not None else median_pressure_kpa(df)
+
+    out = df.copy()
+    if out.empty:
+        for c in PSYCHRO_COLUMNS:
+            out[c] = pd.Series([], dtype=float)
+    else:
+        en_kjkg, hr_gkg = en_hr_rows(
+            out["db_c"].to_numpy(dtype=float),
+            out["rh_pct"].to_numpy(dtype=float),
+            out["p_kpa"].to_numpy(dtype=float) if "p_kpa" in out.columns else np.full(len(out), np.nan),
+            p_kpa,
+            method=method,
+            pressure_mode=pressure_mode,
+            pressure_bin_kpa=pressure_bin_kpa,
+        )
+        x, y = skew_transform(en_kjkg, hr_gkg, p_kpa)
+
+        out["hr_gkg"] = hr_gkg
+        out["en_kjkg"] = en_kjkg
+        out["x_skew"] = x
+        out["y_skew"] = y
+
+    out.attrs[CHART_PRESSURE_ATTR] = p_kpa
+    out.attrs[PRESSURE_MODE_ATTR] = pressure_mode
+    return out
+
+
+def has_psychro_columns(df: pd.DataFrame) -> bool:
+    return all(c in df.columns for c in PSYCHRO_COLUMNS)
@@ -1,25 +1,64 @@
 # src/psychrimetric/render.py
 from __future__ import annotations
 
+import asyncio
+import copy
+import threading
+from functools import lru_cache
 from pathlib import Path
+from typing import Sequence
 
 import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
 
 from shimeri import PsychrometricCalculator, PsychrometricChart
-from .svg_post import postprocess_svg
+from .svg_post import layer_svg, tag_trace_layers
 
+from .density import DensityGrid, SharedScale, histogram_edges, histogram_grid, kde_grid
 from .enhance_chart import ZoneSpec, add_zone_polygon
+from .native_svg import density_svg
+from .psychro_frame import CHART_PRESSURE_ATTR, en_hr_arrays, has_psychro_columns, median_pressure_kpa, skew_transform
+from .spans import span
+from .weather_series import WeatherSeries
+
+BACKENDS = ("plotly", "native")
+# 密度の求め方（hist: nbinsx × nbinsy の度数、kde: density.kde_grid() のガウスカーネル密度推定）
+DENSITY_METHODS = ("hist", "kde")
+
+# 背景チャートのテンプレートを保持する (気圧, 幅, 高さ) の数
+BASE_CHART_CACHE_SIZE = 16
 
 
 def _pressure_kpa(df: pd.DataFrame, fallback_kpa: float = 101.325) -> float:
-    p = pd.to_numeric(df.get("p_kpa", pd.Series([], dtype=float)), errors="coerce")
-    v = float(p.median()) if np.isfinite(p.median()) else fallback_kpa
-    return v
+    return median_pressure_kpa(df, fallback_kpa)
+
+
+def _en_hr_from_df(df: pd.DataFrame | WeatherSeries) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    df から (en[kJ/kg], hr[g/kg], 気圧[kPa]) を取り出す。
+    add_psychro_columns() / WeatherSeries.with_psychro() 済みなら計算済みの値をそのまま使う。
+    """
+    if isinstance(df, WeatherSeries):
+        return df.en_hr()
+    if has_psychro_columns(df):
+        p_kpa = df.attrs.get(CHART_PRESSURE_ATTR)
+        if p_kpa is None:
+            p_kpa = _pressure_kpa(df)
+        return (
+            df["en_kjkg"].to_numpy(dtype=float),
+            df["hr_gkg"].to_numpy(dtype=float),
+            float(p_kpa),
+        )
+
+    p_kpa = _pressure_kpa(df)
+    en_kjkg, hr_gkg = en_hr_arrays(df["db_c"].to_numpy(dtype=float), df["rh_pct"].to_numpy(dtype=float), p_kpa)
+    return en_kjkg, hr_gkg, p_kpa
 
 
 def render_density_svg(
-    df: pd.DataFrame,
+    df: pd.DataFrame | WeatherSeries,
     out_svg: str | Path,
     title: str,
     *,
@@ -32,64 +71,467 @@ def render_density_svg(
     width: int = 900,
     height: int = 650,
     add_scatter: bool = False,
+    backend: str = "plotly",
+    scale: SharedScale | None = None,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
 ) -> Path:
     """
     df: columns = dt, db_c, rh_pct, p_kpa
+        （psychro_frame.add_psychro_columns() 済みなら hr_gkg / en_kjkg を再計算しない）
+        weather_series.WeatherSeries もそのまま渡せる
     out: SVG path
-    
+
     利用可能なカラースケール例:
     - 淡色系: "Blues", "Greens", "Greys", "Purples", "Reds", "BuGn", "BuPu", "GnBu", "OrRd", "PuBu", "PuRd", "RdPu", "YlGn", "YlOrBr", "YlOrRd"
     - 濃色系: "Turbo", "Viridis", "Plasma", "Inferno", "Magma", "Cividis"
     - 発散系: "RdBu", "RdGy", "PiYG", "PRGn", "PuOr", "BrBG", "RdYlBu", "RdYlGn", "Spectral"
-    """
-    if df.empty:
-        raise ValueError("df is empty (no data to plot).")
 
-    out_svg = Path(out_svg)
-    out_svg.parent.mkdir(parents=True, exist_ok=True)
+    backend:
+    - "plotly": PsychrometricChart + Kaleido でSVG出力し layer_svg で整理（既定）
+    - "native": numpy でビン分け・等値線抽出してSVGを直接書く（Kaleido/Chromium 不要、showscale は無視）
 
-    p_kpa = _pressure_kpa(df)
-    calc = PsychrometricCalculator(pressure=p_kpa)
+    scale: 複数のチャートで色を揃えるときの共有スケール（density.SharedScale。batch.scan_jobs() で作る）。
+        渡すと度数ではなく密度（度数 / ビン面積）で塗り、等値線レベルと色の範囲を scale に固定する
+
+    density:
+    - "hist": nbinsx × nbinsy のビンの度数を等値線にする（既定。plotly では histogram2dcontour）
+    - "kde" : ガウスカーネル密度推定（density.kde_grid()。細かい格子で FFT 畳み込み）の格子を等値線にする。
+              短い期間でも角ばらない。bandwidth は density.kde_bandwidth()（"scott" / "silverman" / 係数 / (bx, by)）。
+              nbinsx / nbinsy は使わない
+    """
+    _check_density(density)
+    if backend == "native":
+        if df.empty:
+            raise ValueError("df is empty (no data to plot).")
+        en_kjkg, hr_gkg, p_kpa = _en_hr_from_df(df)
+        return render_density_arrays(
+            en_kjkg, hr_gkg, out_svg, title, p_kpa=p_kpa, colorscale=colorscale,
+            nbinsx=nbinsx, nbinsy=nbinsy, ncontours=ncontours, opacity=opacity,
+            width=width, height=height, add_scatter=add_scatter, backend="native", scale=scale,
+            density=density, bandwidth=bandwidth,
+        )
+    _check_backend(backend)
 
-    db = df["db_c"].to_numpy(dtype=float)
-    rh = df["rh_pct"].to_numpy(dtype=float)
+    with span("render.build_figure", title=title, rows=len(df)):
+        chart = build_density_figure(
+            df,
+            title,
+            colorscale=colorscale,
+            nbinsx=nbinsx,
+            nbinsy=nbinsy,
+            ncontours=ncontours,
+            showscale=showscale,
+            opacity=opacity,
+            width=width,
+            height=height,
+            add_scatter=add_scatter,
+            scale=scale,
+            density=density,
+            bandwidth=bandwidth,
+        )
+    return export_svgs([chart], [out_svg])[0]
 
-    # 2変数(db,rh) -> 全変数を算出（hr[g/kg], en[kJ/kg]が得られる）
-    _, _, _, hr_gkg, en_kjkg = calc.get_all(db=db, rh=rh)
 
-    chart = PsychrometricChart(pressure=p_kpa)
+def render_density_arrays(
+    en_kjkg: np.ndarray,
+    hr_gkg: np.ndarray,
+    out_svg: str | Path,
+    title: str,
+    *,
+    p_kpa: float = 101.325,
+    colorscale: str = "Blues",
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    ncontours: int = 10,
+    showscale: bool = False,
+    opacity: float = 0.9,
+    width: int = 900,
+    height: int = 650,
+    add_scatter: bool = False,
+    backend: str = "plotly",
+    scale: SharedScale | None = None,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> Path:
+    """
+    計算済みの en[kJ/kg] / hr[g/kg] 配列から直接描画する。
+    p_kpa はチャート背景（飽和線・RH線）と skew 変換に使う気圧で、
+    en / hr を計算したときの気圧と揃えること。scale / density / bandwidth は render_density_svg と同じ。
+    """
+    _check_backend(backend)
+    _check_density(density)
+    if backend == "native":
+        return _render_native(
+            en_kjkg, hr_gkg, out_svg, title, p_kpa=p_kpa, colorscale=colorscale,
+            nbinsx=nbinsx, nbinsy=nbinsy, ncontours=ncontours, opacity=opacity,
+            width=width, height=height, add_scatter=add_scatter, scale=scale,
+            density=density, bandwidth=bandwidth,
+        )
 
-    # 密度（2D histogram contour）
-    chart.add_histogram_2d_contour(
-        en=en_kjkg,
-        hr=hr_gkg,
-        name="density", #固定
+    chart = build_density_figure_arrays(
+        en_kjkg,
+        hr_gkg,
+        title,
+        p_kpa=p_kpa,
+        colorscale=colorscale,
         nbinsx=nbinsx,
         nbinsy=nbinsy,
         ncontours=ncontours,
-        contours_coloring="fill",
+        showscale=showscale,
+        opacity=opacity,
+        width=width,
+        height=height,
+        add_scatter=add_scatter,
+        scale=scale,
+        density=density,
+        bandwidth=bandwidth,
+    )
+    return export_svgs([chart], [out_svg])[0]
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (choose from {BACKENDS})")
+
+
+def _check_density(density: str) -> None:
+    if density not in DENSITY_METHODS:
+        raise ValueError(f"Unknown density: {density!r} (choose from {DENSITY_METHODS})")
+
+
+def _xy_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    nbinsx: int,
+    nbinsy: int,
+    density: str,
+    bandwidth: str | float | tuple[float, float],
+) -> DensityGrid:
+    """チャート座標の点群 → 等値線を引く度数グリッド（density の方法で）。"""
+    if density == "kde":
+        with span("render.kde", rows=int(x.size)):
+            return kde_grid(x, y, bandwidth=bandwidth)
+    with span("render.histogram", rows=int(x.size)):
+        return histogram_grid(x, y, nbinsx=nbinsx, nbinsy=nbinsy)
+
+
+def _render_native(
+    en_kjkg: np.ndarray,
+    hr_gkg: np.ndarray,
+    out_svg: str | Path,
+    title: str,
+    *,
+    p_kpa: float,
+    colorscale: str,
+    nbinsx: int,
+    nbinsy: int,
+    ncontours: int,
+    opacity: float,
+    width: int,
+    height: int,
+    add_scatter: bool,
+    scale: SharedScale | None = None,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> Path:
+    en_kjkg = np.asarray(en_kjkg, dtype=float)
+    hr_gkg = np.asarray(hr_gkg, dtype=float)
+    if en_kjkg.size == 0:
+        raise ValueError("en/hr are empty (no data to plot).")
+    if en_kjkg.shape != hr_gkg.shape:
+        raise ValueError("en_kjkg and hr_gkg must have the same shape.")
+
+    x, y = skew_transform(en_kjkg, hr_gkg, p_kpa)
+    grid = _xy_grid(x, y, nbinsx=nbinsx, nbinsy=nbinsy, density=density, bandwidth=bandwidth)
+    if scale is not None:
+        grid = grid.density()
+    with span("render.native_svg", title=title) as sp:
+        svg = density_svg(
+            grid,
+            title,
+            p_kpa=p_kpa,
+            colorscale=colorscale,
+            ncontours=ncontours,
+            opacity=opacity,
+            width=width,
+            height=height,
+            points=(x, y) if add_scatter else None,
+            scale=scale,
+        )
+        sp.set(bytes=len(svg))
+    return _write_svg(out_svg, svg)
+
+
+def _write_svg(out_svg: str | Path, svg: bytes) -> Path:
+    out_svg = Path(out_svg)
+    out_svg.parent.mkdir(parents=True, exist_ok=True)
+    out_svg.write_bytes(svg)
+    return out_svg
+
+
+def render_density_grid(
+    grid: DensityGrid,
+    out_svg: str | Path,
+    title: str,
+    *,
+    p_kpa: float = 101.325,
+    colorscale: str = "Blues",
+    ncontours: int = 10,
+    showscale: bool = False,
+    opacity: float = 0.9,
+    width: int = 900,
+    height: int = 650,
+    backend: str = "plotly",
+    scale: SharedScale | None = None,
+) -> Path:
+    """
+    ビン分け済みの DensityGrid（hist_cube.HistCube.grid() など）から描画する。
+    点群を持たないので add_scatter は無い。p_kpa はグリッドを作ったときの気圧と揃えること。
+    scale を渡すと grid（度数）をビン面積で割った密度で、scale のレベルに揃えて塗る。
+    """
+    _check_backend(backend)
+    if not grid.total > 0:
+        raise ValueError("grid is empty (no data to plot).")
+    if backend == "native":
+        svg = density_svg(
+            grid.density() if scale is not None else grid,
+            title,
+            p_kpa=p_kpa,
+            colorscale=colorscale,
+            ncontours=ncontours,
+            opacity=opacity,
+            width=width,
+            height=height,
+            scale=scale,
+        )
+        return _write_svg(out_svg, svg)
+
+    chart = build_density_figure_grid(
+        grid,
+        title,
+        p_kpa=p_kpa,
         colorscale=colorscale,
+        ncontours=ncontours,
         showscale=showscale,
         opacity=opacity,
-        hoverinfo="skip",
-        showlegend=False,
+        width=width,
+        height=height,
+        scale=scale,
     )
+    return export_svgs([chart], [out_svg])[0]
 
-    # 任意：点群をうっすら重ねる（プレボではOFF推奨）
-    if add_scatter:
-        chart.add_points(
+
+def density_grid(
+    df: pd.DataFrame | WeatherSeries,
+    *,
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> DensityGrid:
+    """
+    render_density_svg(backend="native") が描くのと同じ度数グリッド（描画はしない）。
+    add_psychro_columns() 済みなら x_skew / y_skew 列をそのまま数える（en / hr を再計算しない）。
+    """
+    if isinstance(df, pd.DataFrame) and {"x_skew", "y_skew"}.issubset(df.columns):
+        x, y = df["x_skew"].to_numpy(dtype=float), df["y_skew"].to_numpy(dtype=float)
+    else:
+        en_kjkg, hr_gkg, p_kpa = _en_hr_from_df(df)
+        x, y = skew_transform(en_kjkg, hr_gkg, p_kpa)
+    _check_density(density)
+    return _xy_grid(x, y, nbinsx=nbinsx, nbinsy=nbinsy, density=density, bandwidth=bandwidth)
+
+
+def _contour_style(ncontours: int, scale: SharedScale | None) -> dict:
+    """等値線の本数・塗り方の trace 引数。scale があればレベルと色の範囲を固定する。"""
+    levels = scale.levels if scale is not None else np.empty(0)
+    if levels.size == 0:
+        return dict(ncontours=ncontours, contours_coloring="fill")
+    step = float(levels[1] - levels[0]) if levels.size > 1 else float(levels[0] - scale.zmin)
+    return dict(
+        autocontour=False,
+        contours=dict(coloring="fill", start=float(levels[0]), end=float(levels[-1]), size=step),
+        zauto=False,
+        zmin=scale.zmin,
+        zmax=scale.zmax,
+    )
+
+
+def _hist_bins(en_kjkg: np.ndarray, hr_gkg: np.ndarray, p_kpa: float, nbinsx: int, nbinsy: int) -> dict:
+    """
+    Histogram2dContour のビン指定。scan_jobs が共通スケールを決めた histogram_grid と同じ境界を
+    xbins / ybins で渡す（Plotly の自動ビンだと密度の値が揃えたレベルとずれる）。
+    """
+    xe, ye = histogram_edges(*skew_transform(en_kjkg, hr_gkg, p_kpa), nbinsx=nbinsx, nbinsy=nbinsy)
+    return dict(
+        xbins=dict(start=float(xe[0]), end=float(xe[-1]), size=float(xe[1] - xe[0])),
+        ybins=dict(start=float(ye[0]), end=float(ye[-1]), size=float(ye[1] - ye[0])),
+        histnorm="density",
+    )
+
+
+def build_density_figure(df: pd.DataFrame | WeatherSeries, title: str, **style) -> PsychrometricChart:
+    """render_density_svg の図だけを作る（出力はしない）。style は同じキーワード。"""
+    if df.empty:
+        raise ValueError("df is empty (no data to plot).")
+
+    en_kjkg, hr_gkg, p_kpa = _en_hr_from_df(df)
+    return build_density_figure_arrays(en_kjkg, hr_gkg, title, p_kpa=p_kpa, **style)
+
+
+def build_density_figure_arrays(
+    en_kjkg: np.ndarray,
+    hr_gkg: np.ndarray,
+    title: str,
+    *,
+    p_kpa: float = 101.325,
+    colorscale: str = "Blues",
+    nbinsx: int = 40,
+    nbinsy: int = 30,
+    ncontours: int = 10,
+    showscale: bool = False,
+    opacity: float = 0.9,
+    width: int = 900,
+    height: int = 650,
+    add_scatter: bool = False,
+    scale: SharedScale | None = None,
+    density: str = "hist",
+    bandwidth: str | float | tuple[float, float] = "scott",
+) -> PsychrometricChart:
+    _check_density(density)
+    en_kjkg = np.asarray(en_kjkg, dtype=float)
+    hr_gkg = np.asarray(hr_gkg, dtype=float)
+    if en_kjkg.size == 0:
+        raise ValueError("en/hr are empty (no data to plot).")
+    if en_kjkg.shape != hr_gkg.shape:
+        raise ValueError("en_kjkg and hr_gkg must have the same shape.")
+
+    chart = base_chart(p_kpa, width=width, height=height)
+
+    if density == "kde":
+        # 密度（KDE の格子を go.Contour で）
+        x, y = skew_transform(en_kjkg, hr_gkg, p_kpa)
+        grid = _xy_grid(x, y, nbinsx=nbinsx, nbinsy=nbinsy, density=density, bandwidth=bandwidth)
+        _add_grid_contour(
+            chart, grid, colorscale=colorscale, ncontours=ncontours, showscale=showscale, opacity=opacity, scale=scale
+        )
+    else:
+        # 密度（2D histogram contour）
+        chart.add_histogram_2d_contour(
             en=en_kjkg,
             hr=hr_gkg,
-            name="points",        # ★固定
-            mode="markers",
-            marker=dict(size=2, opacity=0.15),
+            name="density", #固定
+            **(
+                _hist_bins(en_kjkg, hr_gkg, p_kpa, nbinsx, nbinsy)
+                if scale is not None
+                else dict(nbinsx=nbinsx, nbinsy=nbinsy)
+            ),
+            **_contour_style(ncontours, scale),
+            colorscale=colorscale,
+            showscale=showscale,
+            opacity=opacity,
+            hoverinfo="skip",
             showlegend=False,
+        )
+        # 重心に置かれるトレース名ラベル（shimeri が追加する text trace）は text レイヤーへ
+        chart.data[-1].meta = {"layer": "text"}
+
+    # 任意：点群をうっすら重ねる（プレボではOFF推奨）
+    if add_scatter:
+        # chart.add_points は hover 用に全点で get_all を呼び直すので、座標だけ変換して直接足す
+        x_pts, y_pts = skew_transform(en_kjkg, hr_gkg, p_kpa)
+        chart.add_trace(
+            go.Scatter(
+                x=x_pts,
+                y=y_pts,
+                name="points",        # ★固定
+                mode="markers",
+                marker=dict(size=2, opacity=0.15),
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+
+    _finish_chart(chart, title)
+    return chart
+
+
+def build_density_figure_grid(
+    grid: DensityGrid,
+    title: str,
+    *,
+    p_kpa: float = 101.325,
+    colorscale: str = "Blues",
+    ncontours: int = 10,
+    showscale: bool = False,
+    opacity: float = 0.9,
+    width: int = 900,
+    height: int = 650,
+    scale: SharedScale | None = None,
+) -> PsychrometricChart:
+    """DensityGrid を go.Contour で描いた図を作る（build_density_figure_arrays と同じ体裁）。"""
+    chart = base_chart(p_kpa, width=width, height=height)
+    _add_grid_contour(
+        chart, grid, colorscale=colorscale, ncontours=ncontours, showscale=showscale, opacity=opacity, scale=scale
+    )
+    _finish_chart(chart, title)
+    return chart
+
+
+def _add_grid_contour(
+    chart: PsychrometricChart,
+    grid: DensityGrid,
+    *,
+    colorscale: str,
+    ncontours: int,
+    showscale: bool,
+    opacity: float,
+    scale: SharedScale | None,
+) -> None:
+    """DensityGrid の go.Contour と、重心のトレース名ラベルを足す。"""
+    xc, yc = grid.x_centers, grid.y_centers
+    chart.add_trace(
+        go.Contour(
+            x=xc,
+            y=yc,
+            z=grid.density().z if scale is not None else grid.z,
+            name="density",
+            **_contour_style(ncontours, scale),
+            colorscale=colorscale,
+            showscale=showscale,
+            opacity=opacity,
+            line_width=0.5,
             hoverinfo="skip",
+            showlegend=False,
+        )
+    )
+    # add_histogram_2d_contour と同様に重心へトレース名を置く
+    w = grid.z / grid.total
+    chart.add_trace(
+        go.Scatter(
+            x=[float((w.sum(axis=0) * xc).sum())],
+            y=[float((w.sum(axis=1) * yc).sum())],
+            mode="text",
+            text=["density"],
+            textfont=dict(size=8),
+            showlegend=False,
+            hoverinfo="skip",
+            meta={"layer": "text"},
         )
+    )
 
+
+def _finish_chart(chart: PsychrometricChart, title: str) -> None:
+    chart.update_layout(title=dict(text=title, x=0.01, xanchor="left"))
+    # SVG後処理でレイヤー分けできるよう trace に uid を付ける
+    tag_trace_layers(chart)
+
+
+def _apply_layout(chart: PsychrometricChart, width: int, height: int) -> None:
     # 体裁（プレボ向け：白背景・黒文字・枠線）
     chart.update_layout(
-        title=dict(text=title, x=0.01, xanchor="left"),
         width=width,
         height=height,
         paper_bgcolor="white",
@@ -100,14 +542,224 @@ def render_density_svg(
     chart.update_xaxes(showline=True, linecolor="black", mirror=True, ticks="inside", tickfont=dict(color="black"))
     chart.update_yaxes(showline=True, linecolor="black", mirror=True, ticks="inside", tickfont=dict(color="black"))
 
-    # SVG出力（plotly + kaleido が必要）
+
+@lru_cache(maxsize=BASE_CHART_CACHE_SIZE)
+def _base_chart_template(p_kpa: float, width: int, height: int) -> tuple[dict, float]:
+    """背景（飽和線・RH/DB/EN線・ラベル）と体裁だけの図を dict にして持っておく。"""
+    chart = PsychrometricChart(pressure=p_kpa)
+    missing = [a for a in ("_pressure", "_pc", "_slope") if not hasattr(chart, a)]
+    if missing:
+        # base_chart の組み立て方が前提にしている内部属性が無い（shimeri の版が違う）
+        raise RuntimeError(f"unsupported shimeri version: PsychrometricChart has no {', '.join(missing)}")
+    _apply_layout(chart, width, height)
+    return chart.to_dict(), float(chart._slope)
+
+
+@lru_cache(maxsize=BASE_CHART_CACHE_SIZE)
+def _calculator(p_kpa: float) -> PsychrometricCalculator:
+    return PsychrometricCalculator(pressure=p_kpa)
+
+
+def base_chart(p_kpa: float = 101.325, *, width: int = 900, height: int = 650) -> PsychrometricChart:
+    """
+    体裁済みの背景チャート（データ trace なし）を返す。
+
+    PsychrometricChart(pressure=...) は背景の補助線を毎回作り直すので、(気圧, 幅, 高さ) ごとに1回だけ作って
+    dict で保持し、以降はその複製（検証なしで組み立てるので数 ms）を返す。返した図は呼び出し側で自由に変更してよい。
+    __init__ を通さずに組み立てるため shimeri 0.2.0 の内部属性に依存する（pyproject で版を固定している）。
+    """
+    p_kpa = float(p_kpa)
+    fig_dict, slope = _base_chart_template(p_kpa, int(width), int(height))
+
+    chart = PsychrometricChart.__new__(PsychrometricChart)
+    go.Figure.__init__(chart, copy.deepcopy(fig_dict), _validate=False)
+    chart._validate = True  # 以降に追加する trace は通常どおり検証する
+    chart._pressure = p_kpa
+    chart._pc = _calculator(p_kpa)
+    chart._slope = slope
+    return chart
+
+
+class ExportSession:
+    """
+    Kaleido（Chromium）を1回だけ起動し、複数チャートのSVG出力で使い回す。
+
+        with ExportSession():
+            render_density_svg(...)
+            render_density_svg(...)
+
+    - with ブロック内の export_svgs / render_density_* は起動済みの Kaleido を共有する
+    - 起動は最初の出力時まで遅延する（プール並列で親プロセスが描画しない場合は起動しない）
+    - 入れ子にした場合は外側のセッションがそのまま使われる
+    - kaleido v1 未満（Kaleido クラスが無い）では plotly.io.to_image にそのまま任せる
+    """
+
+    def __init__(self, *, n_tabs: int = 1, timeout: float | None = 90, **kaleido_kwargs):
+        self._kaleido_kwargs = dict(kaleido_kwargs, n=n_tabs, timeout=timeout)
+        self._owner = False
+        self._kaleido = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    # -- lifecycle --
+
+    def open(self) -> "ExportSession":
+        global _ACTIVE_SESSION
+        if _ACTIVE_SESSION is None:
+            _ACTIVE_SESSION = self
+            self._owner = True
+        return self
+
+    def close(self) -> None:
+        global _ACTIVE_SESSION
+        if not self._owner:
+            return
+        try:
+            if self._kaleido is not None:
+                self._call(self._kaleido.__aexit__(None, None, None))
+        finally:
+            self._kaleido = None
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                if self._thread is not None:
+                    self._thread.join()
+                self._loop.close()
+            self._loop = None
+            self._thread = None
+            _ACTIVE_SESSION = None
+            self._owner = False
+
+    def __enter__(self) -> "ExportSession":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _call(self, coro):
+        # 専用スレッドのイベントループで実行し、例外はそのまま呼び出し側へ返す
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _ensure_started(self) -> bool:
+        """Kaleido v1 を起動する（済みなら何もしない）。使えない環境では False。"""
+        if self._kaleido is not None:
+            return True
+        kaleido = _kaleido_module()
+        if kaleido is None or not hasattr(kaleido, "Kaleido"):
+            return False
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="kaleido-session", daemon=True)
+        self._thread.start()
+
+        async def _open():
+            k = kaleido.Kaleido(**self._kaleido_kwargs)
+            await k.__aenter__()
+            return k
+
+        try:
+            self._kaleido = self._call(_open())
+        except BaseException:
+            # 起動失敗（Chrome が無い等）：ループを畳んで例外を返す
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+            self._thread = None
+            raise
+        return True
+
+    # -- export --
+
+    def to_svg_many(self, figs: Sequence) -> list[bytes | Exception]:
+        """図ごとのSVGバイト列（失敗した図は例外オブジェクト）を入力順で返す。"""
+        figs = list(figs)
+        if not self._ensure_started():
+            return [_to_svg_oneshot(f) for f in figs]
+
+        k = self._kaleido
+
+        async def _calc_all():
+            return await asyncio.gather(
+                *[k.calc_fig(f.to_dict(), opts=_svg_opts(f)) for f in figs],
+                return_exceptions=True,
+            )
+
+        return list(self._call(_calc_all()))
+
+
+_ACTIVE_SESSION: ExportSession | None = None
+
+
+def _kaleido_module():
+    try:
+        import kaleido
+    except Exception:
+        return None
+    return kaleido
+
+
+def _svg_opts(fig) -> dict:
+    return dict(format="svg", width=fig.layout.width, height=fig.layout.height, scale=1)
+
+
+def _to_svg_oneshot(fig) -> bytes | Exception:
     try:
-        chart.write_image(str(out_svg), format="svg")
+        return pio.to_image(fig, format="svg")
     except Exception as e:
-        raise RuntimeError(
-            "SVG export failed. Install kaleido (e.g., `pip install -U kaleido`) and retry."
-        ) from e
-    
-    postprocess_svg(out_svg)
+        return e
 
-    return out_svg
+
+def export_svgs(
+    figs: Sequence,
+    out_svgs: Sequence[str | Path],
+    *,
+    return_exceptions: bool = False,
+) -> list:
+    """
+    複数の図をまとめてSVG出力し、layer_svg でレイヤー分けして書き出し、出力パスを返す。
+    ExportSession 内なら起動済みの Kaleido に全図を1回で渡す。
+
+    return_exceptions=False: 1枚でも失敗したら RuntimeError（成功した図は書き出し済み）
+    return_exceptions=True : 失敗した図の位置には例外オブジェクトを入れて返す
+    """
+    figs = list(figs)
+    paths = [Path(p) for p in out_svgs]
+    if len(figs) != len(paths):
+        raise ValueError("figs and out_svgs must have the same length.")
+    if not figs:
+        return []
+
+    # SVG出力（plotly + kaleido が必要）
+    with span("render.kaleido", figures=len(figs), session=_ACTIVE_SESSION is not None) as sp:
+        try:
+            if _ACTIVE_SESSION is not None:
+                images = _ACTIVE_SESSION.to_svg_many(figs)
+            else:
+                images = [_to_svg_oneshot(f) for f in figs]
+        except Exception as e:
+            images = [e] * len(figs)
+        sp.set(bytes=sum(len(i) for i in images if not isinstance(i, Exception)))
+
+    out: list = []
+    for img, p in zip(images, paths):
+        if isinstance(img, Exception):
+            err = RuntimeError(
+                "SVG export failed. Install kaleido (e.g., `pip install -U kaleido`) and retry."
+            )
+            err.__cause__ = img
+            out.append(err)
+            continue
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            # レイヤー分けはメモリ上で済ませて1回だけ書く
+            p.write_bytes(layer_svg(img))
+        except Exception as e:
+            out.append(e)
+            continue
+        out.append(p)
+
+    if not return_exceptions:
+        for r in out:
+            if isinstance(r, Exception):
+                raise r
+    return out
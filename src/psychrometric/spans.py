@@ -0,0 +1,234 @@
+# src/psychrimetric/spans.py
+"""
+処理段階ごとの計時（オプトイン）
+
+    with span("render.export", n=len(figs)) as sp:
+        ...
+        sp.set(bytes=len(svg))
+
+- 環境変数 PSYCHRO_TRACE=<ディレクトリ> を設定するか enable(<ディレクトリ>) を呼ぶと有効になる
+- 記録はプロセスごとに <ディレクトリ>/trace-<pid>.jsonl へ1行1イベント（Chrome trace の "X" イベント形式）で追記する。
+  そのまま構造化ログとして読める
+- enable() は環境変数も設定するので、あとから起動したワーカープロセスも同じディレクトリへ書く
+- merge_trace() で全プロセス分を1つの Chrome / Perfetto 用 JSON（chrome://tracing, ui.perfetto.dev）にまとめる
+- 無効のときは span() が共有の何もしないオブジェクトを返すだけ（フラグ1つの判定）
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from multiprocessing import util as _mp_util
+from pathlib import Path
+from typing import Any, Iterable
+
+ENV_VAR = "PSYCHRO_TRACE"
+# この件数たまったらファイルへ書き出す（プロセス終了時にも書き出す）
+FLUSH_EVERY = 256
+
+_lock = threading.Lock()
+_enabled = False
+_dir: Path | None = None
+_buffer: list[str] = []
+_pid = 0
+# プロセス内の単調時計 → 壁時計（μs）。プロセス間で ts を揃えるため
+_t0_ns = 0
+_wall0_us = 0
+# 終了時の書き出しを登録済みのプロセス
+_exit_pid = 0
+
+
+class _NoSpan:
+    """無効時の span（何もしない）。"""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def set(self, **meta: Any) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """有効時の span。終了時に所要時間と meta（args）を1イベントとして記録する。"""
+    __slots__ = ("name", "cat", "meta", "_start")
+
+    def __init__(self, name: str, cat: str, meta: dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.meta = meta
+        self._start = 0
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.meta["error"] = exc_type.__name__
+        _record(self.name, self.cat, self._start, end, self.meta)
+
+    def set(self, **meta: Any) -> None:
+        """終了前にメタデータ（行数・出力バイト数など）を追加する。"""
+        self.meta.update(meta)
+
+
+def span(name: str, /, **meta: Any) -> Span | _NoSpan:
+    """
+    計時区間。name は "<モジュール>.<段階>"（例: "epw_io.read_csv"）。cat は name の先頭部分。
+    meta はそのままイベントの args になる（JSON にできる値にすること）。
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, name.split(".", 1)[0], meta)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_dir: str | Path, *, fresh: bool = False) -> Path:
+    """
+    記録を有効にする（環境変数 PSYCHRO_TRACE も設定し、子プロセスへ引き継ぐ）。
+    fresh=True なら trace_dir にある前回の trace-*.jsonl を消してから始める。
+    """
+    global _enabled, _dir, _pid, _t0_ns, _wall0_us
+    trace_dir = Path(trace_dir)
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    if fresh:
+        for p in trace_dir.glob("trace-*.jsonl"):
+            p.unlink(missing_ok=True)
+    os.environ[ENV_VAR] = str(trace_dir)
+    with _lock:
+        _dir = trace_dir
+        _pid = os.getpid()
+        _t0_ns = time.perf_counter_ns()
+        _wall0_us = time.time_ns() // 1000
+        _enabled = True
+    return trace_dir
+
+
+def _register_exit_flush() -> None:
+    # multiprocessing のワーカーは atexit を通らずに終わるので、その終了処理にも登録する。
+    # ワーカーの起動時に Finalize の登録は消されるので、プロセスで最初のイベントを記録したときに登録する
+    global _exit_pid
+    _exit_pid = os.getpid()
+    _mp_util.Finalize(None, flush, exitpriority=0)
+
+
+def disable() -> None:
+    """記録を止め、たまっている分を書き出す（環境変数も消す）。"""
+    global _enabled
+    flush()
+    with _lock:
+        _enabled = False
+    os.environ.pop(ENV_VAR, None)
+
+
+def _record(name: str, cat: str, start_ns: int, end_ns: int, meta: dict[str, Any]) -> None:
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": _wall0_us + (start_ns - _t0_ns) // 1000,
+        "dur": (end_ns - start_ns) // 1000,
+        "pid": _pid,
+        "tid": threading.get_ident(),
+        "args": meta,
+    }
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    with _lock:
+        _buffer.append(line)
+        full = len(_buffer) >= FLUSH_EVERY
+    if _exit_pid != _pid:
+        _register_exit_flush()
+    if full:
+        flush()
+
+
+def _reset_after_fork() -> None:
+    # fork で引き継いだ親のバッファは捨て、子プロセス用に時計とロックを作り直す
+    global _lock, _pid, _t0_ns, _wall0_us
+    _lock = threading.Lock()
+    _buffer.clear()
+    _pid = os.getpid()
+    _t0_ns = time.perf_counter_ns()
+    _wall0_us = time.time_ns() // 1000
+
+
+def flush() -> None:
+    """たまっているイベントを trace-<pid>.jsonl へ追記する。"""
+    with _lock:
+        if not _buffer or _dir is None:
+            return
+        lines, _buffer[:] = list(_buffer), []
+        path = _dir / f"trace-{_pid}.jsonl"
+    try:
+        with path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError:
+        pass  # 計時のためにパイプラインを止めない
+
+
+def read_events(trace_dir: str | Path) -> list[dict[str, Any]]:
+    """trace_dir の trace-*.jsonl を全部読み、ts 順に並べて返す（壊れた行は飛ばす）。"""
+    events: list[dict[str, Any]] = []
+    for p in sorted(Path(trace_dir).glob("trace-*.jsonl")):
+        for line in p.read_text(encoding="utf-8").splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    events.sort(key=lambda e: e.get("ts", 0))
+    return events
+
+
+def merge_trace(trace_dir: str | Path, out_json: str | Path | None = None) -> Path:
+    """
+    全プロセスの記録を Chrome trace 形式（{"traceEvents": [...]}）の1ファイルにまとめる。
+    out_json を省略すると trace_dir/trace.json。
+    """
+    flush()
+    trace_dir = Path(trace_dir)
+    events = read_events(trace_dir)
+    main_pid = os.getpid()
+    names = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "main" if pid == main_pid else f"worker {pid}"}}
+        for pid in sorted({e["pid"] for e in events})
+    ]
+    out = Path(out_json) if out_json is not None else trace_dir / "trace.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"traceEvents": names + events, "displayTimeUnit": "ms"}, ensure_ascii=False), encoding="utf-8")
+    return out
+
+
+def summarize(events: Iterable[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """name ごとの回数・合計・最大時間 [s]（どの段階に時間がかかったかの一覧用）。"""
+    out: dict[str, dict[str, float]] = {}
+    for e in events:
+        if e.get("ph") != "X":
+            continue
+        s = out.setdefault(e["name"], {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        d = e["dur"] / 1e6
+        s["count"] += 1
+        s["total_s"] += d
+        s["max_s"] = max(s["max_s"], d)
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]["total_s"]))
+
+
+atexit.register(flush)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+# 環境変数で有効化（ワーカープロセスは import 時にここで有効になる）
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
@@ -1,134 +1,395 @@
 # src/psychrimetric/svg_post.py
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
 import re
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+from .spans import span
+
 SVG_NS = "http://www.w3.org/2000/svg"
 ET.register_namespace("", SVG_NS)
 
+# トップレベルのレイヤー（下→上）
+LAYERS = ("chartborder", "zone", "density", "points", "text")
+
+# trace の uid に付ける接頭辞。Plotly は trace group の class に "trace<uid>" を入れるので、
+# uid="layer-density-0" なら class に "tracelayer-density-0" が現れる
+_UID_PREFIX = "layer-"
+_CLASS_PREFIX = "trace" + _UID_PREFIX
+
+# trace 名 → レイヤー（meta={"layer": ...} が無い trace 用）
+_NAME_LAYERS = {"density": "density", "points": "points", "zone": "zone"}
+
+# trace 以外で外へ持ち出す group（class のトークン）→ レイヤー。
+# 目盛ラベルは native_svg と同じく text に置く（目盛線は path なので chartborder に残る）
+_GROUP_LAYERS = {"xtick": "text", "ytick": "text"}
+
+# ルート直下の要素（class の先頭トークン）→ レイヤー
+_ROOT_LAYERS = {"cartesianlayer": "chartborder", "infolayer": "text"}
+
+# trace group の外へ持ち出すときに引き継ぐ属性
+_INHERITED_ATTRS = ("transform", "clip-path")
+
+
 def _q(tag: str) -> str:
     return f"{{{SVG_NS}}}{tag}"
 
-def _find_trace_name(g_trace: ET.Element) -> str | None:
+
+def tag_trace_layers(fig) -> None:
     """
-    Plotly SVGでは trace group 内に <title> が入り、そこに trace名が含まれることが多い。
-    それ以外に aria-label / data-name 等が付く場合もあるので拾えるだけ拾う。
+    図の各 trace に uid="layer-<レイヤー>-<番号>" を付ける（図を作るときに1回呼ぶ）。
+    レイヤーは trace.meta={"layer": ...} があればそれ、なければ name（density / points / zone）、
+    文字だけの trace（mode="text"。チャート背景の RH / EN ラベルなど）は text で決める。
+    どれにも当たらない trace（チャート背景の補助線など）は触らない（chartborder に残る）。
     """
-    # 1) <title> text
-    for t in g_trace.findall(".//" + _q("title")):
-        if t.text:
-            txt = t.text.strip()
-            # titleの中に name がそのまま入る/含まれることが多い
-            # 例: "density", "points" を含むかチェック
-            for key in ("density", "points", "zone"):
-                if key in txt:
-                    return key
-
-    # 2) attributes (まれ)
-    for attr in ("data-name", "aria-label", "id"):
-        v = g_trace.attrib.get(attr)
-        if v:
-            v2 = v.lower()
-            for key in ("density", "points", "zone"):
-                if key in v2:
-                    return key
+    for i, tr in enumerate(fig.data):
+        meta = tr.meta if isinstance(tr.meta, dict) else {}
+        layer = meta.get("layer") or _NAME_LAYERS.get(tr.name or "")
+        if layer is None and getattr(tr, "mode", None) == "text":
+            layer = "text"
+        if layer in LAYERS:
+            tr.uid = f"{_UID_PREFIX}{layer}-{i}"
+
 
+def _trace_layer(elem: ET.Element) -> str | None:
+    """trace group・目盛ラベルの group ならそのレイヤー名（class 属性だけで判定）。"""
+    cls = elem.attrib.get("class")
+    if not cls:
+        return None
+    for tok in cls.split():
+        if tok.startswith(_CLASS_PREFIX):
+            layer = tok[len(_CLASS_PREFIX):].split("-", 1)[0]
+            return layer if layer in LAYERS else None
+        if tok == "contour":
+            # contour 系 trace の group には uid が付かない。このパッケージでは密度にしか使わない
+            return "density"
+        if tok in _GROUP_LAYERS:
+            return _GROUP_LAYERS[tok]
     return None
 
 
-def postprocess_svg(svg_path: str | Path) -> Path:
+def _root_layer(elem: ET.Element) -> str:
+    if elem.tag == _q("g") and elem.attrib.get("id") in LAYERS:
+        # layer_svg / native_svg が作ったレイヤー自身
+        return elem.attrib["id"]
+    cls = elem.attrib.get("class", "").lower()
+    tok = cls.split()[0] if cls else ""
+    if tok in _ROOT_LAYERS:
+        return _ROOT_LAYERS[tok]
+    _id = elem.attrib.get("id", "").lower()
+    # Plotlyでよくあるテキスト層
+    if "gtitle" in cls or "annotation" in cls or "title" in _id or "annotation" in _id:
+        return "text"
+    # 枠・軸・背景・クリップ・その他（不明なものは見落とさないよう chartborder）
+    return "chartborder"
+
+
+def layer_svg(svg: bytes) -> bytes:
     """
-    Plotly出力SVGを読み、トップレベルに以下の順でグループを作って要素を移動する。
+    Plotly出力SVG（バイト列）を、トップレベルに以下の順でグループを作って並べ替えたバイト列にする。
       - chartborder
       - zone
       - density
       - points
       - text
+
+    trace は tag_trace_layers() で付けた uid（class "tracelayer-..."）で、目盛ラベル（g.xtick / g.ytick）は text へ振り分け、
+    親の transform / clip-path を引き継いだ <g> で包んでレイヤーへ移す。
+    残りのルート直下の要素は class / id で振り分ける。
+    すでにレイヤー分け済みのSVG（layer_svg の出力や native_svg）はそのまま返す。
     """
-    svg_path = Path(svg_path)
+    with span("svg_post.layer_svg", bytes_in=len(svg)) as sp:
+        out = _layer_svg(svg)
+        sp.set(bytes_out=len(out))
+    return out
 
-    tree = ET.parse(svg_path)
-    root = tree.getroot()
 
-    # ルート直下の子を整理（後で順序を作り直す）
-    children = list(root)
+def _is_layered(root: ET.Element) -> bool:
+    """ルート直下の <g> が LAYERS の id を持つグループだけで、順序も LAYERS どおりか。"""
+    ids = [c.attrib.get("id") for c in root if c.tag == _q("g")]
+    return bool(ids) and ids == [k for k in LAYERS if k in ids]
 
-    # 新しいレイヤーを作成
-    layers = {
-        "chartborder": ET.Element(_q("g"), {"id": "chartborder"}),
-        "zone":        ET.Element(_q("g"), {"id": "zone"}),
-        "density":     ET.Element(_q("g"), {"id": "density"}),
-        "points":      ET.Element(_q("g"), {"id": "points"}),
-        "text":        ET.Element(_q("g"), {"id": "text"}),
-    }
 
-    # 既存の子を一旦全部rootから外す（順序再構築のため）
+def _layer_svg(svg: bytes) -> bytes:
+    root = ET.fromstring(svg)
+    if _is_layered(root):
+        return svg
+
+    layers = {k: ET.Element(_q("g"), {"id": k}) for k in LAYERS}
+    g_tag = _q("g")
+
+    # trace group を探して外す（親の transform / clip-path を記録）
+    moved: list[tuple[str, ET.Element, tuple[tuple[tuple[str, str], ...], ...]]] = []
+
+    def _walk(parent: ET.Element, inherited: tuple) -> None:
+        for child in list(parent):
+            if child.tag != g_tag:
+                continue
+            layer = _trace_layer(child)
+            if layer is not None:
+                parent.remove(child)
+                moved.append((layer, child, inherited))
+                continue
+            attrs = tuple((k, child.attrib[k]) for k in _INHERITED_ATTRS if k in child.attrib)
+            _walk(child, inherited + (attrs,) if attrs else inherited)
+
+    children = list(root)
     for c in children:
         root.remove(c)
-
-    def is_text_layer(elem: ET.Element) -> bool:
-        cls = elem.attrib.get("class", "").lower()
-        _id = elem.attrib.get("id", "").lower()
-        # Plotlyでよくあるテキスト層
-        if "gtitle" in cls or "annotation" in cls:
-            return True
-        if "title" in _id or "annotation" in _id:
-            return True
-        # 文字要素を含むなら text 扱い（乱暴だがプレボ向け）
-        return elem.find(".//" + _q("text")) is not None
-
-    def is_border_like(elem: ET.Element) -> bool:
-        cls = elem.attrib.get("class", "").lower()
-        _id = elem.attrib.get("id", "").lower()
-        # 軸・枠・クリップ系
-        keys = ("xaxislayer", "yaxislayer", "zerolinelayer", "gridlayer", "layer-above", "clips")
-        if any(k in cls for k in keys):
-            return True
-        if any(k in _id for k in keys):
-            return True
-        # 背景 rect を含む場合も border側へ
-        return elem.find(".//" + _q("rect")) is not None and "trace" not in cls
-
-    # 子要素を分類して追加
-    for elem in children:
-        cls = elem.attrib.get("class", "").lower()
-
-        # trace（プロットデータ）
-        if "trace" in cls:
-            name = _find_trace_name(elem)
-            if name == "density":
-                layers["density"].append(elem)
-            elif name == "points":
-                layers["points"].append(elem)
-            elif name == "zone":
-                layers["zone"].append(elem)
-            else:
-                # trace名が拾えない場合は zone に寄せる（安全）
-                layers["zone"].append(elem)
+        layer = _root_layer(c)
+        if c.tag == g_tag and c.attrib.get("id") == layer:
+            # 既存のレイヤーは中身ごと同じレイヤーへまとめる（入れ子の同じ id を作らない）
+            layers[layer].attrib.update(c.attrib)
+            layers[layer].extend(list(c))
             continue
+        if c.tag == g_tag:
+            _walk(c, ())
+        layers[layer].append(c)
+
+    # 同じ親を持つ連続した trace は1つのラッパーにまとめる
+    prev: tuple[str, tuple] | None = None
+    inner: ET.Element | None = None
+    for layer, elem, inherited in moved:
+        if prev != (layer, inherited) or inner is None:
+            inner = layers[layer]
+            for attrs in inherited:
+                inner = ET.SubElement(inner, g_tag, dict(attrs))
+            prev = (layer, inherited)
+        inner.append(elem)
+
+    for k in LAYERS:
+        root.append(layers[k])
+
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def postprocess_svg(svg_path: str | Path) -> Path:
+    """
+    SVGファイルを layer_svg() で並べ替えて上書きする。
+    （export_svgs は出力前のバイト列に layer_svg をかけるので、これは既存ファイル用）
+    """
+    svg_path = Path(svg_path)
+    svg_path.write_bytes(layer_svg(svg_path.read_bytes()))
+    return svg_path
 
-        # テキスト
-        if is_text_layer(elem):
-            layers["text"].append(elem)
+
+# ---------------------------------------------------------------------------
+# サイズ最適化（座標の丸め・折れ線の間引き・style の共通クラス化）
+# ---------------------------------------------------------------------------
+
+_NUM_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_TOKEN_RE = re.compile(r"[A-Za-z]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# 丸める数値属性（d / transform は別扱い）
+_NUMERIC_ATTRS = ("x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "width", "height", "dx", "dy")
+
+
+@dataclass(frozen=True)
+class SvgOptimize:
+    """
+    optimize_svg の設定。
+
+    precision    : 座標の小数桁数（px 単位。1 なら 0.1px）
+    tolerance    : 折れ線（M/L/H/V だけのパス）を Douglas–Peucker で間引くときの許容誤差 [px]。0 なら間引かない
+    dedupe_styles: 同じ inline style が2回以上出てくるものを <style> の共通クラスへまとめる
+    """
+    precision: int = 2
+    tolerance: float = 0.25
+    dedupe_styles: bool = True
+
+
+@dataclass(frozen=True)
+class SvgSizeReport:
+    path: Path
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+
+def _fmt(v: float, precision: int) -> str:
+    s = f"{v:.{precision}f}"
+    if "." in s:
+        s = s.rstrip("0").rstrip(".")
+    return "0" if s in ("-0", "") else s
+
+
+def _round_numbers(text: str, precision: int) -> str:
+    return _NUM_RE.sub(lambda m: _fmt(float(m.group()), precision), text)
+
+
+def _douglas_peucker(pts: np.ndarray, tol: float) -> np.ndarray:
+    """折れ線 pts (n, 2) を許容誤差 tol で間引く（両端は残す）。"""
+    n = len(pts)
+    if n < 3:
+        return pts
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
             continue
+        a, b = pts[i0], pts[i1]
+        seg = pts[i0 + 1:i1]
+        ab = b - a
+        L = float(np.hypot(ab[0], ab[1]))
+        if L == 0.0:
+            d = np.hypot(seg[:, 0] - a[0], seg[:, 1] - a[1])
+        else:
+            d = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / L
+        k = int(np.argmax(d))
+        if d[k] > tol:
+            k += i0 + 1
+            keep[k] = True
+            stack.append((i0, k))
+            stack.append((k, i1))
+    return pts[keep]
+
 
-        # 枠・軸・背景
-        if is_border_like(elem):
-            layers["chartborder"].append(elem)
+def _simplify_path(d: str, tol: float, precision: int) -> str | None:
+    """
+    絶対座標の M/L/H/V/Z だけでできたパスを間引いて丸める。それ以外のコマンド（曲線・円弧・相対座標）を含むなら None。
+    """
+    tokens = _PATH_TOKEN_RE.findall(d)
+    subpaths: list[tuple[list[tuple[float, float]], bool]] = []
+    cur: list[tuple[float, float]] = []
+    cmd = ""
+    x = y = 0.0
+    start: tuple[float, float] | None = None  # 直近の M の点（Z の後の現在点）
+    i = 0
+    while i < len(tokens):
+        t = tokens[i]
+        if t.isalpha():
+            if t not in "MLHVZ":
+                return None
+            cmd = t
+            i += 1
+            if t == "Z":
+                if cur:
+                    subpaths.append((cur, True))
+                if start is not None:
+                    x, y = start
+                cur = []
             continue
+        try:
+            if cmd == "M":
+                x, y = float(tokens[i]), float(tokens[i + 1])
+                i += 2
+                if cur:
+                    subpaths.append((cur, False))
+                cur = []
+                start = (x, y)
+                cmd = "L"  # M の後に続く座標は L
+            elif cmd in ("L", "H", "V"):
+                if start is None:
+                    return None  # M で始まらないパス
+                if not cur:
+                    # Z の直後に M なしで描くと、閉じたサブパスの始点から新しいサブパスが始まる
+                    cur.append((x, y))
+                if cmd == "L":
+                    x, y = float(tokens[i]), float(tokens[i + 1])
+                    i += 2
+                elif cmd == "H":
+                    x = float(t)
+                    i += 1
+                else:
+                    y = float(t)
+                    i += 1
+            else:
+                return None
+        except (IndexError, ValueError):
+            return None
+        cur.append((x, y))
+    if cur:
+        subpaths.append((cur, False))
+
+    parts: list[str] = []
+    for pts_l, closed in subpaths:
+        pts = np.asarray(pts_l, dtype=float)
+        if tol > 0 and len(pts) > 2:
+            if closed:
+                ring = _douglas_peucker(np.vstack([pts, pts[:1]]), tol)[:-1]
+                pts = ring if len(ring) >= 3 else pts
+            else:
+                pts = _douglas_peucker(pts, tol)
+        coords = [f"{_fmt(a, precision)},{_fmt(b, precision)}" for a, b in pts]
+        # 丸めで重なった連続点は落とす
+        coords = [c for j, c in enumerate(coords) if j == 0 or c != coords[j - 1]]
+        parts.append("M" + "L".join(coords) + ("Z" if closed else ""))
+    return "".join(parts)
 
-        # それ以外（不明）は chartborder に入れて見落としを防ぐ
-        layers["chartborder"].append(elem)
 
-    # ルートへ追加（順序：下→上）
-    root.append(layers["chartborder"])
-    root.append(layers["zone"])
-    root.append(layers["density"])
-    root.append(layers["points"])
-    root.append(layers["text"])
+def optimize_svg(svg: bytes, options: SvgOptimize | None = None) -> bytes:
+    """
+    SVG（バイト列）を小さくする。トップレベルのレイヤー構成（chartborder / zone / density / points / text）は変えない。
 
-    # 保存（上書き）
-    tree.write(svg_path, encoding="utf-8", xml_declaration=True)
-    return svg_path
+    - path の d / transform / 座標系の属性を options.precision 桁に丸める
+    - M/L/H/V だけの折れ線（補助線・等値線・ゾーン）は Douglas–Peucker で間引く
+      （Plotly の等値線は平滑化された曲線 C なので丸めだけ）
+    - 2回以上出てくる inline style を <style> の共通クラス（.s0, .s1, ...）へ移す
+    """
+    with span("svg_post.optimize_svg", bytes_in=len(svg)) as sp:
+        out = _optimize_svg(svg, options)
+        sp.set(bytes_out=len(out))
+    return out
+
+
+def _optimize_svg(svg: bytes, options: SvgOptimize | None) -> bytes:
+    opt = options or SvgOptimize()
+    root = ET.fromstring(svg)
+    p = int(opt.precision)
+
+    styles: dict[str, int] = {}
+    for el in root.iter():
+        a = el.attrib
+        d = a.get("d")
+        if d:
+            simple = _simplify_path(d, float(opt.tolerance), p) if opt.tolerance > 0 else None
+            a["d"] = simple if simple is not None else _round_numbers(d, p)
+        tr = a.get("transform")
+        if tr:
+            a["transform"] = _round_numbers(tr, p)
+        for k in _NUMERIC_ATTRS:
+            v = a.get(k)
+            if v and _NUM_RE.fullmatch(v):
+                a[k] = _fmt(float(v), p)
+        st = a.get("style")
+        if st:
+            styles[st] = styles.get(st, 0) + 1
+
+    if opt.dedupe_styles:
+        shared = {st: f"s{i}" for i, st in enumerate(s for s, n in styles.items() if n >= 2)}
+        if shared:
+            for el in root.iter():
+                st = el.attrib.get("style")
+                name = shared.get(st) if st else None
+                if name is None:
+                    continue
+                del el.attrib["style"]
+                cls = el.attrib.get("class")
+                el.attrib["class"] = f"{cls} {name}" if cls else name
+            css = "".join(f".{name}{{{st.strip()}}}" for st, name in shared.items())
+            style_el = ET.Element(_q("style"))
+            style_el.text = css
+            defs = root.find(_q("defs"))
+            if defs is None:
+                defs = ET.Element(_q("defs"))
+                root.insert(0, defs)
+            defs.insert(0, style_el)
+
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def optimize_svg_file(svg_path: str | Path, options: SvgOptimize | None = None) -> SvgSizeReport:
+    """SVGファイルを optimize_svg で上書きし、前後のバイト数を返す。"""
+    svg_path = Path(svg_path)
+    before = svg_path.read_bytes()
+    after = optimize_svg(before, options)
+    svg_path.write_bytes(after)
+    return SvgSizeReport(svg_path, len(before), len(after))
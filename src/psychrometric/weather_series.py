@@ -0,0 +1,257 @@
+# src/psychrimetric/weather_series.py
+"""
+読み込んだ気象データのコンパクトな列形式（オプトイン）
+
+    ws, meta = WeatherSeries.from_epw("tokyo.epw")
+    ws = ws.with_psychro()
+    for name, part in split_by_seasons(ws, seasons).items():
+        render_density_svg(part, f"{name}.svg", name, backend="native")
+
+load_epw() の DataFrame（dt / year / month が 8 バイト、値が float64）の代わりに、
+狭い型の配列だけを持つ。多数の地点を並べて比べるときに1地点あたりのメモリを減らすため。
+
+- 年月 int16（year*12 + month-1）/ 月初からの経過分 uint16 / db・rh・気圧 float32
+  （1行 16 バイト。DataFrame は 48 バイト。空気線図の列を足すと 24 バイト対 80 バイト）
+- dt・year・month・hour は持たず、必要になったときに年月と経過分から作る
+- 気圧は Pa のまま float32 で持つ（EPW の気圧は Pa の整数なので p_kpa は DataFrame 版と同じ値になる）
+- db_c は float32 に丸めるので、float64 の DataFrame 版とは 1e-6 ℃ 程度ずれる
+- period_filter（filter_period / split_by_*）と render（render_density_svg / build_density_figure）は
+  DataFrame と同じように受け取る
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .epw_io import EPWMeta, _datetime_dtype
+from .psychro_frame import (
+    CHART_PRESSURE_ATTR,
+    DEFAULT_PRESSURE_BIN_KPA,
+    en_hr_arrays,
+    en_hr_rows,
+    has_psychro_columns,
+    median_pressure_kpa,
+    skew_transform,
+)
+
+_MINUTES_PER_DAY = 1440
+_FALLBACK_P_KPA = 101.325
+
+
+@dataclass(frozen=True, eq=False, slots=True)
+class WeatherSeries:
+    """
+    load_epw() の df と同じ行を持つ配列の組（各配列は同じ長さ）。
+
+    month_index: year*12 + (month-1)。month は EPW の月欄のまま（load_epw() の month 列と同じ）
+    minute_of_month: その月初からの経過分。EPW の hour=24 / minute=60 の繰り上げで月末を越えることがある
+    hr_gkg / en_kjkg / chart_p_kpa は with_psychro() で埋まる（無ければ None）。
+    """
+    month_index: np.ndarray
+    minute_of_month: np.ndarray
+    db_c: np.ndarray
+    rh_pct: np.ndarray
+    p_pa: np.ndarray
+    hr_gkg: np.ndarray | None = None
+    en_kjkg: np.ndarray | None = None
+    chart_p_kpa: float | None = None
+
+    def __len__(self) -> int:
+        return int(self.month_index.size)
+
+    @property
+    def empty(self) -> bool:
+        return self.month_index.size == 0
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.month_index, self.minute_of_month, self.db_c, self.rh_pct, self.p_pa, self.hr_gkg, self.en_kjkg)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    @property
+    def has_psychro(self) -> bool:
+        return self.hr_gkg is not None and self.en_kjkg is not None
+
+    # --- 派生列（その都度作る） ---
+
+    @property
+    def year(self) -> np.ndarray:
+        return self.month_index // 12
+
+    @property
+    def month(self) -> np.ndarray:
+        return (self.month_index % 12 + 1).astype(np.int8)
+
+    @property
+    def dt(self) -> np.ndarray:
+        """load_epw() の dt 列と同じ datetime64 配列。"""
+        minutes = _month_first_day(self.month_index) * _MINUTES_PER_DAY + self.minute_of_month.astype(np.int64)
+        return minutes.view("datetime64[m]").astype(_datetime_dtype())
+
+    @property
+    def hour(self) -> np.ndarray:
+        """dt.hour（0..23）。dt を作らずに求める。"""
+        return (self.minute_of_month % _MINUTES_PER_DAY // 60).astype(np.int8)
+
+    @property
+    def p_kpa(self) -> np.ndarray:
+        return self.p_pa.astype(float) / 1000.0
+
+    def median_pressure_kpa(self, fallback_kpa: float = _FALLBACK_P_KPA) -> float:
+        p = self.p_kpa
+        p = p[~np.isnan(p)]
+        return float(np.median(p)) if p.size else fallback_kpa
+
+    def en_hr(self) -> tuple[np.ndarray, np.ndarray, float]:
+        """(en[kJ/kg], hr[g/kg], 気圧[kPa])。with_psychro() 済みなら計算済みの値を使う。"""
+        if self.has_psychro:
+            return self.en_kjkg.astype(float), self.hr_gkg.astype(float), float(self.chart_p_kpa)
+        p_kpa = self.median_pressure_kpa()
+        en, hr = en_hr_arrays(self.db_c, self.rh_pct, p_kpa)
+        return en, hr, p_kpa
+
+    # --- 変換 ---
+
+    def with_psychro(
+        self,
+        *,
+        pressure_kpa: float | None = None,
+        method: str = "shimeri",
+        pressure_mode: str = "median",
+        pressure_bin_kpa: float = DEFAULT_PRESSURE_BIN_KPA,
+    ) -> "WeatherSeries":
+        """
+        hr / en（float32）を計算して持たせたものを返す（add_psychro_columns() に相当）。
+        チャート気圧は pressure_kpa 指定がなければ全行の中央値。x_skew / y_skew は持たず to_frame() で作る。
+        """
+        p_kpa = float(pressure_kpa) if pressure_kpa is not None else self.median_pressure_kpa()
+        if self.empty:
+            en = hr = np.empty(0, dtype=np.float32)
+        else:
+            en, hr = en_hr_rows(
+                self.db_c, self.rh_pct, self.p_kpa, p_kpa,
+                method=method, pressure_mode=pressure_mode, pressure_bin_kpa=pressure_bin_kpa,
+            )
+        return replace(self, hr_gkg=hr.astype(np.float32), en_kjkg=en.astype(np.float32), chart_p_kpa=p_kpa)
+
+    def take(self, pos: np.ndarray) -> "WeatherSeries":
+        """行位置 pos の行だけの WeatherSeries（chart_p_kpa は引き継ぐ）。"""
+        pos = np.asarray(pos, dtype=np.int64)
+        return WeatherSeries(
+            month_index=self.month_index[pos],
+            minute_of_month=self.minute_of_month[pos],
+            db_c=self.db_c[pos],
+            rh_pct=self.rh_pct[pos],
+            p_pa=self.p_pa[pos],
+            hr_gkg=self.hr_gkg[pos] if self.hr_gkg is not None else None,
+            en_kjkg=self.en_kjkg[pos] if self.en_kjkg is not None else None,
+            chart_p_kpa=self.chart_p_kpa,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """load_epw() と同じ列の DataFrame（with_psychro() 済みなら空気線図の列と attrs も付ける）。"""
+        df = pd.DataFrame(
+            {
+                "dt": self.dt,
+                "year": self.year.astype(np.int64),
+                "month": self.month.astype(np.int64),
+                "db_c": self.db_c.astype(float),
+                "rh_pct": self.rh_pct.astype(float),
+                "p_kpa": self.p_kpa,
+            }
+        )
+        if self.has_psychro:
+            en, hr, p_kpa = self.en_hr()
+            x, y = skew_transform(en, hr, p_kpa)
+            df["hr_gkg"] = hr
+            df["en_kjkg"] = en
+            df["x_skew"] = x
+            df["y_skew"] = y
+            df.attrs[CHART_PRESSURE_ATTR] = p_kpa
+        return df
+
+    # --- 作成 ---
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "WeatherSeries":
+        """load_epw() の df（add_psychro_columns() 済みでもよい）から作る。"""
+        year = df["year"].to_numpy(dtype=np.int64)
+        month = df["month"].to_numpy(dtype=np.int64)
+        month_index = year * 12 + month - 1
+        dt_min = df["dt"].to_numpy().astype("datetime64[m]").astype(np.int64)
+        offset = dt_min - _month_first_day(month_index) * _MINUTES_PER_DAY
+        hr = en = p_kpa = None
+        if has_psychro_columns(df):
+            hr = df["hr_gkg"].to_numpy(dtype=np.float32)
+            en = df["en_kjkg"].to_numpy(dtype=np.float32)
+            # 気圧の記録が無いときは render と同じく p_kpa の中央値で計算したものとみなす
+            p_kpa = float(df.attrs.get(CHART_PRESSURE_ATTR, median_pressure_kpa(df)))
+        return cls(
+            month_index=_narrow_int(month_index, np.int16),
+            minute_of_month=_narrow_int(offset, np.uint16),
+            db_c=df["db_c"].to_numpy(dtype=np.float32),
+            rh_pct=df["rh_pct"].to_numpy(dtype=np.float32),
+            p_pa=(df["p_kpa"].to_numpy(dtype=float) * 1000.0).astype(np.float32),
+            hr_gkg=hr,
+            en_kjkg=en,
+            chart_p_kpa=p_kpa,
+        )
+
+    @classmethod
+    def from_epw(cls, epw_path: str | Path, *, chunk_rows: int | None = None) -> tuple["WeatherSeries", EPWMeta]:
+        """
+        EPW をチャンクごとに読み、そのまま狭い型へ詰める（ファイル全体の DataFrame は作らない）。
+        圧力が全欠損なら load_epw() と同じく 101.325 kPa にする。
+        """
+        # epw_stream → hist_cube → period_filter → このモジュール の循環を避けるためここで読む
+        from .epw_stream import DEFAULT_CHUNK_ROWS, iter_epw_chunks, read_epw_meta
+
+        parts = [cls.from_frame(chunk) for chunk in iter_epw_chunks(epw_path, chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS)]
+        ws = concat_series(parts)
+        if not ws.empty and np.isnan(ws.p_pa).all():
+            ws = replace(ws, p_pa=np.full(len(ws), _FALLBACK_P_KPA * 1000.0, dtype=np.float32))
+        return ws, read_epw_meta(epw_path)
+
+
+def concat_series(parts: list[WeatherSeries]) -> WeatherSeries:
+    """WeatherSeries を行方向に連結する（空気線図の列は全部が同じ気圧で持っているときだけ残す）。"""
+    if not parts:
+        return WeatherSeries(
+            month_index=np.empty(0, dtype=np.int16),
+            minute_of_month=np.empty(0, dtype=np.uint16),
+            db_c=np.empty(0, dtype=np.float32),
+            rh_pct=np.empty(0, dtype=np.float32),
+            p_pa=np.empty(0, dtype=np.float32),
+        )
+    keep_psychro = all(p.has_psychro for p in parts) and len({p.chart_p_kpa for p in parts}) == 1
+
+    def cat(name: str) -> np.ndarray:
+        return np.concatenate([getattr(p, name) for p in parts])
+
+    return WeatherSeries(
+        month_index=cat("month_index"),
+        minute_of_month=cat("minute_of_month"),
+        db_c=cat("db_c"),
+        rh_pct=cat("rh_pct"),
+        p_pa=cat("p_pa"),
+        hr_gkg=cat("hr_gkg") if keep_psychro else None,
+        en_kjkg=cat("en_kjkg") if keep_psychro else None,
+        chart_p_kpa=parts[0].chart_p_kpa if keep_psychro else None,
+    )
+
+
+def _month_first_day(month_index: np.ndarray) -> np.ndarray:
+    """month_index（year*12 + month-1）の月初の 1970-01-01 からの日数。"""
+    months = month_index.astype(np.int64) - 1970 * 12
+    return months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def _narrow_int(a: np.ndarray, dtype: type) -> np.ndarray:
+    """dtype に収まればその型、収まらなければ int32 にする。"""
+    info = np.iinfo(dtype)
+    if a.size == 0 or (a.min() >= info.min and a.max() <= info.max):
+        return a.astype(dtype)
+    return a.astype(np.int32)
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict
 
-from .add import ZoneSpec
+from .enhance_chart import ZoneSpec
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,233 @@
+# src/psychrimetric/zone_stats.py
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .enhance_chart import ZoneSpec, zone_geometry
+from .manifest import BuildManifest, data_digest, fingerprint
+from .period_filter import CalendarIndex, Period
+from .psychro_frame import CHART_PRESSURE_ATTR, add_psychro_columns, has_psychro_columns, median_pressure_kpa
+from .zone_registry import ZoneEntry
+
+TABLE_COLUMNS = ("zone", "period", "hours", "total_hours", "pct")
+
+
+@dataclass(frozen=True, eq=False)
+class ZonePolygon:
+    """
+    (en[kJ/kg], hr[g/kg]) 空間に投影したゾーン。
+    頂点間は直線（add_zone_polygon の描画と同じ：skew 座標は (en, hr) の線形変換なので直線が保たれる）。
+    """
+    name: str
+    en: np.ndarray
+    hr: np.ndarray
+
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        return float(self.en.min()), float(self.en.max()), float(self.hr.min()), float(self.hr.max())
+
+
+def project_zone(name: str, spec: ZoneSpec, p_kpa: float = 101.325, *, densify: int = 0) -> ZonePolygon:
+    """ZoneSpec（db_rh / db_hr）の頂点を (en, hr) に変換する（enhance_chart.zone_geometry のキャッシュを使う）。"""
+    try:
+        geom = zone_geometry(spec, p_kpa, densify=densify)
+    except ValueError as e:
+        raise ValueError(f"Zone '{name}': {e}") from None
+    return ZonePolygon(name=name, en=geom.en, hr=geom.hr)
+
+
+def project_zones(
+    zones: Mapping[str, ZoneEntry | ZoneSpec],
+    p_kpa: float = 101.325,
+    *,
+    densify: int = 0,
+) -> list[ZonePolygon]:
+    """
+    {name: ZoneEntry | ZoneSpec}（load_zones_config の戻りなど）をまとめて投影する。
+    densify > 1 なら辺を分割して、定RH辺などの曲がった境界で判定する。
+    """
+    out = []
+    for name, z in zones.items():
+        spec = z.spec if isinstance(z, ZoneEntry) else z
+        out.append(project_zone(name, spec, p_kpa, densify=densify))
+    return out
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, vx: np.ndarray, vy: np.ndarray) -> np.ndarray:
+    """
+    点 (x, y) が多角形 (vx, vy) の内側か（偶奇規則）。
+    外接矩形で先に絞り、残った点だけ辺ごとに交差判定する（ループは辺の数だけ）。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    vx = np.asarray(vx, dtype=float)
+    vy = np.asarray(vy, dtype=float)
+    inside = np.zeros(x.shape, dtype=bool)
+
+    cand = np.flatnonzero((x >= vx.min()) & (x <= vx.max()) & (y >= vy.min()) & (y <= vy.max()))
+    if cand.size == 0:
+        return inside
+    px, py = x[cand], y[cand]
+
+    hit = np.zeros(cand.size, dtype=bool)
+    x0, y0 = vx, vy
+    x1, y1 = np.roll(vx, -1), np.roll(vy, -1)
+    for ax, ay, bx, by in zip(x0, y0, x1, y1):
+        if ay == by:
+            continue
+        crosses = (ay > py) != (by > py)
+        xi = ax + (py - ay) * (bx - ax) / (by - ay)
+        hit ^= crosses & (px < xi)
+
+    inside[cand] = hit
+    return inside
+
+
+def standard_periods(
+    seasons: Mapping[str, Iterable[int]] | None = None,
+    *,
+    monthly: bool = True,
+    seasonal: bool = True,
+    yearly: bool = True,
+) -> dict[str, Period]:
+    """batch.plan_jobs と同じ名前（M01..M12 / 季節名 / Yearly）の期間一覧。"""
+    out: dict[str, Period] = {}
+    if monthly:
+        for m in range(1, 13):
+            out[f"M{m:02d}"] = Period(months=(m,))
+    if seasonal and seasons:
+        for name, months in seasons.items():
+            out[name] = Period(months=tuple(int(v) for v in months))
+    if yearly:
+        out["Yearly"] = Period()
+    return out
+
+
+def _step_hours(df: pd.DataFrame) -> float:
+    """1行あたりの時間 [h]（dt の間隔の中央値。求まらなければ 1）。"""
+    if len(df) < 2:
+        return 1.0
+    d = np.diff(df["dt"].to_numpy().astype("datetime64[s]").astype(np.int64))
+    d = d[d > 0]
+    return float(np.median(d)) / 3600.0 if d.size else 1.0
+
+
+def zone_table(
+    df: pd.DataFrame,
+    zones: Mapping[str, ZoneEntry | ZoneSpec] | Sequence[ZonePolygon],
+    periods: Mapping[str, Period] | None = None,
+    *,
+    index: CalendarIndex | None = None,
+    densify: int = 0,
+) -> pd.DataFrame:
+    """
+    ゾーン × 期間の滞在時間表を返す（列: zone, period, hours, total_hours, pct）。
+
+    df     : load_epw() の戻り（add_psychro_columns() 済みならその en/hr・気圧を使う）
+    zones  : {name: ZoneEntry | ZoneSpec} か project_zones() 済みの ZonePolygon の列
+    periods: {name: Period}。None なら standard_periods()（月別 + 年間）
+    hours  : 期間内でゾーンに入った行数 × 1行あたりの時間（サブアワリーEPWにも対応）
+    pct    : hours / total_hours * 100
+    densify: project_zones() へ渡す（辺の分割数）
+    """
+    if not has_psychro_columns(df):
+        df = add_psychro_columns(df)
+    p_kpa = df.attrs.get(CHART_PRESSURE_ATTR)
+    if p_kpa is None:
+        p_kpa = median_pressure_kpa(df)
+
+    if isinstance(zones, Mapping):
+        polys = project_zones(zones, p_kpa, densify=densify)
+    else:
+        polys = list(zones)
+    if periods is None:
+        periods = standard_periods()
+    if index is None:
+        index = CalendarIndex.from_df(df)
+
+    en = df["en_kjkg"].to_numpy(dtype=float)
+    hr = df["hr_gkg"].to_numpy(dtype=float)
+    inside = np.stack([points_in_polygon(en, hr, z.en, z.hr) for z in polys]) if polys else np.zeros((0, len(df)), bool)
+    step_h = _step_hours(df)
+
+    rows = []
+    for pname, period in periods.items():
+        pos = index.positions(period.months, period.hours, period.start, period.end)
+        total = pos.size * step_h
+        counts = inside[:, pos].sum(axis=1) if pos.size else np.zeros(len(polys), dtype=int)
+        for z, c in zip(polys, counts):
+            hours = float(c) * step_h
+            rows.append((z.name, pname, hours, total, 100.0 * hours / total if total else 0.0))
+    return pd.DataFrame(rows, columns=list(TABLE_COLUMNS))
+
+
+def write_zone_table(table: pd.DataFrame, out_path: str | Path) -> Path:
+    """
+    zone_table() の結果を書き出す。拡張子 .json なら {zone: {period: {hours, total_hours, pct}}}、それ以外は CSV。
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix.lower() == ".json":
+        data: dict[str, dict[str, dict[str, float]]] = {}
+        for r in table.itertuples(index=False):
+            data.setdefault(r.zone, {})[r.period] = {
+                "hours": round(float(r.hours), 3),
+                "total_hours": round(float(r.total_hours), 3),
+                "pct": round(float(r.pct), 3),
+            }
+        out_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        table.to_csv(out_path, index=False, float_format="%.3f", encoding="utf-8")
+    return out_path
+
+
+def zone_fingerprint(
+    df: pd.DataFrame,
+    zones: Mapping[str, ZoneEntry | ZoneSpec],
+    periods: Mapping[str, Period],
+    *,
+    densify: int = 0,
+) -> str:
+    """
+    滞在時間表の指紋（期間データ + ゾーン定義の頂点 + 期間 + densify + バージョン）。
+    ゾーンの表示スタイル（ZoneStyle）は表に関係しないので含めない。
+    """
+    params = {
+        "zones": {name: asdict(z.spec if isinstance(z, ZoneEntry) else z) for name, z in zones.items()},
+        "periods": {name: asdict(p) for name, p in periods.items()},
+        "densify": densify,
+    }
+    return fingerprint(data_digest(df), params)
+
+
+def write_zone_tables(
+    df: pd.DataFrame,
+    zones: Mapping[str, ZoneEntry | ZoneSpec],
+    periods: Mapping[str, Period],
+    out_paths: Sequence[str | Path],
+    *,
+    manifest: BuildManifest | None = None,
+    densify: int = 0,
+) -> bool:
+    """
+    zone_table() を求めて out_paths のそれぞれへ write_zone_table() で書く。
+    manifest を渡すと、指紋（zone_fingerprint）が前回と同じで全ファイルが残っていれば何もせず False を返す。
+    書いたら指紋を記録して manifest.save() し、True を返す。
+    """
+    fp = zone_fingerprint(df, zones, periods, densify=densify) if manifest is not None else ""
+    if manifest is not None and all(manifest.is_fresh(p, fp) for p in out_paths):
+        return False
+    table = zone_table(df, zones, periods, densify=densify)
+    for p in out_paths:
+        write_zone_table(table, p)
+        if manifest is not None:
+            manifest.record(p, fp)
+    if manifest is not None:
+        manifest.save()
+    return True
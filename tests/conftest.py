@@ -0,0 +1,30 @@
+# tests/conftest.py
+"""
+不変条件のテストで使う合成EPW（benchmarks.synth_epw。シード固定で毎回同じ内容）
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synth_epw import SynthSpec, ensure_synth_epw
+
+# 1年1時間値（8760行）と、サブアワリーの読み込み経路を通す1年10分値
+HOURLY = SynthSpec("hourly")
+TEN_MIN = SynthSpec("10min", step_min=10)
+
+
+@pytest.fixture(scope="session")
+def synth_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("synth_epw")
+
+
+@pytest.fixture(scope="session")
+def hourly_epw(synth_dir: Path) -> Path:
+    return ensure_synth_epw(synth_dir, HOURLY)
+
+
+@pytest.fixture(scope="session")
+def ten_min_epw(synth_dir: Path) -> Path:
+    return ensure_synth_epw(synth_dir, TEN_MIN)
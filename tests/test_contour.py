@@ -0,0 +1,81 @@
+# tests/test_contour.py
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from psychrometric.contour import isoline_loops
+
+
+def _area(loop: np.ndarray) -> float:
+    x, y = loop[:, 0], loop[:, 1]
+    return 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def _points(loop: np.ndarray) -> set[tuple[float, float]]:
+    return {(round(float(a), 6), round(float(b), 6)) for a, b in loop}
+
+
+def test_single_peak_is_a_diamond() -> None:
+    z = np.zeros((3, 3))
+    z[1, 1] = 1.0
+    loops = isoline_loops(z, 0.5, np.arange(3.0), np.arange(3.0))
+
+    assert len(loops) == 1
+    assert _points(loops[0]) == {(0.5, 1.0), (1.0, 0.5), (1.5, 1.0), (1.0, 1.5)}
+    assert _area(loops[0]) == pytest.approx(0.5)
+
+
+def test_ring_gives_outer_loop_and_hole() -> None:
+    """外周に接する領域はビン端（格子間隔の半分外）で閉じ、内側の穴は別ループになる。"""
+    z = np.ones((5, 5))
+    z[2, 2] = 0.0
+    loops = isoline_loops(z, 0.5, np.arange(5.0), np.arange(5.0))
+
+    assert len(loops) == 2
+    outer, inner = sorted(loops, key=_area, reverse=True)
+    np.testing.assert_allclose(outer.min(axis=0), [-0.5, -0.5], atol=1e-6)
+    np.testing.assert_allclose(outer.max(axis=0), [4.5, 4.5], atol=1e-6)
+    # 外周の4つの角は marching squares で直角二等辺三角形（脚 0.5、面積 0.125）ずつ面取りされる
+    assert _area(outer) == pytest.approx(25.0 - 4 * 0.125, abs=1e-5)
+    assert _points(inner) == {(1.5, 2.0), (2.0, 1.5), (2.5, 2.0), (2.0, 2.5)}
+
+
+def test_region_touching_the_edge_is_closed_along_bin_edges() -> None:
+    """データ上は開いた等値線（右半分が level 以上）も、外周のビン端に沿って閉じたループになる。"""
+    z = np.tile(np.arange(4.0), (3, 1))  # z[i, j] = j
+    loops = isoline_loops(z, 1.5, np.arange(4.0), np.arange(3.0))
+
+    assert len(loops) == 1
+    lp = loops[0]
+    np.testing.assert_allclose(lp.min(axis=0), [1.5, -0.5], atol=1e-6)
+    np.testing.assert_allclose(lp.max(axis=0), [3.5, 2.5], atol=1e-6)
+    assert _area(lp) == pytest.approx(2.0 * 3.0 - 4 * 0.125, abs=1e-5)
+    # 閉ループは始点を繰り返さない（M ... Z で閉じる）
+    assert not np.allclose(lp[0], lp[-1])
+
+
+@pytest.mark.parametrize("level, n_loops", [(0.4, 1), (0.5, 1), (0.6, 2)])
+def test_saddle_follows_the_cell_centre(level: float, n_loops: int) -> None:
+    """鞍点（対角だけが level 以上）は中心値が level 以上ならつながり、未満なら分かれる。"""
+    z = np.array([[1.0, 0.0], [0.0, 1.0]])  # 中心値 0.5
+    loops = isoline_loops(z, level, np.arange(2.0), np.arange(2.0))
+    assert len(loops) == n_loops
+
+
+def test_nan_and_empty_levels() -> None:
+    z = np.full((3, 3), np.nan)
+    z[0, 0] = 1.0
+    x = y = np.arange(3.0)
+
+    assert isoline_loops(z, 2.0, x, y) == []
+    # NaN は level 直下の値として扱うので、等値線は隣の NaN の格子点まで届く
+    loops = isoline_loops(z, 0.5, x, y)
+    assert len(loops) == 1
+    np.testing.assert_allclose(loops[0].min(axis=0), [-0.5, -0.5], atol=1e-6)
+    np.testing.assert_allclose(loops[0].max(axis=0), [1.0, 1.0], atol=1e-6)
+
+
+def test_shape_mismatch_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        isoline_loops(np.zeros((3, 4)), 0.5, np.arange(3.0), np.arange(4.0))
@@ -0,0 +1,104 @@
+# tests/test_density.py
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from psychrometric.density import BANDWIDTHS, histogram_grid, kde_bandwidth, kde_grid
+
+
+@pytest.fixture(scope="module")
+def sample() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return rng.normal(0.0, 1.0, 40), rng.normal(5.0, 2.0, 40)
+
+
+def _direct_kde(x: np.ndarray, y: np.ndarray, grid, bx: float, by: float) -> np.ndarray:
+    """格子点ごとに全点のガウスカーネルを足し合わせ、セル面積を掛けて点数の期待値にする。"""
+    xc, yc = grid.x_centers, grid.y_centers
+    kx = np.exp(-0.5 * ((xc[None, :] - x[:, None]) / bx) ** 2) / (np.sqrt(2 * np.pi) * bx)
+    ky = np.exp(-0.5 * ((yc[None, :] - y[:, None]) / by) ** 2) / (np.sqrt(2 * np.pi) * by)
+    return np.einsum("ij,ik->jk", ky, kx) * grid.bin_area
+
+
+@pytest.mark.parametrize("n", [1, 40, 5000])
+def test_kde_grid_conserves_mass(n) -> None:
+    rng = np.random.default_rng(n)
+    x, y = rng.normal(20.0, 5.0, n), rng.normal(8.0, 2.0, n)
+    g = kde_grid(x, y)
+    assert g.z.shape == (48, 64)
+    assert (g.z >= 0).all()
+    assert g.total == pytest.approx(n, rel=1e-3)
+
+
+def test_kde_grid_drops_non_finite(sample) -> None:
+    x, y = sample
+    g = kde_grid(np.append(x, [np.nan, 1.0]), np.append(y, [2.0, np.inf]))
+    ref = kde_grid(x, y)
+    assert g.total == pytest.approx(x.size, rel=1e-3)
+    np.testing.assert_allclose(g.z, ref.z)
+    np.testing.assert_allclose(g.x_edges, ref.x_edges)
+
+
+@pytest.mark.parametrize("bandwidth", [(0.8, 1.5), "scott", "silverman", 0.5])
+def test_kde_grid_matches_direct_kde(sample, bandwidth) -> None:
+    """binned KDE（線形ビニング + FFT）が、格子点で直接足したガウス KDE と一致する。"""
+    x, y = sample
+    g = kde_grid(x, y, gridsize=(200, 160), bandwidth=bandwidth)
+    bx, by = kde_bandwidth(x, y, bandwidth)
+    ref = _direct_kde(x, y, g, bx, by)
+    assert np.abs(g.z - ref).max() <= 1e-3 * ref.max()
+
+
+def test_kde_grid_extends_past_data(sample) -> None:
+    """格子はデータ範囲をバンド幅の3倍ずつ広げる（裾が切れない）。"""
+    x, y = sample
+    bx, by = kde_bandwidth(x, y, "scott")
+    g = kde_grid(x, y, bandwidth="scott")
+    assert g.x_centers[0] == pytest.approx(x.min() - 3 * bx)
+    assert g.x_centers[-1] == pytest.approx(x.max() + 3 * bx)
+    assert g.y_centers[0] == pytest.approx(y.min() - 3 * by)
+    assert g.y_centers[-1] == pytest.approx(y.max() + 3 * by)
+
+
+def test_kde_grid_narrow_bandwidth_floors_to_grid_step(sample) -> None:
+    """格子1つ分より狭いバンド幅でも点数は保たれ、ヒストグラムより滑らか（最大値が小さい）。"""
+    x, y = sample
+    g = kde_grid(x, y, gridsize=(20, 15), bandwidth=(1e-6, 1e-6))
+    assert g.total == pytest.approx(x.size, rel=1e-3)
+    assert g.z.max() < histogram_grid(x, y, nbinsx=20, nbinsy=15).z.max()
+
+
+def test_kde_grid_rejects_tiny_grid(sample) -> None:
+    with pytest.raises(ValueError):
+        kde_grid(*sample, gridsize=(1, 10))
+
+
+def test_kde_bandwidth_rules(sample) -> None:
+    x, y = sample
+    n = x.size
+    sx, sy = np.std(x, ddof=1), np.std(y, ddof=1)
+
+    assert kde_bandwidth(x, y, "scott") == pytest.approx((sx * n ** (-1 / 6), sy * n ** (-1 / 6)))
+    assert kde_bandwidth(x, y, 0.5) == pytest.approx((0.5 * sx, 0.5 * sy))
+    assert kde_bandwidth(x, y, (0.3, 0.7)) == (0.3, 0.7)
+    assert set(BANDWIDTHS) == {"scott", "silverman"}
+
+
+def test_kde_bandwidth_silverman_is_robust_to_outliers(sample) -> None:
+    """silverman は σ と IQR/1.349 の小さいほうを使うので、外れ値で広がらない。"""
+    x, y = sample
+    xo = np.append(x, [60.0, -60.0])
+    yo = np.append(y, [5.0, 5.0])
+    n = xo.size
+    q75, q25 = np.percentile(xo, [75, 25])
+    bx, by = kde_bandwidth(xo, yo, "silverman")
+    assert bx == pytest.approx((q75 - q25) / 1.349 * n ** (-1 / 6))
+    assert bx < kde_bandwidth(xo, yo, "scott")[0]
+    assert by <= kde_bandwidth(xo, yo, "scott")[1]
+
+
+@pytest.mark.parametrize("bandwidth", ["normal", 0.0, -1.0, (0.5, 0.0)])
+def test_kde_bandwidth_rejects_bad_values(sample, bandwidth) -> None:
+    with pytest.raises(ValueError):
+        kde_bandwidth(*sample, bandwidth)
@@ -0,0 +1,134 @@
+# tests/test_epw_cache.py
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from psychrometric import epw_cache, psychro_frame
+from psychrometric.epw_cache import cache_key, invalidate, load_epw_cached, load_epw_psychro_cached
+from psychrometric.epw_io import load_epw
+from psychrometric.psychro_frame import add_psychro_columns
+
+
+@pytest.mark.parametrize("pressure_mode", ["median", "binned"])
+def test_psychro_columns_are_converted_once(hourly_epw, tmp_path, monkeypatch, pressure_mode: str) -> None:
+    """2回目は空気線図の列をキャッシュから読み、en / hr を計算し直さない（結果は add_psychro_columns と同じ）。"""
+    calls = []
+    en_hr_rows = psychro_frame.en_hr_rows
+    monkeypatch.setattr(psychro_frame, "en_hr_rows", lambda *a, **k: calls.append(1) or en_hr_rows(*a, **k))
+
+    kw = dict(method="lut", pressure_mode=pressure_mode, cache_dir=tmp_path)
+    first, meta = load_epw_psychro_cached(hourly_epw, **kw)
+    second, meta2 = load_epw_psychro_cached(hourly_epw, **kw)
+    assert len(calls) == 1
+
+    ref = add_psychro_columns(load_epw(hourly_epw)[0], method="lut", pressure_mode=pressure_mode)
+    assert meta2 == meta
+    for df in (first, second):
+        pd.testing.assert_frame_equal(df.copy(deep=True), ref)
+        assert df.attrs == ref.attrs
+
+    # 計算方法が違えば別の列として計算する
+    n = len(calls)
+    load_epw_psychro_cached(hourly_epw, **(kw | {"method": "shimeri"}))
+    assert len(calls) == n + 1
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """load_epw（キャッシュを外したとき）と内容ハッシュの呼び出し回数。"""
+    calls = {"load": 0, "hash": 0}
+    load_epw, content_hash = epw_cache.load_epw, epw_cache._content_hash
+
+    def _load(*a, **k):
+        calls["load"] += 1
+        return load_epw(*a, **k)
+
+    def _hash(*a, **k):
+        calls["hash"] += 1
+        return content_hash(*a, **k)
+
+    monkeypatch.setattr(epw_cache, "load_epw", _load)
+    monkeypatch.setattr(epw_cache, "_content_hash", _hash)
+    return calls
+
+
+@pytest.fixture
+def epw_copy(hourly_epw, tmp_path):
+    return shutil.copy(hourly_epw, tmp_path / "copy.epw")
+
+
+def test_miss_then_hit(epw_copy, tmp_path, counted) -> None:
+    cache = tmp_path / "cache"
+    df, meta = load_epw_cached(epw_copy, cache_dir=cache)
+    assert counted == {"load": 1, "hash": 1}
+
+    df2, meta2 = load_epw_cached(epw_copy, cache_dir=cache)
+    # 2回目はキャッシュから読み、(パス, サイズ, mtime) が同じなので内容のハッシュも取らない
+    assert counted == {"load": 1, "hash": 1}
+    assert meta2 == meta
+    pd.testing.assert_frame_equal(df2.copy(deep=True), df)
+
+
+def test_touch_rehashes_but_keeps_entry(epw_copy, tmp_path, counted) -> None:
+    cache = tmp_path / "cache"
+    key = cache_key(epw_copy, cache_dir=cache)
+    load_epw_cached(epw_copy, cache_dir=cache)
+    st = os.stat(epw_copy)
+    os.utime(epw_copy, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    assert cache_key(epw_copy, cache_dir=cache) == key
+    load_epw_cached(epw_copy, cache_dir=cache)
+    # touch の後は1回だけ読み直してハッシュし（記録を更新）、エントリはそのまま使う
+    assert counted == {"load": 1, "hash": 2}
+
+
+def test_changed_content_is_a_miss(epw_copy, tmp_path, counted) -> None:
+    cache = tmp_path / "cache"
+    df, _ = load_epw_cached(epw_copy, cache_dir=cache)
+    key = cache_key(epw_copy, cache_dir=cache)
+
+    lines = epw_copy.read_text(encoding="utf-8").splitlines(keepends=True)
+    lines = lines[:-1]  # 最後の1行を削る
+    epw_copy.write_text("".join(lines), encoding="utf-8")
+
+    assert cache_key(epw_copy, cache_dir=cache) != key
+    df2, _ = load_epw_cached(epw_copy, cache_dir=cache)
+    assert counted["load"] == 2
+    assert len(df2) == len(df) - 1
+
+
+@pytest.mark.parametrize(
+    "meta_json",
+    [
+        "{not json",
+        json.dumps({"version": epw_cache.CACHE_VERSION, "meta": {"location": "x", "obsolete_field": 1}}),
+        json.dumps({"version": epw_cache.CACHE_VERSION, "meta": None}),
+        json.dumps({"version": epw_cache.CACHE_VERSION - 1}),
+    ],
+)
+def test_unreadable_entry_is_a_miss(epw_copy, tmp_path, counted, meta_json: str) -> None:
+    cache = tmp_path / "cache"
+    df, meta = load_epw_cached(epw_copy, cache_dir=cache)
+    (cache / cache_key(epw_copy, cache_dir=cache) / "meta.json").write_text(meta_json, encoding="utf-8")
+
+    df2, meta2 = load_epw_cached(epw_copy, cache_dir=cache)
+    assert counted["load"] == 2
+    assert meta2 == meta
+    pd.testing.assert_frame_equal(df2, df)
+    # 読み直した結果で書き直しているので、次はヒットする
+    load_epw_cached(epw_copy, cache_dir=cache)
+    assert counted["load"] == 2
+
+
+def test_invalidate_removes_entry(epw_copy, tmp_path, counted) -> None:
+    cache = tmp_path / "cache"
+    load_epw_cached(epw_copy, cache_dir=cache)
+    assert invalidate(epw_copy, cache_dir=cache)
+    assert not invalidate(epw_copy, cache_dir=cache)
+    load_epw_cached(epw_copy, cache_dir=cache)
+    assert counted["load"] == 2
@@ -0,0 +1,21 @@
+# tests/test_epw_io.py
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from psychrometric.epw_io import load_epw
+
+from .conftest import HOURLY, TEN_MIN
+
+
+@pytest.mark.parametrize("epw, spec", [("hourly_epw", HOURLY), ("ten_min_epw", TEN_MIN)])
+def test_fast_loader_matches_reference(epw: str, spec, request: pytest.FixtureRequest) -> None:
+    """fast ローダーは従来の reference ローダーと同じ df / meta を返す（欠損コードを含む）。"""
+    path = request.getfixturevalue(epw)
+    df_fast, meta_fast = load_epw(path, loader="fast")
+    df_ref, meta_ref = load_epw(path, loader="reference")
+
+    assert meta_fast == meta_ref
+    assert 0 < len(df_fast) < spec.rows  # 欠損コード（99.9）の行は落ちている
+    pd.testing.assert_frame_equal(df_fast, df_ref)
@@ -0,0 +1,26 @@
+# tests/test_epw_stream.py
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from psychrometric.epw_io import load_epw
+from psychrometric.epw_stream import build_hist_cube_stream
+from psychrometric.hist_cube import build_hist_cube
+from psychrometric.psychro_frame import add_psychro_columns
+
+
+@pytest.mark.parametrize("chunk_rows", [1_000, 7_777])
+def test_streamed_cube_matches_in_memory(hourly_epw, chunk_rows: int) -> None:
+    """チャンクごとに数えたキューブは、全体を読み込んで作ったキューブと同じ。"""
+    df, meta = load_epw(hourly_epw)
+    cube = build_hist_cube(add_psychro_columns(df), bins="chart")
+    streamed, streamed_meta = build_hist_cube_stream(hourly_epw, chunk_rows=chunk_rows)
+
+    assert streamed_meta == meta
+    assert streamed.p_kpa == cube.p_kpa
+    np.testing.assert_array_equal(streamed.x_edges, cube.x_edges)
+    np.testing.assert_array_equal(streamed.y_edges, cube.y_edges)
+    np.testing.assert_array_equal(streamed.hours, cube.hours)
+    np.testing.assert_array_equal(streamed.counts, cube.counts)
+    assert cube.counts.sum() > 0
@@ -0,0 +1,76 @@
+# tests/test_hist_cube.py
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from psychrometric.batch import plan_jobs
+from psychrometric.density import histogram_grid
+from psychrometric.epw_io import load_epw
+from psychrometric.hist_cube import bin_counts, build_hist_cube, cube_edges
+from psychrometric.period_filter import Period, filter_period
+from psychrometric.psychro_frame import add_psychro_columns
+from psychrometric.render import density_grid
+
+
+@pytest.fixture(scope="module")
+def df(hourly_epw) -> pd.DataFrame:
+    return add_psychro_columns(load_epw(hourly_epw)[0], method="lut")
+
+
+def test_data_bins_match_yearly_render_grid(df) -> None:
+    """既定の bins="data" なら、全期間のグリッドは描画経路（Yearly のチャート）と同じビン・同じ度数。"""
+    cube = build_hist_cube(df, nbinsx=25, nbinsy=20)
+    yearly = [j for j in plan_jobs(df, "T", ".", run_monthly=False) if j.name == "Yearly"][0]
+    ref = density_grid(yearly.df, nbinsx=25, nbinsy=20)
+
+    g = cube.grid()
+    np.testing.assert_array_equal(g.x_edges, ref.x_edges)
+    np.testing.assert_array_equal(g.y_edges, ref.y_edges)
+    np.testing.assert_array_equal(g.z, ref.z)
+    assert cube.n() == len(df)
+
+
+@pytest.mark.parametrize(
+    "period",
+    [Period(months=(7,)), Period(months=(12, 1, 2)), Period(hours=(9, 10, 11)), Period(months=(6,), hours=(0, 23))],
+)
+def test_period_grid_matches_histogram_on_cube_edges(df, period) -> None:
+    """部分期間は、切り出した期間データをキューブと同じ境界で数えたものと一致する。"""
+    cube = build_hist_cube(df, nbinsx=25, nbinsy=20)
+    d = filter_period(df, period)
+    ref = histogram_grid(d["x_skew"], d["y_skew"], x_edges=cube.x_edges, y_edges=cube.y_edges)
+    np.testing.assert_array_equal(cube.period_grid(period).z, ref.z)
+    assert cube.n(period.months, period.hours) == len(d)
+
+
+def test_chart_bins_use_chart_extent(df) -> None:
+    cube = build_hist_cube(df, nbinsx=25, nbinsy=20, bins="chart")
+    x_edges, y_edges = cube_edges(cube.p_kpa, 25, 20)
+    np.testing.assert_array_equal(cube.x_edges, x_edges)
+    np.testing.assert_array_equal(cube.y_edges, y_edges)
+    # 表示範囲の外の点は数えないが、hours（タイトルの N）には入る
+    assert cube.counts.sum() <= cube.n() == len(df)
+
+
+def test_bin_counts_edge_points_follow_histogram2d() -> None:
+    """境界ちょうどの点は右のビン、右端ちょうどの点は最後のビン（np.histogram2d と同じ）。"""
+    # 割り算でビン番号を出すと、この境界のいくつかは丸めで左のビンに落ちる
+    edges = np.linspace(1.1, 2.3, 13)
+    x = np.concatenate([edges, [1.0, 2.4]])
+    df = pd.DataFrame({
+        "x_skew": x,
+        "y_skew": np.full(x.size, 1.5),
+        "month": 1,
+        "dt": pd.Timestamp("1991-01-01 00:00"),
+    })
+    counts, hours = bin_counts(df, edges, edges)
+    ref, _, _ = np.histogram2d(x, df["y_skew"], bins=(edges, edges))
+    np.testing.assert_array_equal(counts[0, 0], ref)
+    assert hours[0, 0] == x.size
+
+
+def test_unknown_bins_rejected(df) -> None:
+    with pytest.raises(ValueError):
+        build_hist_cube(df, bins="auto")
@@ -0,0 +1,106 @@
+# tests/test_manifest.py
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from psychrometric.batch import plan_jobs, render_batch
+from psychrometric.enhance_chart import ZoneSpec
+from psychrometric.epw_io import load_epw
+from psychrometric.manifest import MANIFEST_FILE, BuildManifest
+from psychrometric.period_filter import Period
+from psychrometric.psychro_frame import add_psychro_columns
+from psychrometric.zone_registry import ZoneEntry, ZoneStyle
+from psychrometric.zone_stats import write_zone_tables
+
+# Kaleido を使わない native バックエンドで描く
+STYLE = {"backend": "native", "nbinsx": 20, "nbinsy": 15}
+SEASONS = {"Summer": [6, 7, 8]}
+COMFORT = ZoneSpec("db_rh", x=[20, 26, 26, 20], y=[30, 30, 60, 60])
+
+
+@pytest.fixture(scope="module")
+def df(hourly_epw) -> pd.DataFrame:
+    return add_psychro_columns(load_epw(hourly_epw)[0], method="lut")
+
+
+def _jobs(df: pd.DataFrame, out_dir):
+    return plan_jobs(df, "T", out_dir, run_monthly=False, seasons=SEASONS)
+
+
+def _build(df: pd.DataFrame, out_dir, **style) -> dict[str, bool]:
+    """マニフェストを読み直して描き、{期間名: 飛ばしたか} を返す。"""
+    results = render_batch(_jobs(df, out_dir), n_jobs=1, manifest=BuildManifest.load(out_dir), **(STYLE | style))
+    assert all(r.ok for r in results)
+    return {r.name: r.skipped for r in results}
+
+
+def test_unchanged_rerun_skips(df, tmp_path) -> None:
+    assert _build(df, tmp_path) == {"Summer": False, "Yearly": False}
+    before = {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.svg")}
+    assert _build(df, tmp_path) == {"Summer": True, "Yearly": True}
+    assert {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("*.svg")} == before
+
+
+def test_style_change_rebuilds(df, tmp_path) -> None:
+    _build(df, tmp_path)
+    assert _build(df, tmp_path, colorscale="Viridis") == {"Summer": False, "Yearly": False}
+    assert _build(df, tmp_path, colorscale="Viridis") == {"Summer": True, "Yearly": True}
+
+
+def test_data_change_rebuilds_only_affected_charts(df, tmp_path) -> None:
+    _build(df, tmp_path)
+    warmer = df.copy()
+    jan = (warmer["month"] == 1).to_numpy()
+    warmer.loc[jan, "en_kjkg"] += 1.0
+    # 夏の期間データは同じなので描き直さない。年間は中身が変わるので描き直す
+    assert _build(warmer, tmp_path) == {"Summer": True, "Yearly": False}
+
+
+def test_missing_or_modified_output_rebuilds(df, tmp_path) -> None:
+    _build(df, tmp_path)
+    (tmp_path / "T_Summer.svg").unlink()
+    assert _build(df, tmp_path) == {"Summer": False, "Yearly": True}
+
+    with open(tmp_path / "T_Yearly.svg", "ab") as f:
+        f.write(b"\n")
+    assert _build(df, tmp_path) == {"Summer": True, "Yearly": False}
+
+
+def test_unreadable_manifest_rebuilds(df, tmp_path) -> None:
+    _build(df, tmp_path)
+    (tmp_path / MANIFEST_FILE).write_text("{not json", encoding="utf-8")
+    assert _build(df, tmp_path) == {"Summer": False, "Yearly": False}
+    assert json.loads((tmp_path / MANIFEST_FILE).read_text(encoding="utf-8"))["entries"]
+
+
+def _tables(df: pd.DataFrame, out_dir, zones) -> bool:
+    periods = {"Summer": Period(months=(6, 7, 8)), "Yearly": Period()}
+    paths = [out_dir / "T_zones.csv", out_dir / "T_zones.json"]
+    return write_zone_tables(df, zones, periods, paths, manifest=BuildManifest.load(out_dir))
+
+
+def test_zone_tables_follow_zone_config(df, tmp_path) -> None:
+    assert _tables(df, tmp_path, {"Comfort": COMFORT})
+    assert not _tables(df, tmp_path, {"Comfort": COMFORT})
+    # 表示スタイルだけの変更では書き直さない
+    assert not _tables(df, tmp_path, {"Comfort": ZoneEntry(COMFORT, ZoneStyle(fill_opacity=0.5))})
+
+    wider = ZoneSpec("db_rh", x=[20, 28, 28, 20], y=[30, 30, 60, 60])
+    assert _tables(df, tmp_path, {"Comfort": wider})
+    assert not _tables(df, tmp_path, {"Comfort": wider})
+    assert _tables(df, tmp_path, {"Comfort": wider, "Dry": ZoneSpec("db_rh", x=[20, 26, 26, 20], y=[5, 5, 30, 30])})
+
+    (tmp_path / "T_zones.json").unlink()
+    assert _tables(df, tmp_path, {"Comfort": wider, "Dry": ZoneSpec("db_rh", x=[20, 26, 26, 20], y=[5, 5, 30, 30])})
+    assert (tmp_path / "T_zones.json").exists()
+
+
+def test_zone_tables_and_charts_share_manifest(df, tmp_path) -> None:
+    _build(df, tmp_path)
+    _tables(df, tmp_path, {"Comfort": COMFORT})
+    entries = BuildManifest.load(tmp_path).entries
+    assert set(entries) == {"T_Summer.svg", "T_Yearly.svg", "T_zones.csv", "T_zones.json"}
+    assert _build(df, tmp_path) == {"Summer": True, "Yearly": True}
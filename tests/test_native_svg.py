@@ -0,0 +1,74 @@
+# tests/test_native_svg.py
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from plotly.colors import sample_colorscale
+
+from psychrometric.density import DensityGrid, SharedScale, nice_levels
+from psychrometric.epw_io import load_epw
+from psychrometric.native_svg import density_svg
+from psychrometric.psychro_frame import add_psychro_columns
+from psychrometric.render import render_density_svg
+from psychrometric.svg_post import LAYERS, SVG_NS
+
+NS = {"s": SVG_NS}
+
+
+def _blob_grid() -> DensityGrid:
+    """チャートの中ほどに置いた1つ山のグリッド（最大値 100）。"""
+    xe, ye = np.linspace(20.0, 60.0, 21), np.linspace(5.0, 15.0, 11)
+    xc, yc = 0.5 * (xe[:-1] + xe[1:]), 0.5 * (ye[:-1] + ye[1:])
+    z = 100.0 * np.exp(-(((xc[None, :] - 40.0) / 8.0) ** 2 + ((yc[:, None] - 10.0) / 2.5) ** 2))
+    return DensityGrid(z=z, x_edges=xe, y_edges=ye)
+
+
+def _layers(svg: bytes) -> dict[str, ET.Element]:
+    root = ET.fromstring(svg)
+    groups = root.findall("s:g", NS)
+    assert [g.get("id") for g in groups] == list(LAYERS)
+    return {g.get("id"): g for g in groups}
+
+
+def test_density_svg_layers_and_band_fills() -> None:
+    grid = _blob_grid()
+    svg = density_svg(grid, "Blob & <title>", ncontours=5, colorscale="Blues")
+    layers = _layers(svg)
+
+    # 最下段の rect ＋ レベルごとの帯（evenodd の塗り）。色は colorscale の順
+    levels = nice_levels(0.0, 100.0, 5)
+    colors = sample_colorscale("Blues", list(np.linspace(0.0, 1.0, levels.size + 1)))
+    band = layers["density"].find("s:g", NS)
+    rects, paths = band.findall("s:rect", NS), band.findall("s:path", NS)
+    assert len(rects) == 1 and rects[0].get("fill") == colors[0]
+    assert [p.get("fill") for p in paths] == colors[1:]
+    assert all(p.get("fill-rule") == "evenodd" and p.get("d").endswith("Z") for p in paths)
+
+    texts = ["".join(t.itertext()) for t in layers["text"].iter(f"{{{SVG_NS}}}text")]
+    assert "Blob & <title>" in texts
+    assert "density" in texts  # 重心のトレース名
+    assert len(layers["chartborder"]) > 0
+    assert len(layers["zone"]) == 0 and len(layers["points"]) == 0
+
+
+def test_density_svg_uses_shared_scale_levels() -> None:
+    grid = _blob_grid()
+    scale = SharedScale(zmax=200.0, ncontours=10)  # レベル 20, 40, ..., 180
+    paths = _layers(density_svg(grid, "t", scale=scale))["density"].find("s:g", NS).findall("s:path", NS)
+    # 最大 100 のグリッドには scale.levels のうち 100 未満のレベルしか現れない
+    assert 0 < len(paths) == int((scale.levels < 100.0).sum())
+
+
+def test_density_svg_empty_grid_has_no_bands() -> None:
+    g = _blob_grid()
+    svg = density_svg(DensityGrid(z=np.zeros_like(g.z), x_edges=g.x_edges, y_edges=g.y_edges), "empty")
+    assert len(_layers(svg)["density"]) == 0
+
+
+def test_render_density_svg_native_parses(hourly_epw, tmp_path) -> None:
+    df = add_psychro_columns(load_epw(hourly_epw)[0], method="lut")
+    out = render_density_svg(df, tmp_path / "yearly.svg", "Synthetic / Yearly", backend="native")
+    layers = _layers(out.read_bytes())
+    assert layers["density"].find("s:g", NS).findall("s:path", NS)
+    assert any("Synthetic / Yearly" in "".join(t.itertext()) for t in layers["text"].iter(f"{{{SVG_NS}}}text"))
@@ -0,0 +1,56 @@
+# tests/test_period_filter.py
+from __future__ import annotations
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from psychrometric.epw_io import load_epw
+from psychrometric.period_filter import CalendarIndex, Period, filter_period, split_by_hours, split_by_month
+
+PERIODS = [
+    Period(),
+    Period(months=(6, 7, 8)),
+    Period(months=(12, 1, 2)),
+    Period(hours=tuple(range(9, 18))),
+    Period(months=(7,), hours=(14,)),
+    Period(months=(3, 4), hours=(0, 23)),
+    Period(start=datetime(1991, 3, 15), end=datetime(1991, 4, 2, 12)),
+    Period(months=(5,), hours=(6, 7, 8), start=datetime(1991, 5, 10)),
+]
+
+
+def _filter_by_mask(df: pd.DataFrame, period: Period) -> pd.DataFrame:
+    """CalendarIndex 導入前の、行ごとのブールマスクで絞る実装。"""
+    out = df
+    if period.months:
+        out = out[out["month"].isin(set(period.months))]
+    if period.hours:
+        out = out[out["dt"].dt.hour.isin(set(period.hours))]
+    if period.start is not None:
+        out = out[out["dt"] >= period.start]
+    if period.end is not None:
+        out = out[out["dt"] < period.end]
+    return out.reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def df(hourly_epw) -> pd.DataFrame:
+    return load_epw(hourly_epw)[0]
+
+
+@pytest.mark.parametrize("period", PERIODS, ids=repr)
+def test_indexed_filter_matches_mask(df: pd.DataFrame, period: Period) -> None:
+    index = CalendarIndex.from_df(df)
+    pd.testing.assert_frame_equal(filter_period(df, period, index), _filter_by_mask(df, period))
+
+
+def test_indexed_splits_match_mask(df: pd.DataFrame) -> None:
+    index = CalendarIndex.from_df(df)
+    for m, part in split_by_month(df, index).items():
+        pd.testing.assert_frame_equal(part, _filter_by_mask(df, Period(months=(m,))))
+
+    hours_map = {"Daytime": list(range(9, 18)), "Night": [22, 23, 0, 1]}
+    for name, part in split_by_hours(df, hours_map, index).items():
+        pd.testing.assert_frame_equal(part, _filter_by_mask(df, Period(hours=tuple(hours_map[name]))))
@@ -0,0 +1,27 @@
+# tests/test_preview.py
+from __future__ import annotations
+
+from psychrometric.batch import plan_jobs
+from psychrometric.epw_io import load_epw
+from psychrometric.main import DEFAULT_SEASONS
+from psychrometric.preview import PreviewSource, PreviewStyle
+from psychrometric.psychro_frame import add_psychro_columns
+from psychrometric.render import render_density_svg
+
+
+def test_render_kwargs_keeps_default_backend_without_preview() -> None:
+    style = PreviewStyle(nbinsx=25)
+    assert "backend" not in style.render_kwargs()
+    assert style.render_kwargs(previewed=True)["backend"] == "native"
+    assert style.render_kwargs(previewed=True)["nbinsx"] == 25
+
+
+def test_previewed_export_matches_preview(hourly_epw, tmp_path) -> None:
+    """プレビューを出したあとの書き出しは、プレビューと同じSVGになる（タイトル以外）。"""
+    df = add_psychro_columns(load_epw(hourly_epw)[0], method="lut")
+    source = PreviewSource(df, "T", seasons=DEFAULT_SEASONS)
+    style = PreviewStyle(colorscale="Viridis", nbinsx=25, nbinsy=20, ncontours=7, opacity=0.8)
+
+    job = plan_jobs(df, "T", tmp_path, seasons=DEFAULT_SEASONS, show_counts=False)[0]
+    out = render_density_svg(job.df, job.out_svg, source.title(job.name), **style.render_kwargs(previewed=True))
+    assert out.read_bytes() == source.render(job.name, style)
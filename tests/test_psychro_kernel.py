@@ -0,0 +1,22 @@
+# tests/test_psychro_kernel.py
+from __future__ import annotations
+
+import numpy as np
+
+from psychrometric.epw_io import load_epw
+from psychrometric.psychro_frame import median_pressure_kpa
+from psychrometric.psychro_kernel import MAX_ERROR_EN_KJKG, MAX_ERROR_HR_GKG, max_error_vs_shimeri
+
+
+def test_lut_error_within_documented_bound(hourly_epw) -> None:
+    """表引きの en / hr と shimeri（CoolProp）の差が docstring の上限以内。shimeri は遅いので間引いて比べる。"""
+    df, _ = load_epw(hourly_epw)
+    ok = df["db_c"].notna() & df["rh_pct"].notna()
+    sample = df[ok].iloc[::8]
+    err = max_error_vs_shimeri(
+        sample["db_c"].to_numpy(), sample["rh_pct"].to_numpy(), median_pressure_kpa(df)
+    )
+
+    assert np.isfinite(err["hr_gkg"]) and np.isfinite(err["en_kjkg"])
+    assert err["hr_gkg"] <= MAX_ERROR_HR_GKG
+    assert err["en_kjkg"] <= MAX_ERROR_EN_KJKG
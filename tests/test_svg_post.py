@@ -0,0 +1,180 @@
+# tests/test_svg_post.py
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from psychrometric.density import DensityGrid
+from psychrometric.native_svg import density_svg
+from psychrometric.svg_post import LAYERS, SVG_NS, SvgOptimize, layer_svg, optimize_svg, tag_trace_layers
+
+G = f"{{{SVG_NS}}}g"
+
+# Kaleido の出力を縮めた形（trace group・目盛・タイトルだけ）
+PLOTLY_LIKE = f"""<svg xmlns="{SVG_NS}" width="100" height="100">
+<defs id="defs-1"><g class="clips"/></defs>
+<g class="bglayer"><rect class="bg" x="0" y="0" width="100" height="100"/></g>
+<g class="cartesianlayer"><g class="subplot xy" transform="translate(5,5)">
+  <g class="gridlayer"><path class="ygrid" d="M0,0H90"/></g>
+  <g class="overplot"><g class="xy" transform="translate(50,50)" clip-path="url(#clip1)">
+    <g class="contourlayer mlayer"><g class="contour"><path class="fill" d="M0,0L1,1Z"/></g></g>
+    <g class="scatterlayer mlayer">
+      <g class="trace scatter tracelayer-zone-1"><path d="M0,0L2,2"/></g>
+      <g class="trace scatter tracelayer-points-2"><path d="M0,0L3,3"/></g>
+      <g class="trace scatter tracelayer-text-3"><g class="textpoint"><text>density</text></g></g>
+      <g class="trace scatter"><path class="js-line" d="M0,0L4,4"/></g>
+    </g>
+  </g></g>
+  <g class="xaxislayer-above"><path class="xtick ticks" d="M10,90v-5"/><g class="xtick"><text>10</text></g></g>
+  <g class="yaxislayer-above"><path class="ytick ticks" d="M0,10h5"/><g class="ytick"><text>5</text></g></g>
+</g></g>
+<g class="infolayer"><g class="g-gtitle"><text class="gtitle">T / M01</text></g></g>
+</svg>""".encode()
+
+
+def _texts(elem: ET.Element) -> list[str]:
+    return [t.text for t in elem.iter(f"{{{SVG_NS}}}text")]
+
+
+def _layers(svg: bytes) -> dict[str, ET.Element]:
+    root = ET.fromstring(svg)
+    groups = [c for c in root if c.tag == G]
+    assert [g.get("id") for g in groups] == list(LAYERS)
+    return {g.get("id"): g for g in groups}
+
+
+def test_tag_trace_layers() -> None:
+    fig = go.Figure([
+        go.Scatter(name="density"),
+        go.Scatter(name="points"),
+        go.Scatter(name="zone"),
+        go.Scatter(name="anything", meta={"layer": "zone"}),
+        go.Scatter(name="", mode="text"),
+        go.Scatter(name="", mode="lines"),  # 背景の補助線
+        go.Scatter(name="x", meta={"layer": "nope"}),
+    ])
+    tag_trace_layers(fig)
+    assert [tr.uid for tr in fig.data] == [
+        "layer-density-0", "layer-points-1", "layer-zone-2", "layer-zone-3", "layer-text-4", None, None,
+    ]
+
+
+def test_layer_svg_classifies_traces_ticks_and_titles() -> None:
+    layers = _layers(layer_svg(PLOTLY_LIKE))
+
+    assert [p.get("class") for p in layers["density"].iter(f"{{{SVG_NS}}}path")] == ["fill"]
+    assert [p.get("d") for p in layers["zone"].iter(f"{{{SVG_NS}}}path")] == ["M0,0L2,2"]
+    assert [p.get("d") for p in layers["points"].iter(f"{{{SVG_NS}}}path")] == ["M0,0L3,3"]
+    # 目盛ラベルは native_svg と同じく text、目盛線・補助線・枠は chartborder
+    assert sorted(_texts(layers["text"])) == sorted(["density", "10", "5", "T / M01"])
+    assert _texts(layers["chartborder"]) == []
+    cb_paths = {p.get("d") for p in layers["chartborder"].iter(f"{{{SVG_NS}}}path")}
+    assert {"M10,90v-5", "M0,10h5", "M0,0H90", "M0,0L4,4"} <= cb_paths
+
+
+def test_moved_groups_keep_parent_transform_and_clip() -> None:
+    layers = _layers(layer_svg(PLOTLY_LIKE))
+    wrappers = [g for g in layers["points"].iter(G) if g.get("clip-path")]
+    assert wrappers and wrappers[0].get("clip-path") == "url(#clip1)"
+    chain = [g.get("transform") for g in layers["points"].iter(G) if g.get("transform")]
+    assert chain[:2] == ["translate(5,5)", "translate(50,50)"]
+
+
+def test_layer_svg_is_idempotent() -> None:
+    once = layer_svg(PLOTLY_LIKE)
+    assert layer_svg(once) == once
+
+    g = DensityGrid(z=np.eye(4) * 5.0, x_edges=np.linspace(20, 40, 5), y_edges=np.linspace(5, 10, 5))
+    native = density_svg(g, "native")
+    assert layer_svg(native) == native
+
+
+def test_stray_layer_group_is_merged_not_buried() -> None:
+    """ルート直下のレイヤー group（順序が崩れたもの）は同じ id のレイヤーへまとめる（chartborder に埋もれない）。"""
+    root = ET.fromstring(layer_svg(PLOTLY_LIKE))
+    first = [c for c in root if c.tag == G][0]
+    root.remove(first)
+    root.append(first)  # chartborder を末尾へ
+    layers = _layers(layer_svg(ET.tostring(root)))
+    assert all(g.get("id") not in LAYERS for g in layers["chartborder"].iter(G) if g is not layers["chartborder"])
+    assert sorted(_texts(layers["text"])) == sorted(["density", "10", "5", "T / M01"])
+
+
+# ---------------------------------------------------------------------------
+# optimize_svg
+# ---------------------------------------------------------------------------
+
+
+def _svg_with_path(d: str, **attrs: str) -> bytes:
+    extra = "".join(f' {k}="{v}"' for k, v in attrs.items())
+    return f'<svg xmlns="{SVG_NS}"><g id="density"><path d="{d}"{extra}/></g></svg>'.encode()
+
+
+def _out_d(svg: bytes) -> str:
+    return ET.fromstring(svg).find(f".//{{{SVG_NS}}}path").get("d")
+
+
+def _subpaths(d: str) -> list[tuple[list[tuple[float, float]], bool]]:
+    """optimize_svg が書く形（M x,y L x,y ... [Z]）を点列に戻す。"""
+    out = []
+    for body, z in re.findall(r"M([^MZ]*)(Z?)", d):
+        pts = [tuple(float(v) for v in p.split(",")) for p in body.split("L")]
+        out.append((pts, bool(z)))
+    return out
+
+
+@pytest.mark.parametrize(
+    "d, expected",
+    [
+        ("M0,0 L10,0 L10,10 Z", [([(0, 0), (10, 0), (10, 10)], True)]),
+        ("M0,0 H10 V10 H0 Z", [([(0, 0), (10, 0), (10, 10), (0, 10)], True)]),
+        # Z の後に M なしで続く L / V は、閉じたサブパスの始点から描き始める
+        ("M0,0 L10,0 L10,10 Z L5,-5", [([(0, 0), (10, 0), (10, 10)], True), ([(0, 0), (5, -5)], False)]),
+        ("M2,2 H10 V10 Z V-5 H4", [([(2, 2), (10, 2), (10, 10)], True), ([(2, 2), (2, -5), (4, -5)], False)]),
+        ("M0,0 L10,0 M20,20 L30,20 Z", [([(0, 0), (10, 0)], False), ([(20, 20), (30, 20)], True)]),
+    ],
+)
+def test_optimize_round_trips_closed_and_axis_aligned_paths(d: str, expected) -> None:
+    out = _out_d(optimize_svg(_svg_with_path(d), SvgOptimize(tolerance=0.01)))
+    assert _subpaths(out) == [([tuple(map(float, p)) for p in pts], closed) for pts, closed in expected]
+
+
+def test_optimize_leaves_curves_and_relative_paths_rounded_only() -> None:
+    out = _out_d(optimize_svg(_svg_with_path("M0.123456,0 C1.98765,2 3,4 5,6 l1.00001,1"), SvgOptimize(precision=2)))
+    assert out == "M0.12,0 C1.99,2 3,4 5,6 l1,1"
+
+
+def test_optimize_preserves_bbox_within_tolerance() -> None:
+    rng = np.random.default_rng(0)
+    x = np.linspace(0.0, 400.0, 801)
+    y = 100.0 + 40.0 * np.sin(x / 30.0) + rng.normal(0.0, 0.1, x.size)
+    d = "M" + " L".join(f"{a:.4f},{b:.4f}" for a, b in zip(x, y))
+    tol = 0.5
+
+    out = _out_d(optimize_svg(_svg_with_path(d), SvgOptimize(precision=2, tolerance=tol)))
+    (pts, closed), = _subpaths(out)
+    pts = np.asarray(pts)
+
+    assert not closed
+    assert len(pts) < x.size / 4  # 十分に間引かれている
+    np.testing.assert_allclose(pts[[0, -1]], [[x[0], y[0]], [x[-1], y[-1]]], atol=0.005)  # 端点は残る
+    lo, hi = np.array([x.min(), y.min()]), np.array([x.max(), y.max()])
+    assert np.all(pts.min(axis=0) >= lo - 0.005) and np.all(pts.max(axis=0) <= hi + 0.005)
+    assert np.all(pts.min(axis=0) <= lo + tol) and np.all(pts.max(axis=0) >= hi - tol)
+
+
+def test_optimize_keeps_layers_and_dedupes_styles() -> None:
+    g = DensityGrid(z=np.eye(6) * 5.0, x_edges=np.linspace(20, 40, 7), y_edges=np.linspace(5, 10, 7))
+    native = density_svg(g, "native")
+    out = optimize_svg(native)
+    assert [c.get("id") for c in ET.fromstring(out) if c.tag == G] == list(LAYERS)
+    assert len(out) < len(native)
+
+    doc = f'<svg xmlns="{SVG_NS}"><g id="text"><text style="fill:red">a</text><text style="fill:red">b</text></g></svg>'
+    root = ET.fromstring(optimize_svg(doc.encode()))
+    assert [t.get("class") for t in root.iter(f"{{{SVG_NS}}}text")] == ["s0", "s0"]
+    assert root.find(f"{{{SVG_NS}}}defs/{{{SVG_NS}}}style").text == ".s0{fill:red}"
@@ -0,0 +1,128 @@
+# tests/test_zone_stats.py
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from psychrometric.enhance_chart import ZoneSpec
+from psychrometric.period_filter import Period
+from psychrometric.psychro_frame import CHART_PRESSURE_ATTR
+from psychrometric.zone_stats import (
+    TABLE_COLUMNS,
+    ZonePolygon,
+    points_in_polygon,
+    project_zone,
+    write_zone_table,
+    zone_table,
+)
+
+# en 20..30 / hr 5..10 の正方形と、en=30 の辺を共有する右隣の正方形
+SQUARE = ZonePolygon("Square", en=np.array([20.0, 30.0, 30.0, 20.0]), hr=np.array([5.0, 5.0, 10.0, 10.0]))
+RIGHT = ZonePolygon("Right", en=np.array([30.0, 40.0, 40.0, 30.0]), hr=np.array([5.0, 5.0, 10.0, 10.0]))
+
+# (月, en, hr)。1月: 内側2・外側1・NaN 1、2月: 内側1・共有辺上1
+POINTS = [
+    (1, 25.0, 7.0),
+    (1, 21.0, 9.0),
+    (1, 50.0, 7.0),
+    (1, np.nan, np.nan),
+    (2, 22.0, 6.0),
+    (2, 30.0, 7.0),
+]
+
+
+def _frame(points, step_h: float = 1.0) -> pd.DataFrame:
+    """psychro 列を直接持つ（add_psychro_columns を通さない）フレーム。月の中では step_h 間隔。"""
+    month = np.array([m for m, _, _ in points])
+    start = pd.to_datetime([f"1991-{m:02d}-01" for m in month])
+    nth = pd.Series(month).groupby(month).cumcount().to_numpy()
+    dt = start + pd.to_timedelta(nth * step_h, unit="h")
+    en = np.array([e for _, e, _ in points], dtype=float)
+    hr = np.array([h for _, _, h in points], dtype=float)
+    df = pd.DataFrame({"dt": dt, "month": month, "en_kjkg": en, "hr_gkg": hr, "x_skew": en, "y_skew": hr})
+    df.attrs[CHART_PRESSURE_ATTR] = 101.325
+    return df
+
+
+PERIODS = {"Jan": Period(months=(1,)), "Feb": Period(months=(2,)), "Yearly": Period()}
+
+
+def test_points_in_polygon_square() -> None:
+    x = np.array([25.0, 21.0, 50.0, 25.0, np.nan])
+    y = np.array([7.0, 9.0, 7.0, 11.0, 7.0])
+    assert points_in_polygon(x, y, SQUARE.en, SQUARE.hr).tolist() == [True, True, False, False, False]
+
+
+def test_shared_edge_counts_once() -> None:
+    """隣り合うゾーンの共有辺・共有頂点上の点は、ちょうど片方にだけ入る。"""
+    x = np.array([30.0, 30.0, 30.0, 25.0, 35.0])
+    y = np.array([7.0, 5.0, 10.0 - 1e-9, 5.0, 5.0])
+    a = points_in_polygon(x, y, SQUARE.en, SQUARE.hr)
+    b = points_in_polygon(x, y, RIGHT.en, RIGHT.hr)
+    assert (a ^ b).all()
+
+
+def test_zone_table_counts() -> None:
+    table = zone_table(_frame(POINTS), [SQUARE, RIGHT], PERIODS)
+    assert list(table.columns) == list(TABLE_COLUMNS)
+
+    got = {(r.zone, r.period): (r.hours, r.total_hours) for r in table.itertuples(index=False)}
+    assert got == {
+        ("Square", "Jan"): (2.0, 4.0),  # NaN 行は total_hours に入り、どのゾーンにも入らない
+        ("Right", "Jan"): (0.0, 4.0),
+        ("Square", "Feb"): (1.0, 2.0),
+        ("Right", "Feb"): (1.0, 2.0),  # en=30 の共有辺上の点は右側にだけ入る
+        ("Square", "Yearly"): (3.0, 6.0),
+        ("Right", "Yearly"): (1.0, 6.0),
+    }
+    sq = table[table["zone"] == "Square"].set_index("period")["pct"]
+    assert sq["Jan"] == pytest.approx(50.0)
+    assert sq["Yearly"] == pytest.approx(50.0)
+
+
+def test_zone_table_subhourly_and_empty_period() -> None:
+    """10分間隔なら1行 = 1/6 h。該当行のない期間は 0 時間・0 %。"""
+    periods = {"Jan": Period(months=(1,)), "Jul": Period(months=(7,))}
+    table = zone_table(_frame(POINTS, step_h=1 / 6), [SQUARE], periods).set_index("period")
+    assert table.loc["Jan", "hours"] == pytest.approx(2 / 6)
+    assert table.loc["Jan", "total_hours"] == pytest.approx(4 / 6)
+    assert table.loc["Jul", "hours"] == 0.0
+    assert table.loc["Jul", "total_hours"] == 0.0
+    assert table.loc["Jul", "pct"] == 0.0
+
+
+def test_zone_table_from_zone_spec() -> None:
+    """db_rh のゾーンを投影して、db/rh から変換した点を判定する。"""
+    spec = ZoneSpec("db_rh", x=[20, 26, 26, 20], y=[30, 30, 60, 60])
+    df = pd.DataFrame({
+        "dt": pd.date_range("1991-07-01", periods=4, freq="h"),
+        "month": [7, 7, 7, 7],
+        "db_c": [23.0, 10.0, 23.0, 30.0],
+        "rh_pct": [45.0, 45.0, 80.0, 45.0],
+        "p_kpa": [101.325] * 4,
+    })
+    table = zone_table(df, {"Comfort": spec}, {"Jul": Period(months=(7,))})
+    assert table["hours"].tolist() == [1.0]
+    assert table["total_hours"].tolist() == [4.0]
+
+    poly = project_zone("Comfort", spec)
+    assert poly.name == "Comfort"
+    en0, en1, hr0, hr1 = poly.bbox
+    assert en0 < en1 and hr0 < hr1
+
+
+def test_write_zone_table(tmp_path) -> None:
+    table = zone_table(_frame(POINTS), [SQUARE, RIGHT], PERIODS)
+
+    csv = pd.read_csv(write_zone_table(table, tmp_path / "zones.csv"))
+    assert list(csv.columns) == list(TABLE_COLUMNS)
+    assert len(csv) == len(table)
+    assert csv["hours"].tolist() == pytest.approx(table["hours"].tolist())
+
+    data = json.loads(write_zone_table(table, tmp_path / "sub" / "zones.json").read_text(encoding="utf-8"))
+    assert set(data) == {"Square", "Right"}
+    assert data["Square"]["Jan"] == {"hours": 2.0, "total_hours": 4.0, "pct": 50.0}
+    assert data["Right"]["Feb"]["pct"] == 50.0